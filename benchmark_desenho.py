@@ -0,0 +1,297 @@
+"""
+BENCHMARK DO DESENHO - MENU DO RESTAURANTE
+
+Mede o tempo por frame das funções de desenho (desenhar_menu, desenhar_pedido,
+desenhar_conta e, com um pop-up aberto, a cena completa desenhar_cena pelas
+regiões sujas, como no loop principal) com
+menus e pedidos sintéticos de tamanho configurável, sem abrir janela (driver
+de vídeo "dummy" do SDL).
+
+Para cada função e tamanho mostra os percentis do tempo por frame (p50, p90,
+p99 e máximo) e as alocações por frame: memória Python (tracemalloc),
+superfícies pygame criadas e textos rasterizados (falhas da cache de texto).
+
+Uso:
+    python benchmark_desenho.py
+    python benchmark_desenho.py --tamanhos 10 1000 10000 --frames 300
+    python benchmark_desenho.py --json resultados.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import pygame
+import menu_restaurante as app
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+TAMANHOS_PADRAO = (10, 100, 1000, 10000)  # Número de itens do menu / linhas do pedido
+FRAMES_PADRAO = 200  # Frames medidos por cenário
+AQUECIMENTO_PADRAO = 20  # Frames iniciais não contados (caches ainda vazias)
+CENARIOS = ("menu", "pedido", "conta", "popup_remover", "popup_pagamento")
+# Categorias dos menus sintéticos (as do restaurante; o ficheiro do catálogo não é lido)
+CATEGORIAS = ("Entradas", "Especialidades do Chef", "Pastas", "Pizza", "Bebidas", "Sobremesas")
+
+# ================================
+# DADOS SINTÉTICOS
+# ================================
+
+def gerar_menu(tamanho, semente=0):
+    """
+    Gera um menu sintético com `tamanho` itens (nome, preco, categoria),
+    distribuídos pelas categorias do restaurante e agrupados por categoria
+    como no menu real.
+    """
+    aleatorio = random.Random(semente)
+    categorias = CATEGORIAS
+    itens = []
+    for i in range(tamanho):
+        categoria = categorias[i * len(categorias) // tamanho]
+        preco = aleatorio.randint(100, 3000) / 100
+        itens.append((f"Prato Sintético {i + 1:05d}", preco, categoria))
+    return itens
+
+def gerar_pedido(linhas, semente=0):
+    """Preenche o pedido com as primeiras `linhas` entradas do menu (1 a 3 unidades cada)."""
+    aleatorio = random.Random(semente)
+    app.pedido.limpar()
+    for indice in range(min(linhas, len(app.menu))):
+        app.pedido.adicionar(indice, aleatorio.randint(1, 3))
+
+# ================================
+# CENÁRIOS
+# ================================
+
+def preparar_cenario(cenario, tamanho):
+    """
+    Coloca a aplicação no estado do cenário e retorna (funcao, barra, nome_scroll):
+    a função de desenho a medir, a scrollbar que define o intervalo de scroll
+    (None se não há scroll) e o nome da variável global de scroll a percorrer.
+    """
+    app.definir_menu(gerar_menu(tamanho))
+    gerar_pedido(tamanho)
+    app.fechar_popup()
+    app.item_para_remover = None
+    app.metodo_pagamento = None
+
+    if cenario == "menu":
+        app.estado_atual = "menu"
+        app.item_selecionado = tamanho // 2
+        return app.desenhar_menu, app.lista_menu.scrollbar, "scroll_y"
+
+    if cenario == "pedido":
+        app.estado_atual = "pedido"
+        app.scroll_pedido_y = 0
+        app.criar_itens_pedido()
+        app.item_pedido_selecionado = len(app.itens_pedido_obj) // 2
+        app.itens_pedido_obj[app.item_pedido_selecionado]['selecionado'] = True
+        return app.desenhar_pedido, app.lista_pedido.scrollbar, "scroll_pedido_y"
+
+    if cenario == "conta":
+        app.estado_atual = "conta"
+        app.scroll_conta_y = 0
+        app.metodo_pagamento = "cartao"
+        app.criar_conta_scrollbar()
+        return app.desenhar_conta, app.lista_conta.scrollbar, "scroll_conta_y"
+
+    # Pop-ups: mede-se o frame do loop principal (tela do pedido por baixo do pop-up)
+    app.estado_atual = "pedido"
+    app.criar_itens_pedido()
+    app.criar_botoes()
+    if cenario == "popup_remover":
+        app.item_para_remover = dict(app.itens_pedido_obj[0], quantidade=3)
+        app.quantidade_a_remover = 2
+        app.abrir_popup(app.PopupRemover())
+    else:
+        app.abrir_popup(app.PopupPagamento())
+    return desenhar_popup_regioes, None, None
+
+def desenhar_popup_regioes(tela):
+    """
+    Frame com um pop-up aberto: alterna o hover de um botão (como o rato a
+    passar por cima) e desenha só as regiões sujas com desenhar_cena. O
+    primeiro frame, logo depois de abrir_popup(), é o da tela inteira.
+    """
+    popup = app.popup_atual
+    if not app.regioes_sujas.pendente():
+        botao = next(iter(popup.botoes.values()))
+        popup.definir_hover(botao, not botao.hover)
+    app.desenhar_cena(tela, app.regioes_sujas.recolher(app.LARGURA, app.ALTURA))
+
+def posicao_scroll(frame, total_frames, scroll_max):
+    """Posição de scroll no frame dado: vai do topo ao fim e volta (varrimento completo)."""
+    if scroll_max <= 0 or total_frames <= 1:
+        return 0
+    fase = (2 * frame / total_frames) % 2
+    return round(scroll_max * (fase if fase <= 1 else 2 - fase))
+
+def desenhar_frame(tela, funcao, barra, nome_scroll, frame, total_frames):
+    """
+    Atualiza o scroll para o frame e chama a função de desenho. As listas são
+    desenhadas sobre a tela limpa; os pop-ups desenham só as regiões sujas
+    por cima do frame anterior.
+    """
+    if barra is not None:
+        posicao = posicao_scroll(frame, total_frames, barra.scroll_max)
+        barra.scroll_y = posicao
+        setattr(app, nome_scroll, posicao)
+        tela.fill(app.COR_FUNDO)
+    funcao(tela)
+
+# ================================
+# MEDIÇÃO
+# ================================
+
+class ContadorSuperficies(pygame.Surface):
+    """Substitui pygame.Surface durante a medição de alocações para contar as superfícies criadas."""
+    criadas = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        ContadorSuperficies.criadas += 1
+
+def percentil(valores_ordenados, p):
+    """Percentil p (0-100) pelo método do posto mais próximo."""
+    if not valores_ordenados:
+        return 0
+    posto = max(1, -(-p * len(valores_ordenados) // 100))
+    return valores_ordenados[min(posto, len(valores_ordenados)) - 1]
+
+def medir_tempos(tela, cenario, tamanho, frames, aquecimento):
+    """Mede o tempo de cada frame em nanossegundos, sem os frames de aquecimento."""
+    funcao, barra, nome_scroll = preparar_cenario(cenario, tamanho)
+    app.cache_texto.limpar()
+    total = frames + aquecimento
+    tempos = []
+    for frame in range(total):
+        inicio = time.perf_counter_ns()
+        desenhar_frame(tela, funcao, barra, nome_scroll, frame, total)
+        duracao = time.perf_counter_ns() - inicio
+        if frame >= aquecimento:
+            tempos.append(duracao)
+    return sorted(tempos)
+
+def medir_alocacoes(tela, cenario, tamanho, frames, aquecimento):
+    """
+    Repete o cenário com tracemalloc ativo (numa passagem à parte, para não
+    afetar os tempos) e retorna as alocações médias por frame.
+    As superfícies pygame guardam os píxeis fora do Python, por isso são
+    contadas à parte (Surface criadas e textos rasterizados).
+    """
+    funcao, barra, nome_scroll = preparar_cenario(cenario, tamanho)
+    app.cache_texto.limpar()
+    total = frames + aquecimento
+    for frame in range(aquecimento):
+        desenhar_frame(tela, funcao, barra, nome_scroll, frame, total)
+
+    falhas_antes = app.cache_texto.falhas
+    ContadorSuperficies.criadas = 0
+    surface_original = pygame.Surface
+    pygame.Surface = ContadorSuperficies
+    tracemalloc.start()
+    try:
+        memoria_antes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for frame in range(aquecimento, total):
+            desenhar_frame(tela, funcao, barra, nome_scroll, frame, total)
+        memoria_depois, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        pygame.Surface = surface_original
+
+    return {
+        "bytes_pico": pico - memoria_antes,
+        "bytes_liquidos_frame": (memoria_depois - memoria_antes) / frames,
+        "superficies_frame": ContadorSuperficies.criadas / frames,
+        "textos_frame": (app.cache_texto.falhas - falhas_antes) / frames,
+    }
+
+def executar(tela, tamanhos, cenarios, frames, aquecimento, com_alocacoes=True):
+    """Corre todos os cenários para todos os tamanhos e retorna a lista de resultados."""
+    resultados = []
+    for tamanho in tamanhos:
+        for cenario in cenarios:
+            tempos = medir_tempos(tela, cenario, tamanho, frames, aquecimento)
+            resultado = {
+                "cenario": cenario,
+                "tamanho": tamanho,
+                "frames": len(tempos),
+                "p50_ms": percentil(tempos, 50) / 1e6,
+                "p90_ms": percentil(tempos, 90) / 1e6,
+                "p99_ms": percentil(tempos, 99) / 1e6,
+                "max_ms": tempos[-1] / 1e6 if tempos else 0,
+            }
+            if com_alocacoes:
+                resultado.update(medir_alocacoes(tela, cenario, tamanho, frames, aquecimento))
+            resultados.append(resultado)
+            mostrar_linha(resultado)
+    return resultados
+
+# ================================
+# RELATÓRIO E LINHA DE COMANDO
+# ================================
+
+def mostrar_cabecalho(com_alocacoes):
+    """Escreve o cabeçalho da tabela de resultados."""
+    colunas = f"{'cenário':<16}{'itens':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'máx ms':>9}"
+    if com_alocacoes:
+        colunas += f"{'pico KiB':>10}{'B/frame':>10}{'surf/fr':>9}{'txt/fr':>8}"
+    print(colunas)
+    print("-" * len(colunas))
+
+def mostrar_linha(r):
+    """Escreve uma linha da tabela de resultados."""
+    linha = (f"{r['cenario']:<16}{r['tamanho']:>7}{r['p50_ms']:>9.3f}{r['p90_ms']:>9.3f}"
+             f"{r['p99_ms']:>9.3f}{r['max_ms']:>9.3f}")
+    if "bytes_pico" in r:
+        linha += (f"{r['bytes_pico'] / 1024:>10.1f}{r['bytes_liquidos_frame']:>10.1f}"
+                  f"{r['superficies_frame']:>9.2f}{r['textos_frame']:>8.2f}")
+    print(linha, flush=True)
+
+def main(argumentos=None):
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Benchmark das funções de desenho do menu (sem janela).")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO),
+                        help="número de itens do menu e de linhas do pedido (10 a 10000)")
+    parser.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=list(CENARIOS),
+                        help="funções de desenho a medir")
+    parser.add_argument("--frames", type=int, default=FRAMES_PADRAO, help="frames medidos por cenário")
+    parser.add_argument("--aquecimento", type=int, default=AQUECIMENTO_PADRAO,
+                        help="frames iniciais ignorados")
+    parser.add_argument("--sem-alocacoes", action="store_true", help="não medir alocações (mais rápido)")
+    parser.add_argument("--json", metavar="FICHEIRO", help="guardar os resultados em JSON")
+    args = parser.parse_args(argumentos)
+
+    if args.frames < 1 or any(t < 1 for t in args.tamanhos):
+        parser.error("--frames e --tamanhos têm de ser positivos")
+
+    com_alocacoes = not args.sem_alocacoes
+    contexto = app.Aplicacao(sem_janela=True)
+    tela = contexto.tela
+    print(f"Tela {app.LARGURA}x{app.ALTURA}, driver {pygame.display.get_driver()}, "
+          f"{args.frames} frames (+{args.aquecimento} de aquecimento)")
+    mostrar_cabecalho(com_alocacoes)
+    resultados = executar(tela, args.tamanhos, args.cenarios, args.frames, args.aquecimento, com_alocacoes)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as ficheiro:
+            json.dump({
+                "largura": app.LARGURA,
+                "altura": app.ALTURA,
+                "frames": args.frames,
+                "aquecimento": args.aquecimento,
+                "resultados": resultados,
+            }, ficheiro, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados em {args.json}")
+
+    contexto.fechar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,472 @@
+"""
+CATÁLOGO DO MENU - MENU DO RESTAURANTE
+
+Carrega o catálogo do menu (itens, preços, categorias e traduções) a partir
+de um ficheiro JSON ou CSV. A ordem das categorias é a ordem em que aparecem
+no ficheiro.
+
+Da primeira vez que um ficheiro é lido, o catálogo é compilado numa cache
+binária compacta: uma tabela de textos (cada texto guardado uma só vez) e
+colunas em array (índices dos textos, preços em cêntimos, categoria de cada
+item). Nos arranques seguintes a cache é validada pelo tamanho e data de
+modificação do ficheiro (ou, se estes mudaram, pelo hash SHA-256 do conteúdo)
+e o ficheiro original não volta a ser analisado.
+
+Formato JSON:
+    {"idioma": "pt",
+     "categorias": [
+        {"nome": "Bebidas", "iva": 23, "traducoes": {"en": "Drinks"},
+         "itens": [{"id": "cappuccino", "nome": "Cappuccino", "preco": 2.00,
+                    "traducoes": {"en": "Cappuccino"}}]}]}
+
+Formato CSV (uma linha por item; colunas nome_XX / categoria_XX são traduções):
+    id,categoria,nome,preco,iva,nome_en,categoria_en
+"""
+
+import csv
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+PASTA_CACHE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "menu_restaurante")
+
+# Cabeçalho da cache binária: assinatura, versão, ordem dos bytes, tamanho e
+# data de modificação do ficheiro de origem, SHA-256 do conteúdo e contagens
+# (textos, itens, categorias, idiomas)
+ASSINATURA_CACHE = b"MRCT"
+VERSAO_CACHE = 1
+CABECALHO_CACHE = struct.Struct("<4sHcxqq32sIIII")
+
+class ErroCatalogo(ValueError):
+    """Ficheiro de catálogo inválido (formato, campos em falta ou valores errados)."""
+
+# ================================
+# FUNÇÕES AUXILIARES
+# ================================
+
+def preco_para_centimos(preco):
+    """
+    Converte um preço em euros (número ou texto, ex.: "5.50") para cêntimos,
+    sem erros de float. Qualquer valor que não seja um preço finito (texto
+    inválido, NaN, infinito, número grande demais) levanta ErroCatalogo.
+    """
+    try:
+        valor = Decimal(str(preco).strip().replace(",", "."))
+        if not valor.is_finite():
+            raise ErroCatalogo(f"preço inválido: {preco!r}")
+        centimos = int((valor * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (ArithmeticError, ValueError):
+        raise ErroCatalogo(f"preço inválido: {preco!r}") from None
+    if abs(centimos) >= 1 << 63:
+        raise ErroCatalogo(f"preço fora do intervalo: {preco!r}")  # Não cabe na coluna array('q')
+    return centimos
+
+def taxa_iva(valor):
+    """
+    Converte uma taxa de IVA (número ou texto, ex.: 23 ou "23") para um
+    inteiro de 0 a 100; qualquer outro valor (13.5, -5, 200, "abc") levanta
+    ErroCatalogo.
+    """
+    taxa = None
+    if isinstance(valor, float) and valor.is_integer():
+        taxa = int(valor)
+    elif isinstance(valor, int) and not isinstance(valor, bool):
+        taxa = valor
+    elif isinstance(valor, str):
+        try:
+            taxa = int(valor.strip())
+        except ValueError:
+            pass
+    if taxa is None or not 0 <= taxa <= 100:
+        raise ErroCatalogo(f"taxa de IVA inválida (inteiro de 0 a 100): {valor!r}")
+    return taxa
+
+def formatar_euros(centimos):
+    """Formata um valor em cêntimos como texto em euros, por exemplo 1250 -> "12.50€"."""
+    sinal = "-" if centimos < 0 else ""
+    centimos = abs(centimos)
+    return f"{sinal}{centimos // 100}.{centimos % 100:02d}€"
+
+def hash_ficheiro(caminho):
+    """SHA-256 do conteúdo de um ficheiro."""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 16), b""):
+            resumo.update(bloco)
+    return resumo.digest()
+
+def caminho_cache(caminho):
+    """Ficheiro da cache binária de um catálogo (um por caminho de origem)."""
+    chave = hashlib.sha1(os.path.abspath(caminho).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(PASTA_CACHE, f"catalogo-{chave}.bin")
+
+# ================================
+# CATÁLOGO
+# ================================
+
+class Catalogo:
+    """
+    Catálogo do menu guardado por colunas:
+    ids, nomes e categorias (textos internados, partilhados entre itens),
+    precos_centimos (array de inteiros) e indice_categoria (array com a
+    posição da categoria de cada item em `categorias`).
+    As traduções são colunas paralelas por idioma; None = sem tradução.
+    """
+    def __init__(self, ids, nomes, precos_centimos, indice_categoria, categorias,
+                 iva_categorias, traducoes_itens=None, traducoes_categorias=None):
+        self.ids = ids  # Identificador estável de cada item
+        self.nomes = nomes  # Nome de cada item (idioma base)
+        self.precos_centimos = precos_centimos  # array('q') com o preço de cada item
+        self.indice_categoria = indice_categoria  # array('H') com a categoria de cada item
+        self.categorias = categorias  # Nomes das categorias, pela ordem do ficheiro
+        self.iva_categorias = iva_categorias  # Taxa de IVA de cada categoria (None = taxa por omissão)
+        self.traducoes_itens = traducoes_itens or {}  # Idioma -> lista de nomes (None = sem tradução)
+        self.traducoes_categorias = traducoes_categorias or {}  # Idioma -> lista de categorias
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def idiomas(self):
+        """Idiomas com traduções no catálogo."""
+        return tuple(self.traducoes_itens)
+
+    def nomes_categorias(self, idioma=None):
+        """Nomes das categorias pela ordem do catálogo, traduzidos se houver tradução."""
+        traducoes = self.traducoes_categorias.get(idioma)
+        if not traducoes:
+            return tuple(self.categorias)
+        return tuple(t or c for t, c in zip(traducoes, self.categorias))
+
+    def itens(self, idioma=None):
+        """
+        Retorna os itens como tuplas (nome, preco em euros, categoria), o formato
+        da tupla `menu`, com os nomes traduzidos para o idioma dado (se existir).
+        """
+        nomes = self.nomes
+        traducoes = self.traducoes_itens.get(idioma)
+        if traducoes:
+            nomes = [t or n for t, n in zip(traducoes, nomes)]
+        categorias = self.nomes_categorias(idioma)
+        return tuple(
+            (nome, centimos / 100, categorias[c])
+            for nome, centimos, c in zip(nomes, self.precos_centimos, self.indice_categoria)
+        )
+
+    @classmethod
+    def de_itens(cls, itens, ids=None):
+        """Cria um catálogo a partir de tuplas (nome, preco, categoria), como a tupla `menu`."""
+        construtor = ConstrutorCatalogo()
+        for i, (nome, preco, categoria) in enumerate(itens):
+            construtor.adicionar(ids[i] if ids else str(i), nome, preco, categoria)
+        return construtor.construir()
+
+class ConstrutorCatalogo:
+    """Junta itens lidos de um ficheiro e constrói o Catalogo (categorias pela ordem de aparição)."""
+    def __init__(self):
+        self.ids = []
+        self.nomes = []
+        self.precos = array("q")
+        self.indice_categoria = array("H")
+        self.categorias = []
+        self.posicao_categoria = {}
+        self.iva_categorias = []
+        self.traducoes_itens = {}  # Idioma -> {posição do item: nome}
+        self.traducoes_categorias = {}  # Idioma -> {posição da categoria: nome}
+        self.ids_vistos = set()
+
+    def categoria(self, nome, iva=None, traducoes=None):
+        """Regista uma categoria (se ainda não existe) e retorna a sua posição."""
+        nome = sys.intern(str(nome).strip())
+        if not nome:
+            raise ErroCatalogo("categoria sem nome")
+        posicao = self.posicao_categoria.get(nome)
+        if posicao is None:
+            posicao = self.posicao_categoria[nome] = len(self.categorias)
+            self.categorias.append(nome)
+            self.iva_categorias.append(None)
+        if iva not in (None, ""):
+            self.iva_categorias[posicao] = taxa_iva(iva)
+        for idioma, texto in (traducoes or {}).items():
+            if texto:
+                self.traducoes_categorias.setdefault(idioma, {})[posicao] = sys.intern(texto)
+        return posicao
+
+    def adicionar(self, id_item, nome, preco, categoria, iva=None, traducoes=None,
+                  traducoes_categoria=None):
+        """Acrescenta um item ao catálogo."""
+        id_item = sys.intern(str(id_item).strip())
+        nome = str(nome).strip()
+        if not id_item or not nome:
+            raise ErroCatalogo(f"item sem id ou nome: {id_item!r} {nome!r}")
+        if id_item in self.ids_vistos:
+            raise ErroCatalogo(f"id repetido: {id_item}")
+        self.ids_vistos.add(id_item)
+
+        posicao = len(self.ids)
+        self.ids.append(id_item)
+        self.nomes.append(sys.intern(nome))
+        self.precos.append(preco_para_centimos(preco))
+        self.indice_categoria.append(self.categoria(categoria, iva, traducoes_categoria))
+        for idioma, texto in (traducoes or {}).items():
+            if texto:
+                self.traducoes_itens.setdefault(idioma, {})[posicao] = sys.intern(texto)
+
+    def construir(self):
+        """Retorna o Catalogo com as colunas de tradução completas (None onde não há tradução)."""
+        idiomas = sorted(set(self.traducoes_itens) | set(self.traducoes_categorias))
+        traducoes_itens = {
+            idioma: [self.traducoes_itens.get(idioma, {}).get(i) for i in range(len(self.ids))]
+            for idioma in idiomas
+        }
+        traducoes_categorias = {
+            idioma: [self.traducoes_categorias.get(idioma, {}).get(c) for c in range(len(self.categorias))]
+            for idioma in idiomas
+        }
+        return Catalogo(self.ids, self.nomes, self.precos, self.indice_categoria, self.categorias,
+                        self.iva_categorias, traducoes_itens, traducoes_categorias)
+
+# ================================
+# LEITURA DOS FICHEIROS
+# ================================
+
+def ler_json(caminho):
+    """Lê um catálogo no formato JSON (categorias com os seus itens)."""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        construtor = ConstrutorCatalogo()
+        for categoria in dados["categorias"]:
+            construtor.categoria(categoria["nome"], categoria.get("iva"), categoria.get("traducoes"))
+            for item in categoria.get("itens", ()):
+                construtor.adicionar(item["id"], item["nome"], item["preco"], categoria["nome"],
+                                     traducoes=item.get("traducoes"))
+    except (ValueError, KeyError, TypeError) as erro:
+        raise ErroCatalogo(f"{caminho}: {erro}") from None
+    return construtor.construir()
+
+def ler_csv(caminho):
+    """Lê um catálogo no formato CSV (uma linha por item, categorias pela ordem de aparição)."""
+    construtor = ConstrutorCatalogo()
+    with open(caminho, encoding="utf-8-sig", newline="") as f:
+        leitor = csv.DictReader(f)
+        campos = leitor.fieldnames or []
+        em_falta = {"id", "categoria", "nome", "preco"} - set(campos)
+        if em_falta:
+            raise ErroCatalogo(f"{caminho}: faltam as colunas {', '.join(sorted(em_falta))}")
+        idiomas_itens = [c[5:] for c in campos if c.startswith("nome_")]
+        idiomas_categorias = [c[10:] for c in campos if c.startswith("categoria_")]
+        for numero, linha in enumerate(leitor, start=2):
+            try:
+                construtor.adicionar(
+                    linha["id"], linha["nome"], linha["preco"], linha["categoria"], linha.get("iva"),
+                    {idioma: linha["nome_" + idioma] for idioma in idiomas_itens},
+                    {idioma: linha["categoria_" + idioma] for idioma in idiomas_categorias})
+            except (ErroCatalogo, ValueError, AttributeError) as erro:
+                raise ErroCatalogo(f"{caminho}:{numero}: {erro}") from None
+    return construtor.construir()
+
+def ler_catalogo(caminho):
+    """Lê e analisa um ficheiro de catálogo (.json ou .csv), sem usar a cache."""
+    if caminho.lower().endswith(".csv"):
+        return ler_csv(caminho)
+    return ler_json(caminho)
+
+# ================================
+# CACHE BINÁRIA
+# ================================
+
+def _tabela_textos(catalogo):
+    """Retorna (lista de textos únicos, dicionário texto -> posição); a posição 0 é "sem texto"."""
+    textos = [""]
+    posicoes = {"": 0}
+
+    def posicao(texto):
+        if texto is None:
+            return 0
+        if texto not in posicoes:
+            posicoes[texto] = len(textos)
+            textos.append(texto)
+        return posicoes[texto]
+
+    colunas = {
+        "ids": array("I", map(posicao, catalogo.ids)),
+        "nomes": array("I", map(posicao, catalogo.nomes)),
+        "categorias": array("I", map(posicao, catalogo.categorias)),
+        "idiomas": array("I", map(posicao, catalogo.idiomas)),
+        "traducoes": [
+            (array("I", map(posicao, catalogo.traducoes_itens[idioma])),
+             array("I", map(posicao, catalogo.traducoes_categorias[idioma])))
+            for idioma in catalogo.idiomas
+        ],
+    }
+    return textos, colunas
+
+def gravar_cache(catalogo, caminho_cache_bin, tamanho, mtime_ns, resumo):
+    """Grava o catálogo na cache binária (ficheiro temporário + rename)."""
+    textos, colunas = _tabela_textos(catalogo)
+    codificados = [texto.encode("utf-8") for texto in textos]
+    limites = array("I", [0])
+    for texto in codificados:
+        limites.append(limites[-1] + len(texto))
+    iva = array("b", (-1 if taxa is None else taxa for taxa in catalogo.iva_categorias))
+
+    partes = [
+        CABECALHO_CACHE.pack(ASSINATURA_CACHE, VERSAO_CACHE, sys.byteorder[0].encode(),
+                             tamanho, mtime_ns, resumo, len(textos), len(catalogo),
+                             len(catalogo.categorias), len(catalogo.idiomas)),
+        limites.tobytes(), b"".join(codificados),
+        colunas["ids"].tobytes(), colunas["nomes"].tobytes(),
+        catalogo.indice_categoria.tobytes(), catalogo.precos_centimos.tobytes(),
+        colunas["categorias"].tobytes(), iva.tobytes(), colunas["idiomas"].tobytes(),
+    ]
+    for nomes, categorias in colunas["traducoes"]:
+        partes += [nomes.tobytes(), categorias.tobytes()]
+
+    os.makedirs(os.path.dirname(caminho_cache_bin), exist_ok=True)
+    temporario = caminho_cache_bin + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(b"".join(partes))
+    os.replace(temporario, caminho_cache_bin)
+
+def ler_cabecalho_cache(dados):
+    """Retorna o cabeçalho da cache como tuplo, ou None se não é uma cache válida desta versão."""
+    if len(dados) < CABECALHO_CACHE.size:
+        return None
+    cabecalho = CABECALHO_CACHE.unpack_from(dados)
+    if (cabecalho[0] != ASSINATURA_CACHE or cabecalho[1] != VERSAO_CACHE
+            or cabecalho[2] != sys.byteorder[0].encode()):
+        return None
+    return cabecalho
+
+def ler_cache(dados, cabecalho):
+    """Reconstrói o Catalogo a partir do conteúdo da cache binária."""
+    num_textos, num_itens, num_categorias, num_idiomas = cabecalho[6:10]
+    vista = memoryview(dados)
+    posicao = CABECALHO_CACHE.size
+
+    def coluna(tipo, quantidade):
+        nonlocal posicao
+        valores = array(tipo)
+        fim = posicao + quantidade * valores.itemsize
+        valores.frombytes(vista[posicao:fim])
+        posicao = fim
+        return valores
+
+    limites = coluna("I", num_textos + 1)
+    bloco = bytes(vista[posicao:posicao + limites[-1]])
+    posicao += limites[-1]
+    textos = [sys.intern(bloco[limites[i]:limites[i + 1]].decode("utf-8")) for i in range(num_textos)]
+    textos_ou_none = [None] + textos[1:]  # A posição 0 é "sem texto"
+
+    ids = [textos[i] for i in coluna("I", num_itens)]
+    nomes = [textos[i] for i in coluna("I", num_itens)]
+    indice_categoria = coluna("H", num_itens)
+    precos = coluna("q", num_itens)
+    categorias = [textos[i] for i in coluna("I", num_categorias)]
+    iva = [None if taxa < 0 else taxa for taxa in coluna("b", num_categorias)]
+    idiomas = [textos[i] for i in coluna("I", num_idiomas)]
+    traducoes_itens = {}
+    traducoes_categorias = {}
+    for idioma in idiomas:
+        traducoes_itens[idioma] = [textos_ou_none[i] for i in coluna("I", num_itens)]
+        traducoes_categorias[idioma] = [textos_ou_none[i] for i in coluna("I", num_categorias)]
+    return Catalogo(ids, nomes, precos, indice_categoria, categorias, iva,
+                    traducoes_itens, traducoes_categorias)
+
+def carregar_catalogo(caminho, usar_cache=True):
+    """
+    Carrega o catálogo de um ficheiro JSON/CSV, usando a cache binária se
+    ainda corresponder ao ficheiro: primeiro compara tamanho e data de
+    modificação; se mudaram, compara o hash do conteúdo. Se a cache não
+    serve, o ficheiro é analisado e a cache é regravada.
+    """
+    estado = os.stat(caminho)
+    if not usar_cache:
+        return ler_catalogo(caminho)
+
+    ficheiro_cache = caminho_cache(caminho)
+    resumo = None
+    try:
+        with open(ficheiro_cache, "rb") as f:
+            dados = f.read()
+        cabecalho = ler_cabecalho_cache(dados)
+    except OSError:
+        cabecalho = None
+
+    if cabecalho is not None:
+        tamanho, mtime_ns, resumo_cache = cabecalho[3:6]
+        valida = tamanho == estado.st_size and mtime_ns == estado.st_mtime_ns
+        if not valida and tamanho == estado.st_size:
+            # Data diferente (ex.: ficheiro copiado de novo): decidir pelo conteúdo
+            resumo = hash_ficheiro(caminho)
+            valida = resumo == resumo_cache
+        if valida:
+            try:
+                catalogo = ler_cache(dados, cabecalho)
+            except (ValueError, IndexError, UnicodeDecodeError):
+                catalogo = None  # Cache corrompida: voltar a ler o ficheiro
+            if catalogo is not None:
+                if mtime_ns != estado.st_mtime_ns:
+                    # Atualizar a data guardada para o próximo arranque ser rápido
+                    _gravar_cache_seguro(catalogo, ficheiro_cache, estado, resumo)
+                return catalogo
+
+    catalogo = ler_catalogo(caminho)
+    _gravar_cache_seguro(catalogo, ficheiro_cache, estado, resumo or hash_ficheiro(caminho))
+    return catalogo
+
+def _gravar_cache_seguro(catalogo, ficheiro_cache, estado, resumo):
+    """Grava a cache; falhas de escrita só fazem perder a cache."""
+    try:
+        gravar_cache(catalogo, ficheiro_cache, estado.st_size, estado.st_mtime_ns, resumo)
+    except OSError:
+        pass
+
+# ================================
+# VIGIA DE ALTERAÇÕES
+# ================================
+
+class VigiaCatalogo:
+    """
+    Deteta alterações do ficheiro do catálogo consultando os.stat no máximo
+    uma vez por `intervalo` segundos (tamanho, data de modificação e inode,
+    para apanhar também ficheiros substituídos por rename). Não usa threads:
+    alterado() é chamado no loop principal e custa uma comparação de tempo
+    na maioria das chamadas.
+    """
+    def __init__(self, caminho, intervalo=1.0):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.proxima_verificacao = time.monotonic() + intervalo
+        self.assinatura = self._assinatura()
+
+    def _assinatura(self):
+        try:
+            estado = os.stat(self.caminho)
+        except OSError:
+            return None  # Ficheiro a ser substituído ou apagado: esperar
+        return (estado.st_size, estado.st_mtime_ns, estado.st_ino)
+
+    def alterado(self):
+        """Retorna True (uma vez) quando o ficheiro mudou desde a última vez."""
+        agora = time.monotonic()
+        if agora < self.proxima_verificacao:
+            return False
+        self.proxima_verificacao = agora + self.intervalo
+        assinatura = self._assinatura()
+        if assinatura is None or assinatura == self.assinatura:
+            return False
+        self.assinatura = assinatura
+        return True
@@ -0,0 +1,396 @@
+"""
+COZINHA - MENU DO RESTAURANTE
+
+Leva os pedidos pagos até às estações da cozinha (forno das pizzas, massas,
+bar, sobremesas e cozinha quente para o resto). Cada pedido confirmado é
+dividido num talão por estação, pela categoria de cada item, e os talões
+aparecem no ecrã da cozinha, que mostra os talões abertos de cada estação e
+os itens iguais juntos ("6x Pizza Margherita").
+
+O caminho é uma cadeia de produtores e consumidores com filas limitadas:
+
+    enviar() -> fila de entrada -> encaminhador -> fila de cada estação -> ecrã
+
+enviar() nunca bloqueia: com a fila de entrada cheia retorna None e o
+terminal tenta de novo mais tarde. As outras filas bloqueiam quem escreve
+nelas quando estão cheias, e o ecrã só aceita até max_taloes talões abertos
+por estação, por isso uma estação saturada trava o encaminhador, a fila de
+entrada enche e a pressão chega ao terminal em vez de a memória crescer.
+Cada thread de estação tira os talões da fila em lotes e entrega-os ao ecrã
+de uma só vez; com as filas vazias a thread acorda logo que chega um talão.
+
+O ecrã (EcraCozinha) só guarda o estado: a aplicação desenha-o (ver
+PopupCozinha em menu_restaurante.py) e texto() dá a mesma informação sem
+janela, para correr num terminal de texto.
+
+Uso:
+    python cozinha.py --teste-carga 20000   (hora de ponta simulada, mostra as latências)
+"""
+
+import argparse
+import itertools
+import queue
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+TAMANHO_FILA = 256  # Pedidos à espera do encaminhador
+TAMANHO_FILA_ESTACAO = 256  # Talões à espera do ecrã, por estação
+TALOES_POR_LOTE = 64  # Talões entregues ao ecrã de uma vez
+MAX_TALOES_ABERTOS = 500  # Talões abertos por estação (acima disto a estação está saturada)
+LATENCIAS_GUARDADAS = 4096  # Latências recentes guardadas para as estatísticas
+
+# Estações da cozinha, pela ordem em que aparecem no ecrã, e o seu nome
+ESTACOES = ("forno", "massas", "cozinha", "bar", "sobremesas")
+NOMES_ESTACOES = {
+    "forno": "Forno",
+    "massas": "Massas",
+    "cozinha": "Cozinha",
+    "bar": "Bar",
+    "sobremesas": "Sobremesas",
+}
+
+# Categoria do catálogo (idioma base) -> estação; as outras vão para a cozinha
+ROTAS_CATEGORIAS = {
+    "Pizza": "forno",
+    "Pastas": "massas",
+    "Bebidas": "bar",
+    "Sobremesas": "sobremesas",
+}
+ESTACAO_POR_OMISSAO = "cozinha"
+
+# Linha de um talão: id do item no catálogo, nome e quantidade
+LinhaTalao = namedtuple("LinhaTalao", "item nome quantidade")
+
+# Talão de uma estação: número do pedido (o mesmo em todas as estações), mesa,
+# estação, linhas, hora do pagamento (time.time) e instante de envio
+# (time.perf_counter, para medir a latência até ao ecrã)
+Talao = namedtuple("Talao", "numero mesa estacao linhas momento enviado")
+
+_FIM = object()  # Marca de fim nas filas (fechar)
+
+# ================================
+# ECRÃ DA COZINHA
+# ================================
+
+class EcraCozinha:
+    """
+    Estado do ecrã da cozinha: os talões abertos de cada estação (pela ordem
+    de chegada) e, por estação, a soma de cada item em todos os talões abertos
+    (atualizada ao receber e ao despachar, sem percorrer os talões).
+    Recebe os talões das threads das estações e é lido pela interface;
+    `versao` aumenta a cada alteração, para a interface saber quando redesenhar.
+    ao_mudar() é chamada (na thread que alterou o ecrã) depois de cada alteração.
+    """
+    def __init__(self, estacoes=ESTACOES, max_taloes=MAX_TALOES_ABERTOS, ao_mudar=None):
+        self.estacoes = tuple(estacoes)
+        self.max_taloes = max_taloes
+        self.ao_mudar = ao_mudar
+        self.taloes = {estacao: OrderedDict() for estacao in self.estacoes}  # Estação -> {número: Talao}
+        self.agrupados = {estacao: {} for estacao in self.estacoes}  # Estação -> {item: [nome, quantidade]}
+        self.versao = 0
+        self.recebidos = 0
+        self.despachados = 0
+        self.latencias = deque(maxlen=LATENCIAS_GUARDADAS)  # Segundos do envio até ao ecrã
+        self._trinco = threading.Condition()
+
+    def receber(self, taloes):
+        """
+        Junta um lote de talões de uma estação ao ecrã. Se a estação já tem
+        max_taloes abertos, espera que a cozinha despache algum (pressão para
+        trás: a fila da estação deixa de ser esvaziada).
+        """
+        if not taloes:
+            return
+        estacao = taloes[0].estacao
+        abertos = self.taloes[estacao]
+        agrupados = self.agrupados[estacao]
+        with self._trinco:
+            for talao in taloes:
+                while len(abertos) >= self.max_taloes:
+                    self._trinco.wait()
+                abertos[talao.numero] = talao
+                for linha in talao.linhas:
+                    soma = agrupados.get(linha.item)
+                    if soma is None:
+                        agrupados[linha.item] = [linha.nome, linha.quantidade]
+                    else:
+                        soma[1] += linha.quantidade
+            agora = time.perf_counter()
+            self.latencias.extend(agora - talao.enviado for talao in taloes)
+            self.recebidos += len(taloes)
+            self.versao += 1
+        if self.ao_mudar is not None:
+            self.ao_mudar()
+
+    def despachar(self, estacao, numero):
+        """Retira um talão pronto do ecrã. Retorna False se já não estava aberto."""
+        with self._trinco:
+            talao = self.taloes[estacao].pop(numero, None)
+            if talao is None:
+                return False
+            agrupados = self.agrupados[estacao]
+            for linha in talao.linhas:
+                soma = agrupados[linha.item]
+                soma[1] -= linha.quantidade
+                if soma[1] <= 0:
+                    del agrupados[linha.item]
+            self.despachados += 1
+            self.versao += 1
+            self._trinco.notify_all()
+        if self.ao_mudar is not None:
+            self.ao_mudar()
+        return True
+
+    def vista(self, estacao, max_taloes=None):
+        """
+        Retorna (itens, talões, abertos) de uma estação: os itens agrupados como
+        (quantidade, nome), do mais pedido para o menos, os talões abertos mais
+        antigos (até max_taloes) e o número total de talões abertos.
+        """
+        with self._trinco:
+            itens = sorted(((q, nome) for nome, q in self.agrupados[estacao].values()),
+                           key=lambda par: (-par[0], par[1]))
+            abertos = self.taloes[estacao]
+            taloes = list(itertools.islice(abertos.values(), max_taloes))
+            return itens, taloes, len(abertos)
+
+    def texto(self, max_taloes=5):
+        """Retorna o ecrã em texto (sem janela): uma secção por estação."""
+        linhas = []
+        for estacao in self.estacoes:
+            itens, taloes, abertos = self.vista(estacao, max_taloes)
+            linhas.append(f"== {NOMES_ESTACOES.get(estacao, estacao).upper()} ({abertos} talões) ==")
+            linhas.extend(f"  {quantidade}x {nome}" for quantidade, nome in itens)
+            for talao in taloes:
+                conteudo = ", ".join(f"{linha.quantidade}x {linha.nome}" for linha in talao.linhas)
+                linhas.append(f"  #{talao.numero} mesa {talao.mesa} "
+                              f"{time.strftime('%H:%M', time.localtime(talao.momento))}: {conteudo}")
+            if abertos > len(taloes):
+                linhas.append(f"  ... mais {abertos - len(taloes)} talões")
+        return "\n".join(linhas)
+
+    def estatisticas(self):
+        """Retorna os talões abertos, recebidos e despachados e a latência (ms) até ao ecrã."""
+        with self._trinco:
+            latencias = sorted(self.latencias)
+            abertos = {estacao: len(self.taloes[estacao]) for estacao in self.estacoes}
+
+        def percentil(p):
+            if not latencias:
+                return 0.0
+            return latencias[min(len(latencias) - 1, int(p / 100 * len(latencias)))] * 1000
+
+        return {
+            'abertos': abertos,
+            'recebidos': self.recebidos,
+            'despachados': self.despachados,
+            'latencia_p50_ms': percentil(50),
+            'latencia_p99_ms': percentil(99),
+        }
+
+# ================================
+# CADEIA DE TALÕES
+# ================================
+
+class CozinhaPedidos:
+    """
+    Cadeia que leva os pedidos confirmados até ao ecrã da cozinha: uma fila
+    de entrada limitada, uma thread que divide cada pedido em talões por
+    estação (pela categoria de cada item) e, por estação, uma fila limitada e
+    uma thread que entrega os talões ao ecrã em lotes.
+    """
+    def __init__(self, ecra, rotas=None, tamanho_fila=TAMANHO_FILA,
+                 tamanho_fila_estacao=TAMANHO_FILA_ESTACAO, taloes_por_lote=TALOES_POR_LOTE):
+        self.ecra = ecra
+        self.rotas = ROTAS_CATEGORIAS if rotas is None else rotas
+        self.taloes_por_lote = taloes_por_lote
+        self.entrada = queue.Queue(tamanho_fila)
+        self.filas = {estacao: queue.Queue(tamanho_fila_estacao) for estacao in ecra.estacoes}
+        self.proximo_numero = 1  # Número do próximo pedido (só avança quando o pedido entra na fila)
+        self._trinco_envio = threading.Lock()  # enviar() pode ser chamado por vários terminais
+        self.enviados = 0
+        self.recusados = 0  # Envios recusados com a fila de entrada cheia
+        self._threads = []
+
+    def iniciar(self):
+        """Arranca o encaminhador e as threads das estações."""
+        self._threads = [threading.Thread(target=self._encaminhar, name="cozinha-encaminhador", daemon=True)]
+        for estacao in self.filas:
+            self._threads.append(threading.Thread(target=self._entregar, args=(estacao,),
+                                                  name=f"cozinha-{estacao}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def fechar(self, tempo_maximo=2.0):
+        """Entrega os talões que já estão nas filas e pára as threads."""
+        if not self._threads:
+            return
+        try:
+            self.entrada.put(_FIM, timeout=tempo_maximo)
+        except queue.Full:
+            pass
+        limite = time.monotonic() + tempo_maximo
+        for thread in self._threads:
+            thread.join(max(0.0, limite - time.monotonic()))
+        self._threads = []
+
+    def enviar(self, mesa, linhas, momento=None):
+        """
+        Envia um pedido confirmado para a cozinha; `linhas` são tuplas
+        (id do item, nome, categoria, quantidade). Nunca bloqueia: retorna o
+        número do pedido, ou None se a fila de entrada está cheia (um envio
+        recusado não gasta número, e os números entram na fila por ordem).
+        """
+        linhas = tuple(linhas)
+        momento = time.time() if momento is None else momento
+        with self._trinco_envio:
+            numero = self.proximo_numero
+            try:
+                self.entrada.put_nowait((numero, mesa, linhas, momento, time.perf_counter()))
+            except queue.Full:
+                self.recusados += 1
+                return None
+            self.proximo_numero += 1
+            self.enviados += 1
+        return numero
+
+    def estacao_da_categoria(self, categoria):
+        """Estação que prepara os itens de uma categoria."""
+        return self.rotas.get(categoria, ESTACAO_POR_OMISSAO)
+
+    def _encaminhar(self):
+        """Thread do encaminhador: divide cada pedido num talão por estação."""
+        while True:
+            pedido = self.entrada.get()
+            if pedido is _FIM:
+                for fila in self.filas.values():
+                    fila.put(_FIM)
+                return
+            numero, mesa, linhas, momento, enviado = pedido
+            por_estacao = {}
+            for item, nome, categoria, quantidade in linhas:
+                por_estacao.setdefault(self.estacao_da_categoria(categoria), []).append(
+                    LinhaTalao(item, nome, quantidade))
+            for estacao, linhas_estacao in por_estacao.items():
+                fila = self.filas.get(estacao) or self.filas[ESTACAO_POR_OMISSAO]
+                # Bloqueia com a fila da estação cheia (a pressão passa para a entrada)
+                fila.put(Talao(numero, mesa, estacao, tuple(linhas_estacao), momento, enviado))
+
+    def _entregar(self, estacao):
+        """Thread de uma estação: entrega ao ecrã os talões que estão na fila, em lotes."""
+        fila = self.filas[estacao]
+        while True:
+            lote = [fila.get()]
+            while lote[-1] is not _FIM and len(lote) < self.taloes_por_lote:
+                try:
+                    lote.append(fila.get_nowait())
+                except queue.Empty:
+                    break
+            if lote[-1] is _FIM:
+                self.ecra.receber(lote[:-1])
+                return
+            self.ecra.receber(lote)
+
+    def estatisticas(self):
+        """Retorna os pedidos enviados e recusados e os talões à espera em cada fila."""
+        return {
+            'enviados': self.enviados,
+            'recusados': self.recusados,
+            'na_entrada': self.entrada.qsize(),
+            'nas_estacoes': {estacao: fila.qsize() for estacao, fila in self.filas.items()},
+        }
+
+# ================================
+# TESTE DE CARGA
+# ================================
+
+ITENS_TESTE = (
+    ("pizza-margherita", "Pizza Margherita", "Pizza"),
+    ("pizza-diavola", "Pizza Diavola", "Pizza"),
+    ("spaghetti-alla-carbonara", "Spaghetti alla Carbonara", "Pastas"),
+    ("lasagna-alla-bolognese", "Lasagna alla Bolognese", "Pastas"),
+    ("bruschetta-al-pomodoro", "Bruschetta al Pomodoro", "Entradas"),
+    ("ossobuco-alla-milanese", "Ossobuco alla Milanese", "Especialidades do Chef"),
+    ("acqua-naturale", "Acqua Naturale", "Bebidas"),
+    ("vino-rosso-della-casa", "Vino Rosso della Casa (copo)", "Bebidas"),
+    ("tiramisu", "Tiramisù", "Sobremesas"),
+)
+
+def _terminal_teste(cozinha, mesa, pedidos, semente):
+    """Um terminal simulado: envia pedidos aleatórios e tenta de novo quando a cozinha está cheia."""
+    aleatorio = random.Random(semente)
+    for _ in range(pedidos):
+        linhas = [(item, nome, categoria, aleatorio.randint(1, 3))
+                  for item, nome, categoria in aleatorio.sample(ITENS_TESTE, aleatorio.randint(1, 5))]
+        while cozinha.enviar(mesa, linhas) is None:
+            time.sleep(0.001)
+
+def _cozinheiros_teste(ecra, parar):
+    """Despacha os talões mais antigos de cada estação enquanto o teste corre."""
+    while not parar.is_set():
+        despachou = False
+        for estacao in ecra.estacoes:
+            _, taloes, _ = ecra.vista(estacao, 32)
+            for talao in taloes:
+                despachou = ecra.despachar(estacao, talao.numero) or despachou
+        if not despachou:
+            time.sleep(0.001)
+
+def teste_carga(pedidos, terminais=8):
+    """
+    Simula uma hora de ponta: `terminais` threads enviam `pedidos` pedidos ao
+    todo enquanto outra thread despacha os talões. Retorna a duração (s) e as
+    estatísticas da cadeia e do ecrã.
+    """
+    ecra = EcraCozinha()
+    cozinha = CozinhaPedidos(ecra)
+    cozinha.iniciar()
+    parar = threading.Event()
+    cozinheiros = threading.Thread(target=_cozinheiros_teste, args=(ecra, parar), daemon=True)
+    cozinheiros.start()
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=_terminal_teste,
+                                args=(cozinha, str(t + 1), pedidos // max(1, terminais), t))
+               for t in range(terminais)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cozinha.fechar()
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    cozinheiros.join()
+    return duracao, cozinha.estatisticas(), ecra
+
+# ================================
+# LINHA DE COMANDO
+# ================================
+
+def main(argumentos=None):
+    """Corre o teste de carga da cadeia da cozinha e mostra o ecrã em texto."""
+    parser = argparse.ArgumentParser(description="Cadeia de talões da cozinha (teste de carga sem janela).")
+    parser.add_argument("--teste-carga", type=int, default=20000, metavar="PEDIDOS",
+                        help="número de pedidos a enviar")
+    parser.add_argument("--terminais", type=int, default=8, help="terminais a enviar pedidos em paralelo")
+    args = parser.parse_args(argumentos)
+
+    duracao, estatisticas, ecra = teste_carga(args.teste_carga, args.terminais)
+    resumo = ecra.estatisticas()
+    print(f"{estatisticas['enviados']} pedidos em {duracao:.2f} s "
+          f"({estatisticas['enviados'] / duracao:.0f} pedidos/s), {resumo['recebidos']} talões, "
+          f"{estatisticas['recusados']} envios recusados (fila cheia)")
+    print(f"latência até ao ecrã p50 {resumo['latencia_p50_ms']:.3f} ms  "
+          f"p99 {resumo['latencia_p99_ms']:.3f} ms")
+    print(ecra.texto(max_taloes=3))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+DIÁRIO DE PEDIDOS - MENU DO RESTAURANTE
+
+Diário persistente (write-ahead log) das ações sobre o pedido: cada ação
+(adicionar, remover, limpar, pagamento, novo pedido) é acrescentada a um
+ficheiro JSONL, uma linha compacta por registo. No arranque o estado do
+pedido é reconstruído a partir do último snapshot e dos registos seguintes.
+
+A escrita é feita por uma thread em segundo plano com uma fila limitada:
+o loop de desenho nunca espera pelo disco. O fsync é feito em lote (no máximo
+um por INTERVALO_FSYNC) e de tempos a tempos o diário é compactado num
+snapshot do estado atual.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+TAMANHO_FILA = 1024  # Registos em espera para a thread de escrita
+INTERVALO_FSYNC = 0.2  # Tempo máximo (s) entre a escrita e o fsync de um registo
+REGISTOS_POR_SNAPSHOT = 500  # Compactar o diário ao fim deste número de registos
+
+# Operações guardadas no diário
+OP_ADICIONAR = "adicionar"  # Dados: id (id do item no catálogo), i (índice no menu), q (quantidade)
+OP_REMOVER = "remover"  # Dados: id, i, q
+OP_LIMPAR = "limpar"  # Esvazia o pedido
+OP_PAGAMENTO = "pagamento"  # Dados: metodo ("numerario" ou "cartao")
+OP_NOVO = "novo"  # Conta fechada: começa um pedido novo
+OP_MESA = "mesa"  # O terminal passou a outra mesa. Dados: mesa, itens ({id: [i, q]}), metodo
+
+# ================================
+# ESTADO DO PEDIDO NO DIÁRIO
+# ================================
+
+def estado_vazio():
+    """Estado inicial: pedido vazio e sem pagamento."""
+    return {"itens": {}, "metodo_pagamento": None}
+
+def aplicar_registo(estado, registo):
+    """
+    Aplica um registo do diário ao estado (dicionário com "itens", que mapeia
+    o id do item para [índice no menu, quantidade], "metodo_pagamento" e, se
+    o terminal muda de mesa, "mesa").
+    """
+    op = registo.get("op")
+    itens = estado["itens"]
+    if op == OP_ADICIONAR:
+        item = itens.setdefault(registo["id"], [registo["i"], 0])
+        item[0] = registo["i"]
+        item[1] += registo["q"]
+    elif op == OP_REMOVER:
+        item = itens.get(registo["id"])
+        if item is not None:
+            item[1] -= registo["q"]
+            if item[1] <= 0:
+                del itens[registo["id"]]
+    elif op == OP_LIMPAR:
+        itens.clear()
+    elif op == OP_PAGAMENTO:
+        estado["metodo_pagamento"] = registo["metodo"]
+    elif op == OP_NOVO:
+        itens.clear()
+        estado["metodo_pagamento"] = None
+    elif op == OP_MESA:
+        # O pedido passa a ser o da outra mesa
+        estado["mesa"] = registo["mesa"]
+        estado["itens"] = {id_item: list(item) for id_item, item in registo["itens"].items()}
+        estado["metodo_pagamento"] = registo.get("metodo")
+
+# ================================
+# DIÁRIO
+# ================================
+
+class DiarioPedidos:
+    """
+    Diário de pedidos guardado numa pasta com dois ficheiros:
+    diario.jsonl (registos desde o último snapshot) e snapshot.json.
+    Cada registo tem um número de sequência "s"; o snapshot guarda o número
+    do último registo incluído, por isso uma falha entre gravar o snapshot e
+    truncar o diário não aplica registos duas vezes.
+
+    registar() só coloca o registo na fila (nunca bloqueia). Se a fila estiver
+    cheia o registo é descartado e contado em `descartados`; para o estado em
+    disco continuar correto, é agendado um snapshot completo logo que haja espaço.
+    """
+    def __init__(self, pasta, tamanho_fila=TAMANHO_FILA, intervalo_fsync=INTERVALO_FSYNC,
+                 registos_por_snapshot=REGISTOS_POR_SNAPSHOT):
+        self.pasta = pasta
+        self.ficheiro_diario = os.path.join(pasta, "diario.jsonl")
+        self.ficheiro_snapshot = os.path.join(pasta, "snapshot.json")
+        self.intervalo_fsync = intervalo_fsync
+        self.registos_por_snapshot = registos_por_snapshot
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.estado = estado_vazio()  # Estado atual (mantido na thread principal)
+        self.sequencia = 0  # Número do último registo criado
+        self.registos_desde_snapshot = 0
+        self.snapshot_pendente = False  # Houve registos descartados ou chegou a hora de compactar
+        self.descartados = 0  # Registos perdidos por a fila estar cheia
+        self.erro = None  # Último erro de escrita (a thread continua a tentar)
+        self._thread = None
+
+    # ---------- Leitura (arranque) ----------
+
+    def reproduzir(self):
+        """
+        Reconstrói o estado a partir do snapshot e do diário e retorna-o.
+        Uma última linha incompleta (escrita interrompida) é ignorada.
+        Deve ser chamado antes de iniciar().
+        """
+        estado = estado_vazio()
+        sequencia = 0
+        try:
+            with open(self.ficheiro_snapshot, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            estado = snapshot["estado"]
+            sequencia = snapshot["s"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        registos = 0
+        try:
+            with open(self.ficheiro_diario, encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        registo = json.loads(linha)
+                    except ValueError:
+                        break  # Registo incompleto: fim dos dados válidos
+                    if registo.get("s", 0) > sequencia:
+                        aplicar_registo(estado, registo)
+                        sequencia = registo["s"]
+                        registos += 1
+        except OSError:
+            pass
+
+        self.estado = estado
+        self.sequencia = sequencia
+        self.registos_desde_snapshot = registos
+        return estado
+
+    # ---------- Escrita (thread principal) ----------
+
+    def iniciar(self):
+        """Cria a pasta e arranca a thread de escrita."""
+        os.makedirs(self.pasta, exist_ok=True)
+        self._thread = threading.Thread(target=self._escrever, name="diario-pedidos", daemon=True)
+        self._thread.start()
+
+    def registar(self, op, **dados):
+        """Acrescenta uma operação ao diário (sem bloquear) e atualiza o estado."""
+        self.sequencia += 1
+        registo = {"s": self.sequencia, "t": round(time.time(), 3), "op": op}
+        registo.update(dados)
+        aplicar_registo(self.estado, registo)
+
+        if self.snapshot_pendente and self._pedir_snapshot(registo):
+            # O snapshot já inclui este registo
+            return
+        try:
+            self.fila.put_nowait(("registo", registo))
+            self.registos_desde_snapshot += 1
+        except queue.Full:
+            self.descartados += 1
+            self.snapshot_pendente = True
+            return
+        if self.registos_desde_snapshot >= self.registos_por_snapshot:
+            self.snapshot_pendente = True
+            self._pedir_snapshot()
+
+    def _pedir_snapshot(self, registo=None, tempo_maximo=None):
+        """
+        Coloca na fila um snapshot do estado atual; retorna False se a fila está
+        cheia. Sem tempo_maximo não espera (uso normal, na thread de desenho).
+        `registo` é o registo que o snapshot substitui (não vai para a fila):
+        se a compactação falhar, a thread de escrita grava-o no diário.
+        """
+        conteudo = {"s": self.sequencia, "estado": json.loads(json.dumps(self.estado))}
+        try:
+            if tempo_maximo is None:
+                self.fila.put_nowait(("snapshot", (conteudo, registo)))
+            else:
+                self.fila.put(("snapshot", (conteudo, registo)), timeout=tempo_maximo)
+        except queue.Full:
+            return False
+        self.snapshot_pendente = False
+        self.registos_desde_snapshot = 0
+        return True
+
+    def fechar(self, tempo_maximo=2.0):
+        """Escreve o que falta na fila, faz fsync e pára a thread de escrita."""
+        if self._thread is None:
+            return
+        if self.snapshot_pendente:
+            # Ao fechar pode-se esperar: o estado final tem de ficar em disco
+            self._pedir_snapshot(tempo_maximo=tempo_maximo)
+        try:
+            self.fila.put(("fim", None), timeout=tempo_maximo)
+        except queue.Full:
+            pass
+        self._thread.join(tempo_maximo)
+        self._thread = None
+
+    # ---------- Thread de escrita ----------
+
+    def _abrir_diario(self, modo):
+        return open(self.ficheiro_diario, modo, encoding="utf-8")
+
+    def _escrever(self):
+        """
+        Ciclo da thread de escrita: junta todos os registos disponíveis num
+        só write e faz fsync no máximo uma vez por intervalo_fsync.
+        """
+        try:
+            ficheiro = self._abrir_diario("a")
+        except OSError as erro:
+            self.erro = erro  # Sem diário: a fila enche e os registos são descartados
+            return
+        por_sincronizar = False
+        ultimo_fsync = time.monotonic()
+        terminar = False
+
+        while not terminar:
+            # Esperar por trabalho; com dados por sincronizar, só até ao próximo fsync
+            espera = None
+            if por_sincronizar:
+                espera = max(0.0, ultimo_fsync + self.intervalo_fsync - time.monotonic())
+            try:
+                lote = [self.fila.get(timeout=espera)]
+            except queue.Empty:
+                lote = []
+            while True:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            linhas = []
+            for tipo, conteudo in lote:
+                try:
+                    if tipo == "registo":
+                        linhas.append(json.dumps(conteudo, separators=(",", ":"), ensure_ascii=False))
+                    elif tipo == "snapshot":
+                        snapshot, registo = conteudo
+                        try:
+                            ficheiro = self._compactar(ficheiro, linhas, snapshot)
+                        except (OSError, ValueError):
+                            # Sem snapshot, o registo que ele substituía vai para o diário
+                            # (com as linhas por escrever) e pede-se outro snapshot
+                            if registo is not None:
+                                linhas.append(json.dumps(registo, separators=(",", ":"), ensure_ascii=False))
+                            self.snapshot_pendente = True
+                            raise
+                        linhas = []
+                        por_sincronizar = False
+                    elif tipo == "fim":
+                        terminar = True
+                except (OSError, ValueError) as erro:
+                    self.erro = erro
+
+            try:
+                if linhas:
+                    ficheiro.write("\n".join(linhas) + "\n")
+                    ficheiro.flush()
+                    por_sincronizar = True
+                agora = time.monotonic()
+                if por_sincronizar and (terminar or agora - ultimo_fsync >= self.intervalo_fsync):
+                    os.fsync(ficheiro.fileno())
+                    ultimo_fsync = agora
+                    por_sincronizar = False
+            except (OSError, ValueError) as erro:
+                # ValueError: ficheiro fechado; a thread continua e o erro fica registado
+                self.erro = erro
+
+        ficheiro.close()
+
+    def _compactar(self, ficheiro, linhas, conteudo):
+        """
+        Grava o snapshot (ficheiro temporário + fsync + rename) e esvazia o diário.
+        Os registos ainda não escritos em `linhas` já estão incluídos no snapshot.
+        Retorna o ficheiro do diário reaberto. O diário novo é aberto antes de
+        fechar o antigo: se a abertura falhar, a escrita continua no ficheiro
+        antigo (os registos anteriores ao snapshot são ignorados no replay).
+        """
+        temporario = self.ficheiro_snapshot + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(conteudo, f, separators=(",", ":"), ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.ficheiro_snapshot)
+        novo = self._abrir_diario("w")
+        ficheiro.close()
+        os.fsync(novo.fileno())
+        return novo
+
+    def estatisticas(self):
+        """Retorna contadores do diário (sequência, registos em espera e descartados)."""
+        return {
+            'sequencia': self.sequencia,
+            'em_espera': self.fila.qsize(),
+            'descartados': self.descartados,
+            'erro': str(self.erro) if self.erro else None,
+        }
@@ -5,22 +5,95 @@ Aplicação em PyGame para gestão de pedidos de um restaurante italiano.
 Permite aos clientes visualizar o menu, adicionar/remover itens e finalizar pedidos.
 """
 
-import pygame
+import concurrent.futures
+import json
+import math
+import os
+import sqlite3
 import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque, namedtuple
+
+from diario_pedidos import DiarioPedidos, OP_ADICIONAR, OP_REMOVER, OP_LIMPAR, OP_PAGAMENTO, OP_NOVO, OP_MESA
+from vendas_db import RegistoVendas
+from catalogo import Catalogo, ErroCatalogo, VigiaCatalogo, carregar_catalogo, formatar_euros
+from servidor_pedidos import ClientePedidos, ErroProtocolo, OP_SUBSCREVER, OP_CANCELAR, PORTA_PADRAO
+from sessoes import GestorSessoes
+from cozinha import CozinhaPedidos, EcraCozinha, NOMES_ESTACOES
+from recibos import Conta, ImpressoraRecibos, LinhaRecibo
+from perfilador import Perfilador
+
+# Modo sem janela: usa o driver de vídeo "dummy" do SDL, que desenha numa
+# superfície em memória. Serve para medir o desenho (benchmark_desenho.py) em
+# máquinas sem ecrã. Ativa-se com MENU_RESTAURANTE_HEADLESS=1 ou --headless.
+MODO_SEM_JANELA = (os.environ.get("MENU_RESTAURANTE_HEADLESS", "0") not in ("", "0")
+                   or "--headless" in sys.argv)
+
+import pygame
 
 # ================================
 # CONFIGURAÇÕES INICIAIS DO PYGAME
 # ================================
 
-# Inicializar o sistema PyGame
-pygame.init()
-
-# Configurações da tela (agora responsiva)
-INFO = pygame.display.Info()
-LARGURA = min(1400, INFO.current_w - 100)
-ALTURA = min(900, INFO.current_h - 100)
-TELA = pygame.display.set_mode((LARGURA, ALTURA), pygame.RESIZABLE)
-pygame.display.set_caption("Restaurante Italiano - Menu do Dia")
+# O PyGame, a janela e as fontes só são inicializados quando são precisos
+# (ver Aplicacao e FontePreguicosa). Importar este módulo não abre janela,
+# por isso os dados do menu e o modelo do pedido podem ser usados em scripts.
+
+TITULO_JANELA = "Restaurante Italiano - Menu do Dia"
+
+# Configurações da tela (agora responsiva); o tamanho real é definido
+# quando a janela é criada em Aplicacao.iniciar_display()
+LARGURA, ALTURA = 1400, 900
+TELA = None  # Superfície da janela (None até a janela ser criada)
+
+# Modo de desenho: False = só redesenha as regiões alteradas (regiões sujas),
+# True = limpa e redesenha a tela inteira em cada frame (modo antigo)
+REDESENHO_COMPLETO = False
+
+# Ao arrastar a borda da janela chegam dezenas de VIDEORESIZE; a interface só é
+# reconstruída quando o tamanho fica estável durante este tempo (s)
+ATRASO_REDIMENSIONAMENTO = 0.15
+MAX_LAYOUTS = 8  # Resoluções cuja geometria fica guardada (ver obter_layout)
+
+# Frame rate usado só enquanto há animação (scroll em movimento);
+# sem animação o loop dorme à espera de eventos
+FPS_ATIVO = 60
+ESPERA_INATIVO_MS = 1000  # Tempo máximo a dormir sem eventos
+MOSTRAR_ESTATISTICAS_LOOP = False  # Mostrar FPS efetivo e taxa de inatividade no título
+# Perfilador dos frames (ver perfilador.py): F3 mostra o gráfico do tempo por
+# frame e F4 exporta os intervalos para um ficheiro Chrome Trace. Com
+# MENU_RESTAURANTE_PERFIL=1 mede desde o arranque e exporta ao sair.
+PERFIL_AO_ARRANCAR = os.environ.get("MENU_RESTAURANTE_PERFIL", "0") not in ("", "0")
+
+# Scroll cinético: a roda do mouse e o arrastar com o dedo dão velocidade ao
+# conteúdo, que abranda com decaimento exponencial calculado pelo tempo real
+# decorrido (o movimento é o mesmo com qualquer frame rate)
+SCROLL_POR_PASSO_RODA = 40  # Distância (px) percorrida por cada passo da roda
+TEMPO_ABRANDAMENTO = 0.12  # Constante de tempo (s) do abrandamento
+VELOCIDADE_MINIMA = 5  # Abaixo desta velocidade (px/s) o scroll pára
+PAUSA_SEM_INERCIA = 0.1  # Dedo parado mais do que isto (s) antes de levantar: sem inércia
+
+# Pasta dos dados persistentes (diário de pedidos e registo de vendas)
+PASTA_DADOS = os.environ.get("MENU_RESTAURANTE_DADOS") or os.path.join(
+    os.path.expanduser("~"), ".local", "share", "menu_restaurante")
+USAR_DIARIO_PEDIDOS = True  # Guardar as ações do pedido no diário e repô-lo no arranque
+USAR_REGISTO_VENDAS = True  # Guardar as contas pagas na base de dados de vendas
+USAR_COZINHA = True  # Enviar os pedidos pagos para o ecrã da cozinha (F2 mostra o ecrã)
+MAX_PEDIDOS_COZINHA_EM_ESPERA = 50  # Pedidos pagos à espera de a cozinha ter espaço (acima disto não são enviados)
+USAR_RECIBOS = True  # Gerar o recibo de cada conta paga (texto, ESC/POS e PDF, ver recibos.py)
+# Impressora térmica onde escrever os recibos ESC/POS (ex.: /dev/usb/lp0);
+# sem impressora ficam num ficheiro .bin junto aos outros formatos
+IMPRESSORA_RECIBOS = os.environ.get("MENU_RESTAURANTE_IMPRESSORA") or None
+NOME_RESTAURANTE = "RESTAURANTE ITALIANO"  # Cabeçalho dos recibos
+
+# Servidor de pedidos partilhado pelos terminais da sala ("host:porta", ver
+# servidor_pedidos.py); sem servidor o pedido é só deste terminal
+SERVIDOR_PEDIDOS = os.environ.get("MENU_RESTAURANTE_SERVIDOR") or None
+MESA = os.environ.get("MENU_RESTAURANTE_MESA", "1")  # Mesa mostrada no arranque
+# Número de mesas do restaurante. Com mais de uma, o terminal guarda um pedido
+# aberto por mesa (ver sessoes.py) e muda de mesa pelo cabeçalho ou PageUp/PageDown
+NUM_MESAS = int(os.environ.get("MENU_RESTAURANTE_MESAS", "1"))
 
 # Cores (paleta de quadro de giz)
 COR_FUNDO = (30, 30, 40)  # Cor escura de fundo (simula quadro negro)
@@ -40,61 +113,882 @@ COR_SCROLLBAR_BG = (60, 50, 40, 100)
 COR_POPUP_FUNDO = (20, 20, 30, 240)  # Fundo semi-transparente
 COR_POPUP_BORDA = (255, 200, 100)  # Borda amarela
 COR_POPUP_TEXTO = (240, 240, 240)  # Texto branco
+COR_MESA_OCUPADA = (150, 90, 40)  # Mesas com pedido aberto no pop-up das mesas
+
+# Ficheiro onde ficam guardados os caminhos das fontes já resolvidos, para não
+# repetir a pesquisa das fontes do sistema (lenta) em cada arranque
+FICHEIRO_CACHE_FONTES = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "menu_restaurante", "fontes.json")
+
+class CacheCaminhosFontes:
+    """
+    Guarda em disco (JSON) o ficheiro de cada fonte do sistema pedida por nome,
+    com e sem negrito. Equivale a pygame.font.SysFont, mas a pesquisa das fontes
+    do sistema só é feita da primeira vez (ou se o ficheiro guardado desaparecer).
+    Para forçar nova pesquisa basta apagar o ficheiro da cache.
+    """
+    def __init__(self, ficheiro=FICHEIRO_CACHE_FONTES):
+        self.ficheiro = ficheiro
+        self.caminhos = None  # Chave "nome|negrito" -> caminho (None = fonte por omissão)
+        self.alterada = False  # Se há caminhos novos por gravar
+    
+    def _carregar(self):
+        """Lê a cache do disco (uma só vez); um ficheiro inválido conta como vazio."""
+        if self.caminhos is not None:
+            return
+        try:
+            with open(self.ficheiro, encoding="utf-8") as f:
+                dados = json.load(f)
+            self.caminhos = dados if isinstance(dados, dict) else {}
+        except (OSError, ValueError):
+            self.caminhos = {}
+    
+    def _gravar(self):
+        """Grava a cache no disco; falhas de escrita são ignoradas (só se perde a cache)."""
+        try:
+            os.makedirs(os.path.dirname(self.ficheiro), exist_ok=True)
+            temporario = self.ficheiro + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self.caminhos, f, indent=1)
+            os.replace(temporario, self.ficheiro)
+            self.alterada = False
+        except OSError:
+            pass
+    
+    def caminho(self, nome, negrito=False):
+        """Retorna o ficheiro da fonte do sistema (ou None se não existe)."""
+        self._carregar()
+        chave = f"{nome}|{int(negrito)}"
+        if chave in self.caminhos:
+            caminho = self.caminhos[chave]
+            if caminho is None or os.path.exists(caminho):
+                return caminho
+        # Pesquisa nas fontes do sistema (a parte lenta)
+        self.caminhos[chave] = pygame.font.match_font(nome, bold=negrito)
+        self.alterada = True
+        self._gravar()
+        return self.caminhos[chave]
+    
+    def criar_fonte(self, nome, tamanho, negrito=False):
+        """
+        Cria a fonte como pygame.font.SysFont: se não há ficheiro próprio para o
+        negrito (mesmo ficheiro que a versão normal), o negrito é simulado.
+        """
+        caminho = self.caminho(nome, negrito)
+        negrito_simulado = negrito and (caminho is None or caminho == self.caminho(nome, False))
+        fonte = pygame.font.Font(caminho, tamanho)
+        if negrito_simulado:
+            fonte.set_bold(True)
+        return fonte
+
+cache_fontes = CacheCaminhosFontes()
+
+class FontePreguicosa:
+    """
+    Representa uma fonte que só é carregada na primeira utilização
+    (render, size, get_height, ...). Os métodos da fonte real ficam guardados
+    no próprio objeto, por isso depois do primeiro acesso não há custo extra.
+    Pode ser usada como chave de dicionário (ex.: na cache de texto).
+    """
+    def __init__(self, nome, tamanho, negrito=False):
+        self.nome = nome
+        self.tamanho = tamanho
+        self.negrito = negrito
+        self._fonte = None  # Fonte pygame real (None até ser precisa)
+    
+    def carregar(self):
+        """Retorna a fonte pygame, criando-a se ainda não existe."""
+        if self._fonte is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._fonte = cache_fontes.criar_fonte(self.nome, self.tamanho, self.negrito)
+        return self._fonte
+    
+    def __getattr__(self, atributo):
+        # Só é chamado para atributos que ainda não estão no objeto
+        if atributo.startswith("_"):
+            raise AttributeError(atributo)
+        valor = getattr(self.carregar(), atributo)
+        setattr(self, atributo, valor)
+        return valor
 
 # Fontes (simulando escrita à mão)
-pygame.font.init()
-FONTE_TITULO = pygame.font.SysFont("comicsansms", 48, bold=True)
-FONTE_CATEGORIA = pygame.font.SysFont("comicsansms", 32, bold=True)
-FONTE_ITEM = pygame.font.SysFont("comicsansms", 28)
-FONTE_PRECO = pygame.font.SysFont("comicsansms", 26)
-FONTE_BOTAO = pygame.font.SysFont("comicsansms", 30, bold=True)
-FONTE_PEDIDO = pygame.font.SysFont("comicsansms", 24)
-FONTE_POPUP = pygame.font.SysFont("comicsansms", 24)
-FONTE_POPUP_PEQUENA = pygame.font.SysFont("comicsansms", 22)
+FONTE_TITULO = FontePreguicosa("comicsansms", 48, negrito=True)
+FONTE_CATEGORIA = FontePreguicosa("comicsansms", 32, negrito=True)
+FONTE_ITEM = FontePreguicosa("comicsansms", 28)
+FONTE_PRECO = FontePreguicosa("comicsansms", 26)
+FONTE_BOTAO = FontePreguicosa("comicsansms", 30, negrito=True)
+FONTE_PEDIDO = FontePreguicosa("comicsansms", 24)
+FONTE_POPUP = FontePreguicosa("comicsansms", 24)
+FONTE_POPUP_PEQUENA = FontePreguicosa("comicsansms", 22)
+FONTE_PERFIL = FontePreguicosa("dejavusansmono", 14)  # Texto do overlay do perfilador
+
+# ================================
+# CONTEXTO DA APLICAÇÃO (JANELA)
+# ================================
+
+class Aplicacao:
+    """
+    Contexto da aplicação gráfica, criado por main().
+    Inicializa o PyGame e cria a janela só no primeiro acesso a `tela`,
+    e mantém atualizados os globais LARGURA, ALTURA e TELA usados no desenho.
+    """
+    def __init__(self, sem_janela=None):
+        self.sem_janela = MODO_SEM_JANELA if sem_janela is None else sem_janela
+        self._tela = None  # Superfície da janela (None até ser criada)
+    
+    @property
+    def tela(self):
+        """Superfície da janela; é criada no primeiro acesso."""
+        if self._tela is None:
+            self.iniciar_display()
+        return self._tela
+    
+    def iniciar_display(self):
+        """Inicializa o vídeo do PyGame e abre a janela com o tamanho adequado ao ecrã."""
+        global LARGURA, ALTURA
+        
+        if self.sem_janela:
+            # Tem de ser definido antes de inicializar o vídeo
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.display.init()
+        
+        if self.sem_janela:
+            # Sem ecrã real: tamanho fixo para os resultados serem comparáveis
+            LARGURA, ALTURA = 1400, 900
+        else:
+            info = pygame.display.Info()
+            LARGURA = min(1400, info.current_w - 100)
+            ALTURA = min(900, info.current_h - 100)
+        self.redimensionar(LARGURA, ALTURA)
+        pygame.display.set_caption(TITULO_JANELA)
+    
+    def redimensionar(self, nova_largura, nova_altura):
+        """Recria a superfície da janela com o novo tamanho."""
+        global LARGURA, ALTURA, TELA
+        LARGURA = nova_largura
+        ALTURA = nova_altura
+        self._tela = TELA = pygame.display.set_mode((LARGURA, ALTURA), pygame.RESIZABLE)
+        return self._tela
+    
+    def fechar(self):
+        """Fecha a janela e termina o PyGame."""
+        global TELA
+        self._tela = TELA = None
+        pygame.quit()
+
+aplicacao = None  # Contexto da aplicação (criado em main())
+
+# ================================
+# PERFILADOR DOS FRAMES
+# ================================
+
+# Intervalos à volta das fases do loop principal e contadores de textos
+# rasterizados (font.render) e superfícies criadas (Surface); desligado por omissão
+perfilador = Perfilador()
+
+# ================================
+# CACHE DE SUPERFÍCIES DE TEXTO
+# ================================
+
+class CacheTexto:
+    """
+    Guarda as superfícies de texto já renderizadas para não voltar a
+    rasterizar o mesmo texto em cada frame.
+    A chave é (fonte, texto, cor, antialias) e os elementos menos usados
+    são descartados quando o limite de tamanho é atingido (LRU).
+    """
+    def __init__(self, tamanho_maximo=512):
+        self.tamanho_maximo = tamanho_maximo  # Número máximo de superfícies guardadas
+        self.superficies = OrderedDict()  # Chave -> Surface, da menos para a mais usada
+        self.acertos = 0  # Pedidos servidos a partir da cache
+        self.falhas = 0  # Pedidos que obrigaram a renderizar
+
+    def renderizar(self, fonte, texto, cor, antialias=True):
+        """
+        Devolve a superfície do texto, renderizando-a apenas se não estiver na cache.
+        A superfície devolvida é partilhada e não deve ser alterada.
+        """
+        chave = (fonte, texto, tuple(cor), antialias)
+        superficie = self.superficies.get(chave)
+        if superficie is not None:
+            self.acertos += 1
+            self.superficies.move_to_end(chave)
+            return superficie
+
+        self.falhas += 1
+        perfilador.contar("font.render")
+        superficie = fonte.render(texto, antialias, cor)
+        self.superficies[chave] = superficie
+        # Descartar as superfícies usadas há mais tempo
+        while len(self.superficies) > self.tamanho_maximo:
+            self.superficies.popitem(last=False)
+        return superficie
+
+    def limpar(self):
+        """Esvazia a cache e reinicia os contadores."""
+        self.superficies.clear()
+        self.acertos = 0
+        self.falhas = 0
+
+    def estatisticas(self):
+        """Retorna um dicionário com acertos, falhas, taxa de acerto e tamanho atual."""
+        pedidos = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / pedidos if pedidos else 0.0,
+            'tamanho': len(self.superficies),
+        }
+
+cache_texto = CacheTexto()
+
+def renderizar_texto(fonte, texto, cor, antialias=True):
+    """Renderiza texto através da cache partilhada de superfícies."""
+    return cache_texto.renderizar(fonte, texto, cor, antialias)
+
+# ================================
+# CACHE DE SUPERFÍCIES TRANSLÚCIDAS
+# ================================
+
+class CacheTranslucidas:
+    """
+    Guarda as superfícies translúcidas (SRCALPHA) de cor sólida usadas em cada
+    frame, como o fundo e o thumb da scrollbar e o escurecimento por trás dos
+    pop-ups, para não criar e preencher uma superfície nova a cada desenho.
+    A chave é (largura, altura, cor); um tamanho novo (thumb que mudou de
+    altura) cria outra entrada e as menos usadas são descartadas (LRU).
+    Ao redimensionar a janela a cache é esvaziada.
+    """
+    def __init__(self, tamanho_maximo=16):
+        self.tamanho_maximo = tamanho_maximo  # Número máximo de superfícies guardadas
+        self.superficies = OrderedDict()  # Chave -> Surface, da menos para a mais usada
+        self.acertos = 0  # Pedidos servidos a partir da cache
+        self.falhas = 0  # Pedidos que obrigaram a criar uma superfície
+
+    def obter(self, largura, altura, cor):
+        """
+        Devolve uma superfície translúcida do tamanho e cor (RGBA) pedidos.
+        A superfície devolvida é partilhada e não deve ser alterada.
+        """
+        chave = (int(largura), int(altura), tuple(cor))
+        superficie = self.superficies.get(chave)
+        if superficie is not None:
+            self.acertos += 1
+            self.superficies.move_to_end(chave)
+            return superficie
+
+        self.falhas += 1
+        perfilador.contar("Surface")
+        superficie = pygame.Surface(chave[:2], pygame.SRCALPHA)
+        superficie.fill(cor)
+        self.superficies[chave] = superficie
+        # Descartar as superfícies usadas há mais tempo
+        while len(self.superficies) > self.tamanho_maximo:
+            self.superficies.popitem(last=False)
+        return superficie
+
+    def limpar(self):
+        """Esvazia a cache (ex.: a janela mudou de tamanho) e reinicia os contadores."""
+        self.superficies.clear()
+        self.acertos = 0
+        self.falhas = 0
+
+cache_translucidas = CacheTranslucidas()
+
+def superficie_translucida(largura, altura, cor):
+    """Atalho para cache_translucidas.obter()."""
+    return cache_translucidas.obter(largura, altura, cor)
+
+# ================================
+# REGIÕES SUJAS (REDESENHO PARCIAL)
+# ================================
+
+class RegioesSujas:
+    """
+    Regista as áreas da tela que mudaram desde o último frame.
+    Só estas áreas são redesenhadas e enviadas com pygame.display.update(rects);
+    se nada mudou, o frame não desenha nada.
+    """
+    def __init__(self, max_regioes=8, fracao_maxima=0.6):
+        self.regioes = []  # Retângulos marcados como sujos
+        self.tela_inteira = True  # O primeiro frame desenha tudo
+        self.max_regioes = max_regioes  # A partir daqui compensa redesenhar tudo
+        self.fracao_maxima = fracao_maxima  # Fração da tela a partir da qual se redesenha tudo
+
+    def marcar(self, rect):
+        """Marca um retângulo como sujo (precisa de ser redesenhado)."""
+        if not self.tela_inteira and rect is not None:
+            self.regioes.append(pygame.Rect(rect))
+
+    def marcar_tela(self):
+        """Marca a tela inteira como suja."""
+        self.tela_inteira = True
+        self.regioes.clear()
+
+    def pendente(self):
+        """Retorna True se há alguma região por redesenhar."""
+        return self.tela_inteira or bool(self.regioes)
+
+    def recolher(self, largura, altura):
+        """
+        Retorna a lista de retângulos a redesenhar neste frame e esvazia o registo.
+        Retângulos sobrepostos são unidos e, se a área suja for grande, devolve a tela inteira.
+        """
+        tela_rect = pygame.Rect(0, 0, largura, altura)
+        if self.tela_inteira:
+            self.tela_inteira = False
+            self.regioes.clear()
+            return [tela_rect]
+
+        # Unir retângulos que se sobrepõem
+        unidos = []
+        for rect in self.regioes:
+            rect = rect.clip(tela_rect)
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            i = rect.collidelist(unidos)
+            while i != -1:
+                rect.union_ip(unidos.pop(i))
+                i = rect.collidelist(unidos)
+            unidos.append(rect)
+        self.regioes.clear()
+
+        area_suja = sum(r.width * r.height for r in unidos)
+        if len(unidos) > self.max_regioes or area_suja > self.fracao_maxima * largura * altura:
+            return [tela_rect]
+        return unidos
+
+regioes_sujas = RegioesSujas()
+clip_base = None  # Área de recorte do frame atual (None = tela inteira)
+
+def marcar_tela_suja():
+    """Pede o redesenho da tela inteira no próximo frame."""
+    regioes_sujas.marcar_tela()
+
+def marcar_regiao_suja(rect):
+    """Pede o redesenho de uma região da tela no próximo frame."""
+    regioes_sujas.marcar(rect)
+
+# ================================
+# AGENDADOR DO LOOP PRINCIPAL
+# ================================
+
+class AgendadorFrames:
+    """
+    Decide quanto tempo o loop principal espera entre frames.
+    Enquanto há animação (ex.: scroll em movimento, ver Scrollbar.esta_inativo)
+    corre a FPS_ATIVO; caso contrário bloqueia em
+    pygame.event.wait até chegar um evento (ou passar o tempo limite).
+    Mede também o FPS efetivo e a fração do tempo passada a dormir.
+    """
+    def __init__(self, fps_ativo=FPS_ATIVO, espera_inativo_ms=ESPERA_INATIVO_MS):
+        self.fps_ativo = fps_ativo
+        self.espera_inativo_ms = espera_inativo_ms
+        self.relogio = pygame.time.Clock()
+        
+        # Estatísticas, calculadas em janelas de um segundo
+        self.inicio_janela = time.perf_counter()
+        self.frames_janela = 0
+        self.inativo_janela = 0.0
+        self.fps_efetivo = 0.0
+        self.taxa_inativo = 0.0
+        
+    def obter_eventos(self, animando):
+        """
+        Espera pelo próximo frame e retorna a lista de eventos pendentes.
+        Se animando, limita a FPS_ATIVO; se não, dorme até haver eventos.
+        """
+        inicio = time.perf_counter()
+        if animando:
+            self.relogio.tick(self.fps_ativo)
+            eventos = pygame.event.get()
+        else:
+            evento = pygame.event.wait(self.espera_inativo_ms)
+            eventos = [] if evento.type == pygame.NOEVENT else [evento]
+            eventos.extend(pygame.event.get())
+            # Não contar o tempo a dormir como tempo de frame no próximo tick
+            self.relogio.tick()
+        self.inativo_janela += time.perf_counter() - inicio
+        
+        self._contar_frame()
+        return eventos
+    
+    def _contar_frame(self):
+        """Atualiza as estatísticas de FPS efetivo e inatividade."""
+        self.frames_janela += 1
+        agora = time.perf_counter()
+        duracao = agora - self.inicio_janela
+        if duracao >= 1.0:
+            self.fps_efetivo = self.frames_janela / duracao
+            self.taxa_inativo = min(1.0, self.inativo_janela / duracao)
+            self.inicio_janela = agora
+            self.frames_janela = 0
+            self.inativo_janela = 0.0
+            if MOSTRAR_ESTATISTICAS_LOOP:
+                pygame.display.set_caption(
+                    f"{TITULO_JANELA} "
+                    f"({self.fps_efetivo:.1f} FPS, {self.taxa_inativo:.0%} inativo)")
+    
+    def estatisticas(self):
+        """Retorna o FPS efetivo e a taxa de inatividade do último segundo medido."""
+        return {
+            'fps_efetivo': self.fps_efetivo,
+            'taxa_inativo': self.taxa_inativo,
+        }
+
+# ================================
+# LAYOUT (GEOMETRIA POR RESOLUÇÃO)
+# ================================
+
+class Layout:
+    """
+    Geometria da interface para uma resolução: área com scroll, rodapé,
+    scrollbar, colunas clicáveis das listas, botões de ação de cada vista e
+    caixas dos pop-ups. É calculada uma vez por tamanho de janela (ver
+    obter_layout); os retângulos são partilhados e não devem ser alterados.
+    """
+    def __init__(self, largura, altura):
+        self.largura = largura
+        self.altura = altura
+        self.area_conteudo = pygame.Rect(50, 120, largura - 100, altura - 230)  # Área com scroll
+        self.area_rodape = pygame.Rect(0, altura - 45, largura, 45)
+        self.barra = (largura - 40, 120, altura - 220)  # Scrollbar das listas (x, y, altura)
+        self.colunas_menu = (100, largura - 100)  # Intervalo x clicável dos itens do menu
+        self.colunas_pedido = (160, largura - 20)  # Intervalo x clicável dos itens do pedido
+        
+        # Botões de ação: quatro no menu e no pedido, dois (mais estreitos) na conta
+        botao_largura = min(200, largura // 6 - 20)
+        espacamento = (largura - (4 * botao_largura)) // 5
+        self.botoes_acao = [pygame.Rect(espacamento * (i + 1) + botao_largura * i, altura - 100, botao_largura, 60)
+                            for i in range(4)]
+        botao_largura_pequeno = min(180, largura // 4 - 20)
+        espacamento_conta = (largura - (2 * botao_largura_pequeno)) // 3
+        self.botoes_conta = [pygame.Rect(espacamento_conta * (i + 1) + botao_largura_pequeno * i, altura - 100,
+                                         botao_largura_pequeno, 60)
+                             for i in range(2)]
+        self.etiqueta_mesa = pygame.Rect(30, 28, 140, 44)  # Mesa atual no cabeçalho (com várias mesas)
+        self.popups = {}  # (largura, altura) do pop-up -> retângulo centrado
+
+    def rect_popup(self, largura_popup, altura_popup):
+        """Retorna a caixa de um pop-up com o tamanho dado, centrada na janela."""
+        rect = self.popups.get((largura_popup, altura_popup))
+        if rect is None:
+            rect = pygame.Rect((self.largura - largura_popup) // 2, (self.altura - altura_popup) // 2,
+                               largura_popup, altura_popup)
+            self.popups[(largura_popup, altura_popup)] = rect
+        return rect
+
+layouts = OrderedDict()  # (largura, altura) -> Layout, as mais recentes no fim
+layout = None  # Layout da resolução atual
+
+def obter_layout(largura, altura):
+    """Retorna o layout de uma resolução, calculando-o só na primeira vez (LRU)."""
+    chave = (largura, altura)
+    resultado = layouts.get(chave)
+    if resultado is None:
+        resultado = layouts[chave] = Layout(largura, altura)
+        while len(layouts) > MAX_LAYOUTS:
+            layouts.popitem(last=False)
+    else:
+        layouts.move_to_end(chave)
+    return resultado
+
+def layout_atual():
+    """Retorna o layout do tamanho atual da janela (LARGURA x ALTURA)."""
+    global layout
+    if layout is None or layout.largura != LARGURA or layout.altura != ALTURA:
+        layout = obter_layout(LARGURA, ALTURA)
+    return layout
+
+# ================================
+# ROTEAMENTO DE EVENTOS
+# ================================
+
+def coalescer_eventos(eventos):
+    """
+    Junta cada sequência seguida de eventos de movimento num só evento:
+    MOUSEMOTION (última posição, deslocamentos somados), FINGERMOTION do
+    mesmo dedo, MOUSEWHEEL (passos somados) e VIDEORESIZE (só o último
+    tamanho conta). A ordem em relação aos outros
+    eventos (cliques, toques) mantém-se, por isso arrastar e largar continua
+    correto; uma rajada de centenas de movimentos custa o mesmo que um.
+    """
+    resultado = []
+    for evento in eventos:
+        anterior = resultado[-1] if resultado else None
+        if anterior is not None and anterior.type == evento.type:
+            dados = None
+            if evento.type == pygame.MOUSEMOTION:
+                dados = dict(evento.dict, rel=(anterior.rel[0] + evento.rel[0], anterior.rel[1] + evento.rel[1]))
+            elif evento.type == pygame.FINGERMOTION and anterior.finger_id == evento.finger_id:
+                dados = dict(evento.dict, dx=anterior.dx + evento.dx, dy=anterior.dy + evento.dy)
+            elif evento.type == pygame.VIDEORESIZE:
+                dados = evento.dict
+            elif evento.type == pygame.MOUSEWHEEL:
+                dados = dict(evento.dict, x=anterior.x + evento.x, y=anterior.y + evento.y)
+                if hasattr(evento, "precise_y"):
+                    dados.update(precise_x=anterior.precise_x + evento.precise_x,
+                                 precise_y=anterior.precise_y + evento.precise_y)
+            if dados is not None:
+                resultado[-1] = pygame.event.Event(evento.type, dados)
+                continue
+        resultado.append(evento)
+    return resultado
+
+# Região clicável: retângulo na tela, ação ao clicar (recebe a posição) e,
+# opcionalmente, função chamada com True/False quando o mouse entra/sai
+RegiaoClique = namedtuple("RegiaoClique", "rect ao_clicar ao_hover")
+
+class GradeRegioes:
+    """
+    Índice espacial das regiões clicáveis (botões, listas, controlos do pop-up):
+    uma grelha uniforme em que cada célula guarda as regiões que lhe tocam.
+    Encontrar a região sob o mouse só testa as poucas regiões de uma célula.
+    Regiões adicionadas depois ficam por cima.
+    """
+    TAMANHO_CELULA = 64  # Lado (px) de cada célula da grelha
+
+    def __init__(self):
+        self.celulas = {}  # (coluna, linha) -> lista de regiões, por ordem de adição
+
+    def limpar(self):
+        """Remove todas as regiões."""
+        self.celulas.clear()
+
+    def adicionar(self, rect, ao_clicar, ao_hover=None):
+        """Adiciona uma região clicável e retorna-a."""
+        regiao = RegiaoClique(pygame.Rect(rect), ao_clicar, ao_hover)
+        t = self.TAMANHO_CELULA
+        r = regiao.rect
+        if r.width <= 0 or r.height <= 0:
+            return regiao
+        for coluna in range(r.left // t, (r.right - 1) // t + 1):
+            for linha in range(r.top // t, (r.bottom - 1) // t + 1):
+                self.celulas.setdefault((coluna, linha), []).append(regiao)
+        return regiao
+
+    def procurar(self, pos):
+        """Retorna a região (a de cima) que contém a posição, ou None."""
+        t = self.TAMANHO_CELULA
+        for regiao in reversed(self.celulas.get((pos[0] // t, pos[1] // t), ())):
+            if regiao.rect.collidepoint(pos):
+                return regiao
+        return None
+
+class RoteadorEventos:
+    """
+    Encaminha os eventos do loop principal. Os handlers são registados por
+    estado ("menu", "pedido", "conta" ou "popup"; None = todos os estados) e
+    tipo de evento, e os cliques e o hover são resolvidos pela grelha de
+    regiões do estado atual, reconstruída só quando é invalidada
+    (novos botões, pop-up aberto/fechado, janela redimensionada).
+    """
+    def __init__(self):
+        self.handlers = {}  # Estado -> {tipo de evento: handler(evento)}
+        self.grade = GradeRegioes()
+        self.grade_valida = False
+        self.regiao_hover = None  # Região sob o mouse no último frame
+        self.recebidos = 0  # Eventos recebidos do PyGame
+        self.processados = 0  # Eventos processados depois de coalescer
+
+    def registar(self, estado, tipo, handler):
+        """Regista o handler de um tipo de evento num estado (None = em todos)."""
+        self.handlers.setdefault(estado, {})[tipo] = handler
+
+    def invalidar_regioes(self):
+        """As regiões clicáveis mudaram: a grelha é reconstruída quando for precisa."""
+        self.grade_valida = False
+        self.regiao_hover = None
+
+    def _obter_grade(self):
+        if not self.grade_valida:
+            self.grade.limpar()
+            registar_regioes_clique(self.grade)
+            self.grade_valida = True
+        return self.grade
+
+    def processar(self, eventos):
+        """
+        Coalesce os eventos, chama o handler de cada um para o estado atual
+        (que pode mudar a meio da lista) e retorna a lista coalescida.
+        """
+        self.recebidos += len(eventos)
+        eventos = coalescer_eventos(eventos)
+        self.processados += len(eventos)
+        for evento in eventos:
+            estado = "popup" if popup_atual is not None else estado_atual
+            handler = self.handlers.get(estado, {}).get(evento.type)
+            if handler is None:
+                handler = self.handlers.get(None, {}).get(evento.type)
+            if handler is not None:
+                handler(evento)
+        return eventos
+
+    def clicar(self, pos):
+        """Executa a ação da região clicada. Retorna True se havia uma região."""
+        regiao = self._obter_grade().procurar(pos)
+        if regiao is None:
+            return False
+        regiao.ao_clicar(pos)
+        return True
+
+    def atualizar_hover(self, pos_mouse):
+        """Avisa as regiões de onde o mouse saiu e onde entrou desde o último frame."""
+        regiao = self._obter_grade().procurar(pos_mouse)
+        if regiao is self.regiao_hover:
+            return
+        if self.regiao_hover is not None and self.regiao_hover.ao_hover is not None:
+            self.regiao_hover.ao_hover(False)
+        if regiao is not None and regiao.ao_hover is not None:
+            regiao.ao_hover(True)
+        self.regiao_hover = regiao
+
+    def estatisticas(self):
+        """Retorna os eventos recebidos e os processados depois de coalescer."""
+        return {
+            'recebidos': self.recebidos,
+            'processados': self.processados,
+        }
+
+roteador = RoteadorEventos()
+
+def invalidar_regioes_clique():
+    """Pede a reconstrução da grelha de regiões clicáveis (botões ou pop-up mudaram)."""
+    roteador.invalidar_regioes()
+
+# ================================
+# DINHEIRO (VALORES EM CÊNTIMOS)
+# ================================
+
+# Todos os valores do pedido são inteiros em cêntimos, para que os totais
+# sejam exatos (sem erros de arredondamento de float)
+
+# Taxa de IVA (%) incluída nos preços de cada categoria
+TAXA_IVA_PADRAO = 13  # Restauração
+TAXAS_IVA_CATEGORIAS = {  # Taxas das categorias sem taxa no catálogo
+    "Bebidas": 23,
+}
+TAXAS_IVA = dict(TAXAS_IVA_CATEGORIAS)  # Taxas em uso (refeitas a cada catálogo aplicado)
+
+def euros_para_centimos(preco):
+    """Converte um preço em euros (float) para cêntimos (int)."""
+    return int(round(preco * 100))
+
+def taxa_iva_categoria(categoria):
+    """Retorna a taxa de IVA (%) aplicada aos itens de uma categoria."""
+    return TAXAS_IVA.get(categoria, TAXA_IVA_PADRAO)
+
+def calcular_iva(total_centimos, taxa):
+    """Retorna o IVA (em cêntimos) incluído num valor com IVA, para a taxa dada."""
+    base = (total_centimos * 100 * 2 + (100 + taxa)) // (2 * (100 + taxa))  # Arredondado ao cêntimo
+    return total_centimos - base
+
+# ================================
+# MODELO DO PEDIDO
+# ================================
+
+# Linha do pedido agrupado: um item do menu com a sua quantidade e subtotal (cêntimos)
+LinhaPedido = namedtuple("LinhaPedido", "nome preco categoria quantidade indice subtotal")
+
+class Pedido:
+    """
+    Pedido do cliente, guardado como quantidade por item do menu
+    (índice no menu -> quantidade) em vez de uma tupla por unidade.
+    Adicionar, remover N unidades, limpar e obter o total são operações de
+    tempo constante: cada alteração atualiza a contagem, o subtotal da linha,
+    o subtotal da categoria, o total por taxa de IVA e o total geral.
+    Os valores são inteiros em cêntimos. A vista agrupada e ordenada é
+    guardada em cache até o pedido mudar.
+    Para o código de desenho, len(), bool() e a iteração continuam a comportar-se
+    como a antiga lista de unidades (nome, preco, categoria).
+    """
+    def __init__(self):
+        self.quantidades = {}  # Índice do item no menu -> quantidade
+        self.subtotais = {}  # Índice do item no menu -> subtotal da linha (cêntimos)
+        self.subtotais_categoria = {}  # Categoria -> subtotal (cêntimos)
+        self.totais_iva = {}  # Taxa de IVA -> total com IVA dos itens a essa taxa (cêntimos)
+        self.num_unidades = 0  # Soma de todas as quantidades
+        self.total = 0  # Total a pagar (cêntimos)
+        self._agrupados = None  # Cache da vista agrupada (None = desatualizada)
+
+    def _somar(self, indice, quantidade):
+        """Atualiza contagens e totais com +quantidade (ou -quantidade) unidades de um item."""
+        valor = precos_centimos[indice] * quantidade
+        categoria = menu[indice][2]
+        taxa = taxa_iva_categoria(categoria)
+
+        nova_quantidade = self.quantidades.get(indice, 0) + quantidade
+        if nova_quantidade:
+            self.quantidades[indice] = nova_quantidade
+            self.subtotais[indice] = self.subtotais.get(indice, 0) + valor
+        else:
+            del self.quantidades[indice]
+            del self.subtotais[indice]
+
+        self.subtotais_categoria[categoria] = self.subtotais_categoria.get(categoria, 0) + valor
+        if not self.subtotais_categoria[categoria]:
+            del self.subtotais_categoria[categoria]
+        self.totais_iva[taxa] = self.totais_iva.get(taxa, 0) + valor
+        if not self.totais_iva[taxa]:
+            del self.totais_iva[taxa]
+
+        self.num_unidades += quantidade
+        self.total += valor
+        self._agrupados = None
+
+    def adicionar(self, indice, quantidade=1):
+        """Adiciona unidades do item do menu com o índice dado."""
+        if quantidade > 0:
+            self._somar(indice, quantidade)
+
+    def remover(self, indice, quantidade=1):
+        """
+        Remove até `quantidade` unidades do item do menu com o índice dado.
+        Retorna o número de unidades efetivamente removidas.
+        """
+        quantidade = min(quantidade, self.quantidades.get(indice, 0))
+        if quantidade <= 0:
+            return 0
+        self._somar(indice, -quantidade)
+        return quantidade
+
+    def limpar(self):
+        """Remove todos os itens do pedido."""
+        self.quantidades = {}
+        self.subtotais = {}
+        self.subtotais_categoria = {}
+        self.totais_iva = {}
+        self.num_unidades = 0
+        self.total = 0
+        self._agrupados = None
+
+    def agrupados(self):
+        """
+        Retorna a lista de LinhaPedido ordenada por categoria (segundo a ordem
+        do restaurante) e posição no menu. Só é recalculada se o pedido mudou.
+        """
+        if self._agrupados is None:
+            ordenados = sorted(self.quantidades, key=chave_ordem_menu)
+            self._agrupados = [
+                LinhaPedido(*menu[indice], self.quantidades[indice], indice, self.subtotais[indice])
+                for indice in ordenados
+            ]
+        return self._agrupados
+
+    def discriminacao_iva(self):
+        """
+        Retorna a lista de (taxa, base, iva, total) em cêntimos, por taxa crescente.
+        Os totais por taxa já estão calculados; só se separa a base do IVA.
+        """
+        resultado = []
+        for taxa in sorted(self.totais_iva):
+            total = self.totais_iva[taxa]
+            iva = calcular_iva(total, taxa)
+            resultado.append((taxa, total - iva, iva, total))
+        return resultado
+
+    def quantidade(self, indice):
+        """Retorna a quantidade de um item do menu no pedido (0 se não existe)."""
+        return self.quantidades.get(indice, 0)
+
+    def unidades(self):
+        """
+        Percorre o pedido como a antiga lista de unidades: uma tupla
+        (nome, preco, categoria) por unidade, pela ordem da conta.
+        """
+        for linha in self.agrupados():
+            item = menu[linha.indice]
+            for _ in range(linha.quantidade):
+                yield item
+
+    def __len__(self):
+        """Número total de unidades no pedido."""
+        return self.num_unidades
+
+    def __iter__(self):
+        return self.unidades()
 
 # ================================
 # Dados do restaurante
 # ================================
 
-menu = (
-    # Entradas
-    ("Bruschetta al Pomodoro", 5.50, "Entradas"),
-    ("Carpaccio di Manzo", 9.50, "Entradas"),
-    ("Insalata Caprese", 7.00, "Entradas"),
-
-    # Especialidades do Chef
-    ("Ossobuco alla Milanese", 17.50, "Especialidades do Chef"),
-    ("Saltimbocca alla Romana", 16.00, "Especialidades do Chef"),
-    ("Risotto ai Funghi Porcini", 15.50, "Especialidades do Chef"),
-
-    # Pastas
-    ("Spaghetti alla Carbonara", 13.00, "Pastas"),
-    ("Tagliatelle al Ragù Bolognese", 13.50, "Pastas"),
-    ("Lasagna alla Bolognese", 14.00, "Pastas"),
-    ("Penne all'Arrabbiata", 11.50, "Pastas"),
-
-    # Pizza
-    ("Pizza Margherita", 9.00, "Pizza"),
-    ("Pizza Quattro Formaggi", 11.00, "Pizza"),
-    ("Pizza Prosciutto e Funghi", 11.50, "Pizza"),
-    ("Pizza Diavola", 12.00, "Pizza"),
-
-    # Bebidas
-    ("Acqua Naturale", 1.50, "Bebidas"),
-    ("Acqua Frizzante", 1.80, "Bebidas"),
-    ("Vino Rosso della Casa (copo)", 4.50, "Bebidas"),
-    ("Vino Bianco della Casa (copo)", 4.50, "Bebidas"),
-    ("Caffè Espresso", 1.50, "Bebidas"),
-    ("Cappuccino", 2.00, "Bebidas"),
-
-    # Sobremesas
-    ("Tiramisù", 5.00, "Sobremesas"),
-    ("Panna Cotta ai Frutti di Bosco", 5.50, "Sobremesas"),
-    ("Gelato Artigianale (2 sabores)", 4.50, "Sobremesas"),
-    ("Cannolo Siciliano", 4.80, "Sobremesas"),
-)
-
-pedido = []
+# O catálogo (itens, preços, categorias e traduções) vem de um ficheiro JSON/CSV;
+# ver catalogo.py. A ordem das categorias é a ordem em que aparecem no ficheiro.
+FICHEIRO_CATALOGO = os.environ.get("MENU_RESTAURANTE_CATALOGO") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "menu.json")
+IDIOMA_MENU = os.environ.get("MENU_RESTAURANTE_IDIOMA") or None  # None = idioma base do catálogo
+RECARREGAR_CATALOGO = True  # Aplicar alterações do ficheiro do catálogo sem reiniciar
+INTERVALO_VIGIA_CATALOGO = 1.0  # Segundos entre verificações do ficheiro do catálogo
+
+catalogo = None  # Catálogo carregado
+menu = ()  # Itens do menu: tuplas (nome, preco, categoria)
+ids_menu = []  # Identificador estável de cada item do menu (pelo índice)
+ORDEM_CATEGORIAS = ()  # Ordem em que as categorias aparecem no menu, pedido e conta
+POSICAO_CATEGORIA = {}  # Categoria -> posição em ORDEM_CATEGORIAS
+precos_centimos = []  # Preço de cada item do menu em cêntimos (pelo índice do item)
+
+def aplicar_catalogo(novo_catalogo):
+    """
+    Define os dados do menu (itens, ids, preços, ordem das categorias e taxas de
+    IVA) a partir de um catálogo. Não mexe no pedido nem na interface.
+    """
+    global catalogo, menu, ids_menu, ORDEM_CATEGORIAS, POSICAO_CATEGORIA, precos_centimos, TAXAS_IVA
+    
+    catalogo = novo_catalogo
+    menu = catalogo.itens(IDIOMA_MENU)
+    ids_menu = list(catalogo.ids)
+    ORDEM_CATEGORIAS = catalogo.nomes_categorias(IDIOMA_MENU)
+    POSICAO_CATEGORIA = {categoria: i for i, categoria in enumerate(ORDEM_CATEGORIAS)}
+    precos_centimos = catalogo.precos_centimos
+    # Taxas refeitas de raiz: as de categorias que saíram do catálogo não ficam
+    taxas = dict(TAXAS_IVA_CATEGORIAS)
+    for categoria, taxa in zip(ORDEM_CATEGORIAS, catalogo.iva_categorias):
+        if taxa is not None:
+            taxas[categoria] = taxa
+    TAXAS_IVA = taxas
+
+def carregar_menu():
+    """
+    Lê o catálogo de FICHEIRO_CATALOGO (pela cache binária) e aplica-o.
+    Chamado por main() antes de repor o pedido; importar o módulo não lê nem
+    escreve ficheiros, e quem o usa sem main() (ex.: ferramentas e testes)
+    chama esta função ou definir_menu().
+    """
+    aplicar_catalogo(carregar_catalogo(FICHEIRO_CATALOGO))
+
+def chave_ordem_menu(indice):
+    """Chave de ordenação de um item do menu: posição da categoria e depois posição no menu."""
+    return (POSICAO_CATEGORIA.get(menu[indice][2], 999), indice)
+
+pedido = Pedido()
+
+def quantidades_de_itens(itens):
+    """
+    Converte itens no formato do diário ({id do item: [índice, quantidade]})
+    em {índice no menu: quantidade}, pelo id (os índices mudam com o catálogo).
+    Itens que já não estão no catálogo são ignorados.
+    """
+    indices_por_id = {id_item: i for i, id_item in enumerate(ids_menu)}
+    quantidades = {}
+    for id_item, (_, quantidade) in itens.items():
+        indice = indices_por_id.get(id_item)
+        if indice is not None:
+            quantidades[indice] = quantidade
+    return quantidades
+
+def pedido_de_itens(itens):
+    """Cria um Pedido a partir de itens no formato do diário."""
+    novo = Pedido()
+    for indice, quantidade in quantidades_de_itens(itens).items():
+        novo.adicionar(indice, quantidade)
+    return novo
+
+def itens_do_pedido(um_pedido):
+    """Retorna os itens de um pedido no formato do diário ({id do item: [índice, quantidade]})."""
+    return {ids_menu[i]: [i, q] for i, q in um_pedido.quantidades.items()}
 
 # ================================
 # Variáveis de estado
@@ -110,7 +1004,10 @@ quantidade_a_remover = 1  # Quantidade a remover no pop-up
 popup_visivel = False  # Controla se o pop-up está visível
 item_para_remover = None  # Informação do item a remover (quando em pop-up)
 popup_tipo = None  # Tipo de pop-up: "remover" ou "pagamento"
+popup_atual = None  # Widget do pop-up aberto (PopupRemover ou PopupPagamento)
 metodo_pagamento = None  # Método de pagamento escolhido: "numerario" ou "cartao"
+mesa_atual = MESA  # Mesa cujo pedido o terminal está a mostrar
+redimensionamento_pendente = None  # (largura, altura, instante) do último VIDEORESIZE por aplicar
 
 # ================================
 # Classes para a interface
@@ -137,7 +1034,7 @@ class Botao:
         pygame.draw.rect(tela, COR_TEXTO, self.rect, 3, border_radius=10)
         
         # Renderizar e desenhar texto centrado no botão
-        texto_surf = FONTE_BOTAO.render(self.texto, True, COR_TEXTO)
+        texto_surf = renderizar_texto(FONTE_BOTAO, self.texto, COR_TEXTO)
         texto_rect = texto_surf.get_rect(center=self.rect.center)
         tela.blit(texto_surf, texto_rect)
         
@@ -153,11 +1050,17 @@ class Botao:
         return False
         
     def atualizar(self, pos_mouse):
-        """Atualiza a cor do botão baseado na posição do mouse (hover effect)."""
-        if self.rect.collidepoint(pos_mouse):
-            self.cor_atual = self.cor_hover
-        else:
-            self.cor_atual = self.cor_normal
+        """
+        Atualiza a cor do botão baseado na posição do mouse (hover effect).
+        Retorna True se a cor mudou (o botão precisa de ser redesenhado).
+        """
+        return self.definir_hover(self.rect.collidepoint(pos_mouse))
+        
+    def definir_hover(self, ativo):
+        """Põe ou tira o efeito hover. Retorna True se a cor mudou."""
+        cor_anterior = self.cor_atual
+        self.cor_atual = self.cor_hover if ativo else self.cor_normal
+        return self.cor_atual != cor_anterior
 
 class ItemMenu:
     """
@@ -178,12 +1081,12 @@ class ItemMenu:
         cor = COR_DESTAQUE if self.selecionado else COR_TEXTO
         
         # Desenhar nome do prato à esquerda
-        nome_surf = FONTE_ITEM.render(self.nome, True, cor)
+        nome_surf = renderizar_texto(FONTE_ITEM, self.nome, cor)
         tela.blit(nome_surf, (x, y))
         
         # Desenhar preço à direita
         preco_texto = f"{self.preco:.2f}€"
-        preco_surf = FONTE_PRECO.render(preco_texto, True, COR_TEXTO_SECUNDARIO)
+        preco_surf = renderizar_texto(FONTE_PRECO, preco_texto, COR_TEXTO_SECUNDARIO)
         preco_rect = preco_surf.get_rect()
         preco_rect.right = tela.get_width() - 120
         preco_rect.top = y
@@ -199,7 +1102,9 @@ class ItemMenu:
 class Scrollbar:
     """
     Implementa uma barra de scroll personalizada para scroll vertical.
-    Suporta clique do mouse, arrastamento e scroll com roda do mouse.
+    Suporta clique do mouse, arrastamento, roda do mouse e arrastar com o dedo.
+    A roda e o dedo usam scroll cinético: o conteúdo ganha velocidade e vai
+    abrandando até parar, calculado com time.monotonic() em cada atualização.
     """
     def __init__(self, x, y, altura, conteudo_altura):
         self.x = x  # Posição X da scrollbar
@@ -211,48 +1116,130 @@ class Scrollbar:
         self.scroll_max = max(0, conteudo_altura - altura)  # Scroll máximo
         self.arrastando = False  # Se o utilizador está arrastando a scrollbar
         self.hover = False  # Se o mouse está sobre a scrollbar
+        self.velocidade = 0.0  # Velocidade do scroll cinético (px/s, positiva = para baixo)
+        self.area_toque = None  # Área onde o dedo arrasta o conteúdo (None = sem toque)
+        self.dedo = None  # Id do dedo que está a arrastar o conteúdo
+        self.ultimo_movimento_dedo = 0.0  # Instante do último movimento do dedo
+        self.ultimo_tempo = None  # Instante da última atualização em movimento (None = parada)
         
-    def atualizar(self, pos_mouse, eventos):
+    def redimensionar(self, x, y, altura):
+        """Muda a posição e a altura da barra, mantendo o scroll dentro dos novos limites."""
+        self.x = x
+        self.y = y
+        self.altura = altura
+        self.scroll_max = max(0, self.conteudo_altura - altura)
+        self.scroll_y = max(0, min(self.scroll_y, self.scroll_max))
+        
+    def esta_inativo(self):
+        """Indica se o scroll está parado (sem arrastar e sem velocidade)."""
+        return not (self.arrastando or self.dedo is not None or self.velocidade)
+        
+    def atualizar(self, pos_mouse, eventos, agora=None):
         """
-        Processa eventos de mouse (cliques, movimento, roda) e atualiza a posição de scroll.
+        Processa eventos de mouse (cliques, movimento, roda) e de toque e
+        avança o scroll cinético até ao instante `agora` (time.monotonic()).
         Retorna a posição atual de scroll em pixels.
         """
+        if agora is None:
+            agora = time.monotonic()
+        # Parada, a animação só começa agora (um evento que chega depois de o
+        # loop dormir não salta logo para o fim do movimento)
+        dt = agora - self.ultimo_tempo if self.ultimo_tempo is not None else 0.0
         self.hover = False
         
-        if self.scroll_max > 0:
-            # Calcular dimensões do "thumb" (a parte arrastável da scrollbar)
-            thumb_altura = max(30, (self.altura ** 2) / self.conteudo_altura)
-            thumb_y = self.y + (self.scroll_y / self.scroll_max) * (self.altura - thumb_altura)
-            thumb_rect = pygame.Rect(self.x, thumb_y, self.largura, thumb_altura)
+        if self.scroll_max <= 0:
+            self.velocidade = 0.0
+            self.dedo = None
+            self.ultimo_tempo = None
+            return self.scroll_y
+        
+        # Calcular dimensões do "thumb" (a parte arrastável da scrollbar)
+        thumb_altura = max(30, (self.altura ** 2) / self.conteudo_altura)
+        thumb_y = self.y + (self.scroll_y / self.scroll_max) * (self.altura - thumb_altura)
+        thumb_rect = pygame.Rect(self.x, thumb_y, self.largura, thumb_altura)
+        
+        # Verificar se mouse está sobre o thumb
+        self.hover = thumb_rect.collidepoint(pos_mouse)
+        
+        roda = 0.0  # Passos da roda acumulados neste frame (positivo = para cima)
+        deslocamento_dedo = 0.0  # Movimento vertical do dedo neste frame (px)
+        dedo_levantado = False
+        
+        # Processar eventos de mouse e de toque
+        for event in eventos:
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1 and thumb_rect.collidepoint(pos_mouse):
+                    # Iniciar arrastamento (pára o scroll cinético)
+                    self.arrastando = True
+                    self.velocidade = 0.0
+                    self.offset_arrasto = pos_mouse[1] - thumb_y
             
-            # Verificar se mouse está sobre o thumb
-            self.hover = thumb_rect.collidepoint(pos_mouse)
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:
+                    self.arrastando = False
             
-            # Processar eventos de mouse
-            for event in eventos:
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1 and thumb_rect.collidepoint(pos_mouse):
-                        # Iniciar arrastamento
-                        self.arrastando = True
-                        self.offset_arrasto = pos_mouse[1] - thumb_y
-                    elif event.button == 4:  # Scroll para cima
-                        self.scroll_y = max(0, self.scroll_y - 40)
-                    elif event.button == 5:  # Scroll para baixo
-                        self.scroll_y = min(self.scroll_max, self.scroll_y + 40)
-                
-                elif event.type == pygame.MOUSEBUTTONUP:
-                    if event.button == 1:
-                        self.arrastando = False
-                
-                elif event.type == pygame.MOUSEMOTION:
-                    if self.arrastando:
-                        # Calcular nova posição de scroll baseada no movimento do mouse
-                        mouse_rel_y = pos_mouse[1] - self.y - self.offset_arrasto
-                        percent = mouse_rel_y / (self.altura - thumb_altura)
-                        self.scroll_y = percent * self.scroll_max
-                        # Limitar scroll aos valores mínimo e máximo
-                        self.scroll_y = max(0, min(self.scroll_max, self.scroll_y))
+            elif event.type == pygame.MOUSEMOTION:
+                if self.arrastando:
+                    # Calcular nova posição de scroll baseada no movimento do mouse
+                    mouse_rel_y = pos_mouse[1] - self.y - self.offset_arrasto
+                    percent = mouse_rel_y / (self.altura - thumb_altura)
+                    self.scroll_y = percent * self.scroll_max
+            
+            elif event.type == pygame.MOUSEWHEEL:
+                # Roda (ou touchpad, com passos fracionários): acumular os passos
+                roda += getattr(event, "precise_y", event.y)
+            
+            elif event.type == pygame.FINGERDOWN:
+                # As coordenadas do toque são relativas (0 a 1) ao tamanho da janela
+                if (self.dedo is None and self.area_toque is not None
+                        and self.area_toque.collidepoint(event.x * LARGURA, event.y * ALTURA)):
+                    self.dedo = event.finger_id
+                    self.velocidade = 0.0
+                    self.ultimo_movimento_dedo = agora
+            
+            elif event.type == pygame.FINGERMOTION:
+                if event.finger_id == self.dedo:
+                    deslocamento_dedo += event.dy * ALTURA
+            
+            elif event.type == pygame.FINGERUP:
+                if event.finger_id == self.dedo:
+                    dedo_levantado = True
+        
+        if deslocamento_dedo:
+            # O conteúdo segue o dedo; a velocidade (suavizada) fica para a inércia
+            self.scroll_y -= deslocamento_dedo
+            if dt > 0:
+                self.velocidade = 0.5 * self.velocidade - 0.5 * deslocamento_dedo / dt
+            self.ultimo_movimento_dedo = agora
+        if dedo_levantado:
+            self.dedo = None
+            if agora - self.ultimo_movimento_dedo > PAUSA_SEM_INERCIA:
+                self.velocidade = 0.0  # O dedo parou antes de levantar
         
+        if roda:
+            # Cada passo dá a velocidade que percorre SCROLL_POR_PASSO_RODA até parar;
+            # passos seguidos no mesmo sentido somam-se
+            impulso = -roda * SCROLL_POR_PASSO_RODA / TEMPO_ABRANDAMENTO
+            if self.velocidade * impulso < 0:
+                self.velocidade = 0.0  # Mudou de sentido
+            self.velocidade += impulso
+        
+        if self.velocidade and not self.arrastando and self.dedo is None:
+            # Movimento exato do decaimento exponencial durante dt
+            decaimento = math.exp(-dt / TEMPO_ABRANDAMENTO)
+            self.scroll_y += self.velocidade * TEMPO_ABRANDAMENTO * (1 - decaimento)
+            self.velocidade *= decaimento
+            if abs(self.velocidade) < VELOCIDADE_MINIMA:
+                # Parar já, com o resto do percurso, num pixel inteiro
+                self.scroll_y = round(self.scroll_y + self.velocidade * TEMPO_ABRANDAMENTO)
+                self.velocidade = 0.0
+        
+        # Limitar scroll aos valores mínimo e máximo (nos limites o movimento pára)
+        if not 0 <= self.scroll_y <= self.scroll_max:
+            self.scroll_y = max(0, min(self.scroll_max, self.scroll_y))
+            self.velocidade = 0.0
+        
+        self.ultimo_tempo = None if self.esta_inativo() else agora
         return self.scroll_y
     
     def desenhar(self, tela):
@@ -262,9 +1249,7 @@ class Scrollbar:
         
         # Desenhar fundo da scrollbar (com transparência)
         bg_rect = pygame.Rect(self.x, self.y, self.largura, self.altura)
-        s = pygame.Surface((self.largura, self.altura), pygame.SRCALPHA)
-        s.fill(COR_SCROLLBAR_BG)
-        tela.blit(s, bg_rect)
+        tela.blit(superficie_translucida(self.largura, self.altura, COR_SCROLLBAR_BG), bg_rect)
         
         # Desenhar thumb (a parte arrastável)
         thumb_altura = max(30, (self.altura ** 2) / self.conteudo_altura)
@@ -273,67 +1258,1097 @@ class Scrollbar:
         
         # Mudar cor do thumb se está em hover ou sendo arrastado
         thumb_color = COR_SCROLLBAR_HOVER if self.hover or self.arrastando else COR_SCROLLBAR
-        s_thumb = pygame.Surface((self.largura, thumb_altura), pygame.SRCALPHA)
-        s_thumb.fill(thumb_color)
-        tela.blit(s_thumb, thumb_rect)
+        tela.blit(superficie_translucida(self.largura, thumb_altura, thumb_color), thumb_rect)
         
         # Desenhar borda do thumb
         pygame.draw.rect(tela, COR_TEXTO, thumb_rect, 1, border_radius=3)
 
+class ListaVirtual:
+    """
+    Lista vertical com scroll, usada pelas vistas do menu, do pedido e da conta.
+    Cada linha é (tipo, dados, altura); a lista guarda o índice das posições
+    (soma das alturas) e encontra por pesquisa binária as linhas visíveis e a
+    linha sob o mouse, por isso só as linhas dentro da área são desenhadas e o
+    custo de um frame não depende do tamanho da lista.
+    A posição de scroll é a da scrollbar ligada à lista.
+    """
+    MARGEM = 10  # Folga (px) para linhas cujo desenho sai um pouco da sua altura
+
+    def __init__(self, area, barra, linhas, espaco_final=0):
+        self.area = pygame.Rect(area)  # Área visível na tela (recorte)
+        self.linhas = []  # (tipo, dados) de cada linha
+        self.posicoes = []  # y do topo de cada linha, relativo ao topo do conteúdo
+        self.fins = []  # y do fundo de cada linha (também crescente)
+        self.linhas_itens = {}  # Dados de cada linha "item" -> índice da linha
+
+        y = 0
+        for tipo, dados, altura in linhas:
+            if tipo == "item":
+                self.linhas_itens[dados] = len(self.linhas)
+            self.linhas.append((tipo, dados))
+            self.posicoes.append(y)
+            y += altura
+            self.fins.append(y)
+        self.altura_conteudo = y + espaco_final
+
+        x_barra, y_barra, altura_barra = barra
+        self.scrollbar = Scrollbar(x_barra, y_barra, altura_barra, self.altura_conteudo)
+        self.scrollbar.area_toque = self.area  # Arrastar com o dedo na lista faz scroll
+
+    def reposicionar(self, area, barra):
+        """Muda a área e a scrollbar (nova resolução) sem recalcular as linhas."""
+        self.area = pygame.Rect(area)
+        self.scrollbar.redimensionar(*barra)
+        self.scrollbar.area_toque = self.area
+
+    @property
+    def scroll(self):
+        """Posição de scroll atual (pixels)."""
+        return self.scrollbar.scroll_y
+
+    def intervalo(self, topo, fundo):
+        """Retorna o range de índices das linhas que tocam no intervalo [topo, fundo) do conteúdo."""
+        inicio = bisect_right(self.fins, topo - self.MARGEM)
+        fim = bisect_left(self.posicoes, fundo + self.MARGEM)
+        return range(inicio, fim)
+
+    def visiveis(self):
+        """Retorna o range de índices das linhas visíveis com o scroll atual."""
+        return self.intervalo(self.scroll, self.scroll + self.area.height)
+
+    def y_linha(self, indice):
+        """Posição y de uma linha na tela (com o scroll atual)."""
+        return self.area.y + self.posicoes[indice] - self.scroll
+
+    def y_item(self, dados):
+        """Posição y na tela da linha "item" com os dados indicados."""
+        return self.y_linha(self.linhas_itens[dados])
+
+    def linha_na_posicao(self, pos):
+        """Retorna o índice da linha sob a posição da tela (ou None se fora da área)."""
+        if not self.area.collidepoint(pos):
+            return None
+        y_conteudo = pos[1] - self.area.y + self.scroll
+        i = bisect_right(self.posicoes, y_conteudo) - 1
+        if i < 0 or y_conteudo >= self.fins[i]:
+            return None
+        return i
+
+    def item_na_posicao(self, pos):
+        """Retorna os dados da linha "item" sob a posição da tela (ou None)."""
+        i = self.linha_na_posicao(pos)
+        if i is None:
+            return None
+        tipo, dados = self.linhas[i]
+        return dados if tipo == "item" else None
+
+    def ha_mais_abaixo(self):
+        """Indica se o fim do conteúdo está abaixo da área visível."""
+        return bool(self.fins) and self.fins[-1] - self.scroll > self.area.height
+
+    def desenhar(self, tela, desenhar_linha):
+        """
+        Desenha as linhas visíveis, chamando desenhar_linha(tela, tipo, dados, y)
+        para cada uma, com recorte na área da lista, e depois a scrollbar.
+        """
+        aplicar_area_clipping(tela, *self.area)
+        for i in self.visiveis():
+            tipo, dados = self.linhas[i]
+            desenhar_linha(tela, tipo, dados, self.y_linha(i))
+        remover_area_clipping(tela)
+
+        if self.scrollbar.scroll_max > 0:
+            self.scrollbar.desenhar(tela)
+
+class CanvasMenu:
+    """
+    Corpo do menu (categorias, separadores, nomes e preços) pré-renderizado
+    fora da tela, para que o scroll custe apenas uma ou duas cópias (blit).
+    O conteúdo é dividido em blocos horizontais de altura fixa, renderizados
+    quando ficam visíveis pela primeira vez, e só os mais recentes são mantidos
+    em memória. O destaque do item selecionado é desenhado por cima, à parte.
+    """
+    ALTURA_BLOCO = 512  # Altura (px) de cada bloco pré-renderizado
+
+    def __init__(self, max_blocos=6):
+        self.max_blocos = max_blocos  # Número máximo de blocos em memória
+        self.blocos = OrderedDict()  # Índice do bloco -> Surface (LRU)
+        self.largura = None  # Largura para a qual os blocos foram renderizados
+
+    def invalidar(self):
+        """Descarta os blocos (dados do menu ou tamanho da janela mudaram)."""
+        self.blocos.clear()
+
+    def invalidar_intervalo(self, topo, fundo):
+        """Descarta só os blocos que tocam no intervalo vertical [topo, fundo) do conteúdo."""
+        for indice in range(max(0, topo) // self.ALTURA_BLOCO, max(0, fundo - 1) // self.ALTURA_BLOCO + 1):
+            self.blocos.pop(indice, None)
+
+    def _renderizar_bloco(self, indice):
+        """
+        Renderiza as linhas do menu (categorias e itens) que tocam no bloco
+        indicado, encontradas por pesquisa binária na lista do menu.
+        """
+        topo = indice * self.ALTURA_BLOCO
+        fundo = topo + self.ALTURA_BLOCO
+        perfilador.contar("Surface")
+        bloco = pygame.Surface((self.largura, self.ALTURA_BLOCO)).convert()
+        bloco.fill(COR_FUNDO)
+        
+        for i in lista_menu.intervalo(topo, fundo):
+            tipo, dados = lista_menu.linhas[i]
+            y_bloco = lista_menu.posicoes[i] - topo
+            if tipo == "categoria":
+                desenhar_categoria(bloco, 100, y_bloco, dados)
+                # Linha separadora sob a categoria
+                pygame.draw.line(bloco, (100, 100, 100), (100, y_bloco + 40), (self.largura - 140, y_bloco + 40), 2)
+            else:
+                item_obj = itens_menu_obj[dados]
+                desenhar_item_com_preco(bloco, 120, self.largura - 120, y_bloco,
+                                        item_obj.nome, f"{item_obj.preco:.2f}€")
+        return bloco
+
+    def _obter_bloco(self, indice):
+        """Retorna o bloco pedido, renderizando-o se não estiver em memória."""
+        bloco = self.blocos.get(indice)
+        if bloco is None:
+            bloco = self._renderizar_bloco(indice)
+            self.blocos[indice] = bloco
+            while len(self.blocos) > self.max_blocos:
+                self.blocos.popitem(last=False)
+        else:
+            self.blocos.move_to_end(indice)
+        return bloco
+
+    def desenhar(self, tela, y_tela, scroll, altura_visivel):
+        """Copia para a tela a fatia do conteúdo visível na posição de scroll atual."""
+        if self.largura != tela.get_width():
+            self.blocos.clear()
+            self.largura = tela.get_width()
+        primeiro = max(0, int(scroll) // self.ALTURA_BLOCO)
+        ultimo = int(min(lista_menu.altura_conteudo, scroll + altura_visivel)) // self.ALTURA_BLOCO
+        for indice in range(primeiro, ultimo + 1):
+            bloco = self._obter_bloco(indice)
+            tela.blit(bloco, (0, y_tela + indice * self.ALTURA_BLOCO - scroll))
+
+class BotaoPopup:
+    """
+    Botão de um pop-up: retângulo (coordenadas da tela), texto, cor e ação.
+    Muda para a cor de hover com o mouse por cima, como os Botao da interface.
+    """
+    def __init__(self, rect, texto, acao, cor=COR_BOTAO, raio=10, cor_hover=COR_BOTAO_HOVER):
+        self.rect = pygame.Rect(rect)
+        self.texto = texto
+        self.acao = acao  # Função a executar quando o botão é clicado
+        self.cor = cor
+        self.cor_hover = cor_hover
+        self.raio = raio  # Raio dos cantos arredondados
+        self.hover = False
+
+    def desenhar(self, painel, origem):
+        """Desenha o botão no painel do pop-up, cujo canto está em `origem` na tela."""
+        rect = self.rect.move(-origem[0], -origem[1])
+        pygame.draw.rect(painel, self.cor_hover if self.hover else self.cor, rect, border_radius=self.raio)
+        texto_surf = renderizar_texto(FONTE_BOTAO, self.texto, COR_TEXTO)
+        painel.blit(texto_surf, (rect.centerx - texto_surf.get_width()//2,
+                                 rect.centery - texto_surf.get_height()//2))
+
+class Popup:
+    """
+    Pop-up modal retido. O layout (retângulos dos botões e textos) é calculado
+    em construir() quando o pop-up abre, e o painel é pré-renderizado numa
+    superfície que só volta a ser desenhada quando o estado muda (invalidar()).
+    A cena por baixo não muda enquanto o pop-up está aberto, por isso o
+    primeiro frame completo guarda-a já escurecida em `fundo`, e os frames
+    seguintes só copiam o fundo e o painel.
+    Os botões são regiões do roteador de eventos enquanto o pop-up está aberto
+    (cliques chamam a ação, o hover passa por definir_hover()).
+    """
+    TIPO = None  # Valor de popup_tipo correspondente
+    LARGURA_POPUP = 550
+    ALTURA_POPUP = 380
+    COR_TRANSPARENTE = (255, 0, 255)  # Cor-chave dos cantos arredondados do painel
+
+    def __init__(self):
+        self.botoes = {}  # Nome -> BotaoPopup
+        self.painel = None  # Superfície pré-renderizada (None = por desenhar)
+        self.fundo = None  # Cena escurecida por baixo do pop-up (None = por capturar)
+        self.reposicionar()
+
+    def reposicionar(self):
+        """Centra o pop-up na janela e refaz o layout (ao abrir e ao redimensionar)."""
+        self.rect = layout_atual().rect_popup(self.LARGURA_POPUP, self.ALTURA_POPUP)
+        self.fundo = None
+        self.construir()
+        self.painel = None
+
+    def construir(self):
+        """Calcula os botões do pop-up (definido em cada tipo de pop-up)."""
+        self.botoes = {}
+
+    def desenhar_conteudo(self, painel):
+        """Desenha os textos do pop-up no painel (definido em cada tipo de pop-up)."""
+
+    def invalidar(self, refazer_layout=False):
+        """O estado mudou: o painel tem de ser redesenhado (e o layout refeito, se pedido)."""
+        if refazer_layout:
+            self.construir()
+            invalidar_regioes_clique()
+        self.painel = None
+        marcar_regiao_suja(self.rect)
+
+    def _renderizar_painel(self):
+        """Desenha o fundo, a borda, o conteúdo e os botões numa superfície à parte."""
+        perfilador.contar("Surface")
+        painel = pygame.Surface(self.rect.size)
+        painel.fill(self.COR_TRANSPARENTE)
+        painel.set_colorkey(self.COR_TRANSPARENTE)
+        local = painel.get_rect()
+        pygame.draw.rect(painel, COR_POPUP_FUNDO, local, border_radius=15)
+        pygame.draw.rect(painel, COR_POPUP_BORDA, local, 3, border_radius=15)
+        self.desenhar_conteudo(painel)
+        for botao in self.botoes.values():
+            botao.desenhar(painel, self.rect.topleft)
+        return painel
+
+    def desenhar_painel(self, tela):
+        """Copia o painel para a tela, renderizando-o só se o estado mudou."""
+        if self.painel is None:
+            self.painel = self._renderizar_painel()
+        tela.blit(self.painel, self.rect)
+
+    def desenhar(self, tela):
+        """Escurece a cena já desenhada na tela e desenha o painel por cima."""
+        tela.blit(superficie_translucida(LARGURA, ALTURA, (0, 0, 0, 150)), (0, 0))  # 150 = transparência
+        if self.fundo is None and (clip_base is None or clip_base.contains(tela.get_rect())):
+            # Frame completo (sem recorte ou com a tela inteira suja, como ao abrir):
+            # guardar a cena escurecida para os frames seguintes
+            perfilador.contar("Surface")
+            self.fundo = tela.copy()
+        self.desenhar_painel(tela)
+
+    def centrar_texto(self, painel, superficie, y):
+        """Desenha uma superfície de texto centrada na horizontal, em y (relativo ao painel)."""
+        painel.blit(superficie, ((self.rect.width - superficie.get_width()) // 2, y))
+
+    def definir_hover(self, botao, ativo):
+        """Põe ou tira o hover de um botão do pop-up; se mudou, o painel é redesenhado."""
+        if botao.hover != ativo:
+            botao.hover = ativo
+            self.invalidar()
+
+class PopupRemover(Popup):
+    """Pop-up para escolher quantas unidades de item_para_remover retirar (quantidade_a_remover)."""
+    TIPO = "remover"
+
+    def construir(self):
+        x, y = self.rect.topleft
+        largura, altura = self.rect.size
+        
+        # Botões - e + ao lado do valor da quantidade (que muda de largura)
+        valor_qtd_surf = renderizar_texto(FONTE_CATEGORIA, f"{quantidade_a_remover}", COR_DESTAQUE)
+        valor_qtd_x = x + (largura - valor_qtd_surf.get_width()) // 2
+        btn_tamanho = 50
+        espacamento_btns = 80
+        btn_y = y + 210 + valor_qtd_surf.get_height()//2 - btn_tamanho//2
+        
+        # Botões de ação (Cancelar à esquerda, Confirmar à direita)
+        btn_altura = 50
+        btn_largura = 180
+        espacamento = 40
+        acao_y = y + altura - btn_altura - 30
+        
+        self.botoes = {
+            'menos': BotaoPopup((valor_qtd_x - espacamento_btns - btn_tamanho//2, btn_y, btn_tamanho, btn_tamanho),
+                                "-", diminuir_quantidade_remover, raio=25),
+            'mais': BotaoPopup((valor_qtd_x + espacamento_btns - btn_tamanho//2, btn_y, btn_tamanho, btn_tamanho),
+                               "+", aumentar_quantidade_remover, raio=25),
+            'cancelar': BotaoPopup((x + espacamento, acao_y, btn_largura, btn_altura), "Cancelar", cancelar_remocao),
+            'confirmar': BotaoPopup((x + largura - btn_largura - espacamento, acao_y, btn_largura, btn_altura),
+                                    "Confirmar", confirmar_remocao, cor=COR_BOTAO_HOVER),
+        }
+
+    def desenhar_conteudo(self, painel):
+        self.centrar_texto(painel, renderizar_texto(FONTE_POPUP, "Quantos itens pretende remover?",
+                                                    COR_POPUP_TEXTO), 30)
+        if item_para_remover:
+            # Nome do item e quantidade disponível no pedido
+            self.centrar_texto(painel, renderizar_texto(FONTE_POPUP_PEQUENA, f"{item_para_remover['nome']}",
+                                                        COR_POPUP_TEXTO), 80)
+            self.centrar_texto(painel, renderizar_texto(
+                FONTE_POPUP_PEQUENA, f"Quantidade no pedido: {item_para_remover['quantidade']}",
+                COR_TEXTO_SECUNDARIO), 120)
+        self.centrar_texto(painel, renderizar_texto(FONTE_POPUP_PEQUENA, "Quantidade a remover:",
+                                                    COR_POPUP_TEXTO), 180)
+        # Valor da quantidade (grande e destacado)
+        self.centrar_texto(painel, renderizar_texto(FONTE_CATEGORIA, f"{quantidade_a_remover}",
+                                                    COR_DESTAQUE), 210)
+
+class PopupPagamento(Popup):
+    """Pop-up para escolher o método de pagamento (numerário ou cartão)."""
+    TIPO = "pagamento"
+    ALTURA_POPUP = 320
+
+    def construir(self):
+        x, y = self.rect.topleft
+        largura, altura = self.rect.size
+        btn_altura = 60
+        btn_largura = 200
+        espacamento_vertical = 20
+        y_botoes = y + 100
+        
+        self.botoes = {
+            'numerario': BotaoPopup((x + (largura // 2 - btn_largura - espacamento_vertical // 2), y_botoes,
+                                     btn_largura, btn_altura), "Numerário", confirmar_pagamento_numerario),
+            'cartao': BotaoPopup((x + (largura // 2 + espacamento_vertical // 2), y_botoes,
+                                  btn_largura, btn_altura), "Cartão", confirmar_pagamento_cartao),
+            'cancelar': BotaoPopup((x + (largura - btn_largura) // 2, y + altura - btn_altura - 30,
+                                    btn_largura, btn_altura), "Cancelar", cancelar_popup_pagamento,
+                                   cor=(80, 80, 80)),
+        }
+
+    def desenhar_conteudo(self, painel):
+        self.centrar_texto(painel, renderizar_texto(FONTE_POPUP, "Escolha o método de pagamento",
+                                                    COR_POPUP_TEXTO), 30)
+
+class PopupMesas(Popup):
+    """
+    Pop-up para escolher a mesa: um botão por mesa, destacando a mesa atual e
+    as mesas com pedido aberto.
+    """
+    TIPO = "mesas"
+    COLUNAS = 10
+    LARGURA_POPUP = 760
+    TAMANHO_BOTAO = (60, 46)
+    ESPACAMENTO = 10
+
+    def __init__(self):
+        # A altura depende do número de linhas de mesas
+        linhas = -(-NUM_MESAS // self.COLUNAS)
+        self.ALTURA_POPUP = 90 + linhas * (self.TAMANHO_BOTAO[1] + self.ESPACAMENTO) + 90
+        super().__init__()
+
+    def construir(self):
+        x, y = self.rect.topleft
+        largura, altura = self.rect.size
+        btn_largura, btn_altura = self.TAMANHO_BOTAO
+        largura_grelha = self.COLUNAS * btn_largura + (self.COLUNAS - 1) * self.ESPACAMENTO
+        x_grelha = x + (largura - largura_grelha) // 2
+        
+        self.botoes = {}
+        for i in range(NUM_MESAS):
+            mesa = str(i + 1)
+            linha, coluna = divmod(i, self.COLUNAS)
+            if mesa == mesa_atual:
+                cor = COR_BOTAO_HOVER
+            elif gestor_sessoes is not None and gestor_sessoes.tem_pedido(mesa):
+                cor = COR_MESA_OCUPADA
+            else:
+                cor = COR_BOTAO
+            self.botoes[mesa] = BotaoPopup(
+                (x_grelha + coluna * (btn_largura + self.ESPACAMENTO),
+                 y + 90 + linha * (btn_altura + self.ESPACAMENTO), btn_largura, btn_altura),
+                mesa, lambda mesa=mesa: mudar_de_mesa(mesa), cor=cor)
+        self.botoes['cancelar'] = BotaoPopup((x + (largura - 180) // 2, y + altura - 70, 180, 50),
+                                             "Cancelar", fechar_popup, cor=(80, 80, 80))
+
+    def desenhar_conteudo(self, painel):
+        self.centrar_texto(painel, renderizar_texto(FONTE_POPUP, "Escolha a mesa", COR_POPUP_TEXTO), 30)
+
+class PopupCozinha(Popup):
+    """
+    Ecrã da cozinha (F2): uma coluna por estação com os itens dos talões
+    abertos agrupados ("6x Pizza Margherita") e, por baixo, os talões mais
+    antigos que cabem na coluna; clicar num talão despacha-o. Ocupa quase toda
+    a janela e é refeito quando o ecrã da cozinha muda (ver verificar_cozinha).
+    """
+    TIPO = "cozinha"
+    MARGEM = 30  # Distância (px) do pop-up às bordas da janela
+    MAX_ITENS_AGRUPADOS = 8  # Itens agrupados mostrados por estação
+    ALTURA_LINHA = 24
+    ALTURA_TALAO = 38  # Botão do talão (as linhas do talão vêm por baixo)
+
+    def reposicionar(self):
+        # O tamanho acompanha o da janela
+        self.LARGURA_POPUP = LARGURA - 2 * self.MARGEM
+        self.ALTURA_POPUP = ALTURA - 2 * self.MARGEM
+        super().reposicionar()
+
+    def construir(self):
+        x, y = self.rect.topleft
+        largura, altura = self.rect.size
+        self.versao = ecra_cozinha.versao
+        self.em_espera = len(pedidos_cozinha_por_enviar)
+        self.colunas = []  # (estação, x relativo, largura, itens, [(talão, y relativo)], talões abertos)
+        self.botoes = {'voltar': BotaoPopup((x + (largura - 180) // 2, y + altura - 70, 180, 50),
+                                            "Voltar", fechar_popup, cor=(80, 80, 80))}
+        
+        largura_coluna = (largura - 40) // len(ecra_cozinha.estacoes)
+        limite = altura - 120  # Os talões não passam do "+N talões" nem do botão de baixo
+        for c, estacao in enumerate(ecra_cozinha.estacoes):
+            x_coluna = 20 + c * largura_coluna
+            itens, taloes, abertos = ecra_cozinha.vista(estacao, limite // self.ALTURA_TALAO)
+            y_talao = 100 + min(len(itens), self.MAX_ITENS_AGRUPADOS + 1) * self.ALTURA_LINHA + 20
+            mostrados = []
+            for talao in taloes:
+                altura_talao = self.ALTURA_TALAO + len(talao.linhas) * self.ALTURA_LINHA + 10
+                if y_talao + altura_talao > limite:
+                    break
+                self.botoes[(estacao, talao.numero)] = BotaoPopup(
+                    (x + x_coluna, y + y_talao, largura_coluna - 10, self.ALTURA_TALAO),
+                    f"#{talao.numero} Mesa {talao.mesa}",
+                    lambda estacao=estacao, numero=talao.numero: despachar_talao(estacao, numero), raio=6)
+                mostrados.append((talao, y_talao))
+                y_talao += altura_talao
+            self.colunas.append((estacao, x_coluna, largura_coluna - 10, itens, mostrados, abertos))
+
+    def desenhar_conteudo(self, painel):
+        self.centrar_texto(painel, renderizar_texto(FONTE_POPUP, "COZINHA - clique num talão quando estiver pronto",
+                                                    COR_POPUP_TEXTO), 20)
+        if self.em_espera:
+            painel.blit(renderizar_texto(FONTE_POPUP_PEQUENA, f"{self.em_espera} pedidos em espera",
+                                         COR_DESTAQUE), (20, 24))
+        for estacao, x, largura, itens, mostrados, abertos in self.colunas:
+            # Cada coluna é recortada para os nomes compridos não invadirem a seguinte
+            painel.set_clip(pygame.Rect(x, 0, largura, self.rect.height))
+            titulo = f"{NOMES_ESTACOES.get(estacao, estacao)} ({abertos})"
+            painel.blit(renderizar_texto(FONTE_POPUP, titulo, COR_DESTAQUE), (x, 60))
+            y = 100
+            for quantidade, nome in itens[:self.MAX_ITENS_AGRUPADOS]:
+                painel.blit(renderizar_texto(FONTE_POPUP_PEQUENA, f"{quantidade}x {nome}", COR_TEXTO), (x, y))
+                y += self.ALTURA_LINHA
+            if len(itens) > self.MAX_ITENS_AGRUPADOS:
+                painel.blit(renderizar_texto(FONTE_POPUP_PEQUENA, "...", COR_TEXTO), (x, y))
+                y += self.ALTURA_LINHA
+            pygame.draw.line(painel, COR_TEXTO_SECUNDARIO, (x, y + 8), (x + largura, y + 8), 2)
+            
+            # Linhas de cada talão por baixo do seu botão
+            for talao, y_talao in mostrados:
+                y_linha = y_talao + self.ALTURA_TALAO + 2
+                for linha in talao.linhas:
+                    painel.blit(renderizar_texto(FONTE_POPUP_PEQUENA, f"{linha.quantidade}x {linha.nome}",
+                                                 COR_TEXTO_SECUNDARIO), (x + 8, y_linha))
+                    y_linha += self.ALTURA_LINHA
+            if not abertos:
+                painel.blit(renderizar_texto(FONTE_POPUP_PEQUENA, "Sem talões", COR_TEXTO_SECUNDARIO),
+                            (x, y + 20))
+            elif abertos > len(mostrados):
+                painel.blit(renderizar_texto(FONTE_POPUP_PEQUENA, f"+{abertos - len(mostrados)} talões",
+                                             COR_TEXTO_SECUNDARIO), (x, self.rect.height - 115))
+        painel.set_clip(None)
+
+# ================================
+# Funções do sistema
+# ================================
+
+def agrupar_itens_pedido():
+    """
+    Agrupa e ordena os itens do pedido por categoria, contando quantidades.
+    
+    Retorna uma lista de LinhaPedido (nome, preco, categoria, quantidade, indice, subtotal)
+    ordenadas por categoria (segundo a ordem do restaurante) e posição no menu.
+    A lista vem da cache do pedido e não deve ser alterada.
+    """
+    return pedido.agrupados()
+
+def definir_menu(novos_itens):
+    """
+    Substitui os itens do menu por uma nova sequência de (nome, preco, categoria),
+    ou por um Catalogo. Recalcula preços e ordem das categorias, esvazia o pedido
+    (os índices antigos deixam de ser válidos) e reconstrói os itens, o índice de
+    posições e o canvas do menu.
+    """
+    global scroll_y, item_selecionado
+    
+    if not isinstance(novos_itens, Catalogo):
+        novos_itens = Catalogo.de_itens(novos_itens)
+    aplicar_catalogo(novos_itens)
+    pedido.limpar()
+    scroll_y = 0
+    item_selecionado = None
+    criar_itens_menu()
+    marcar_tela_suja()
+
+def calcular_total_pedido():
+    """Retorna o total de preço de todos os itens no pedido, em cêntimos."""
+    return pedido.total
+
+def sair_programa():
+    """Fecha a aplicação e sai do programa."""
+    fechar_sessoes()
+    fechar_cozinha()
+    fechar_recibos()
+    fechar_diario()
+    if PERFIL_AO_ARRANCAR:
+        exportar_perfil()
+    fechar_registo_vendas()
+    fechar_cliente_pedidos()
+    if aplicacao is not None:
+        aplicacao.fechar()
+    else:
+        pygame.quit()
+    sys.exit()
+
+# ================================
+# DIÁRIO DE PEDIDOS
+# ================================
+
+diario = None  # Diário persistente do pedido (criado em main(); None = sem diário)
+
+def registar_no_diario(op, **dados):
+    """Acrescenta uma ação ao diário de pedidos, se estiver ativo (nunca bloqueia)."""
+    if diario is not None:
+        diario.registar(op, **dados)
+
+def iniciar_diario():
+    """
+    Abre o diário de pedidos e repõe o pedido e o método de pagamento guardados.
+    Se a conta já estava paga, a aplicação volta à tela da conta.
+    """
+    global diario, metodo_pagamento, estado_atual, mesa_atual
+    
+    diario = DiarioPedidos(os.path.join(PASTA_DADOS, "pedidos"))
+    estado = diario.reproduzir()
+    
+    # Os itens são guardados pelo id do catálogo (os índices mudam quando o menu muda)
+    pedido.limpar()
+    for indice, quantidade in quantidades_de_itens(estado["itens"]).items():
+        pedido.adicionar(indice, quantidade)
+    
+    # Com várias mesas, o diário é o da mesa em que o terminal estava
+    if NUM_MESAS > 1 and estado.get("mesa"):
+        mesa_atual = estado["mesa"]
+    metodo_pagamento = estado["metodo_pagamento"]
+    if metodo_pagamento and pedido:
+        estado_atual = "conta"
+    
+    diario.iniciar()
+
+def fechar_diario():
+    """Escreve os registos em falta do diário e pára a thread de escrita."""
+    global diario
+    if diario is not None:
+        diario.fechar()
+        diario = None
+
+# ================================
+# SERVIDOR DE PEDIDOS (TERMINAIS PARTILHADOS)
+# ================================
+
+cliente_pedidos = None  # Ligação ao servidor de pedidos (None = pedido só local)
+versao_mesa = 0  # Versão do estado da mesa já aplicada ao pedido
+estado_mesa_recebido = None  # (versão, estado) mais recente recebido do servidor, por aplicar
+pedidos_em_curso = []  # Futures das alterações enviadas e ainda sem resposta
+EVENTO_SERVIDOR = None  # Tipo de evento que acorda o loop quando chega uma mensagem do servidor
+aviso_servidor_pendente = False  # Já há um EVENTO_SERVIDOR na fila do PyGame
+
+def registar_acao(op, **dados):
+    """
+    Regista uma ação sobre o pedido (já aplicada localmente): no diário e,
+    se houver servidor, envia-a sem esperar pela resposta.
+    """
+    registar_no_diario(op, **dados)
+    if cliente_pedidos is not None and cliente_pedidos.ligado:
+        if "id" in dados:
+            # No protocolo "id" identifica o pedido; o item vai em "item"
+            dados["item"] = dados.pop("id")
+        pedidos_em_curso.append(cliente_pedidos.pedir(op, mesa=mesa_atual, **dados))
+
+def iniciar_cliente_pedidos():
+    """
+    Liga ao servidor de pedidos, subscreve a mesa deste terminal e repõe o
+    pedido com o estado do servidor. Sem servidor o terminal trabalha sozinho.
+    """
+    global cliente_pedidos, EVENTO_SERVIDOR
+    
+    EVENTO_SERVIDOR = pygame.event.custom_type()
+    host, _, porta = SERVIDOR_PEDIDOS.rpartition(":")
+    try:
+        cliente = ClientePedidos(host or "127.0.0.1", int(porta) if porta else PORTA_PADRAO,
+                                 ao_receber=avisar_servidor)
+        cliente.ligar()
+        resposta = cliente.pedir_e_esperar(OP_SUBSCREVER, mesa=mesa_atual)
+    except (OSError, ValueError, ErroProtocolo, concurrent.futures.TimeoutError) as erro:
+        print(f"Servidor de pedidos desligado: {erro}", file=sys.stderr)
+        return
+    cliente_pedidos = cliente
+    aplicar_estado_mesa(resposta["v"], resposta["estado"])
+
+def avisar_servidor():
+    """
+    Chamada na thread de leitura do cliente quando chega uma resposta ou uma
+    notificação (ou a ligação cai): acorda o loop principal, que pode estar a
+    dormir à espera de eventos, para as alterações dos outros terminais
+    aparecerem logo. Um aviso basta por frame.
+    """
+    global aviso_servidor_pendente
+    if not aviso_servidor_pendente:
+        aviso_servidor_pendente = True
+        try:
+            pygame.event.post(pygame.event.Event(EVENTO_SERVIDOR))
+        except pygame.error:
+            pass  # Fila de eventos cheia: o loop acorda na mesma
+
+def verificar_servidor():
+    """
+    Chamado em cada iteração do loop principal: junta as respostas e as
+    notificações do servidor e aplica o estado mais recente da mesa quando já
+    não há alterações deste terminal a caminho (até lá o pedido local, que já
+    as inclui, é o mais atual). Com um pop-up aberto o estado fica pendente.
+    """
+    global cliente_pedidos, estado_mesa_recebido, aviso_servidor_pendente
+    
+    if cliente_pedidos is None:
+        return
+    
+    aviso_servidor_pendente = False
+    recebidos = cliente_pedidos.obter_notificacoes()
+    while pedidos_em_curso and pedidos_em_curso[0].done():
+        futuro = pedidos_em_curso.pop(0)
+        if futuro.exception() is None and futuro.result().get("ok"):
+            recebidos.append(futuro.result())
+    for mensagem in recebidos:
+        if mensagem.get("mesa") == mesa_atual and (estado_mesa_recebido is None
+                                             or mensagem["v"] > estado_mesa_recebido[0]):
+            estado_mesa_recebido = (mensagem["v"], mensagem["estado"])
+    
+    if not cliente_pedidos.ligado:
+        # O pedido continua neste terminal; as alterações seguintes ficam só locais
+        print(f"Ligação ao servidor de pedidos perdida: {cliente_pedidos.erro}", file=sys.stderr)
+        cliente_pedidos.fechar()
+        cliente_pedidos = None
+        pedidos_em_curso.clear()
+        return
+    
+    if estado_mesa_recebido is not None and not pedidos_em_curso and not popup_visivel:
+        versao, estado = estado_mesa_recebido
+        estado_mesa_recebido = None
+        if versao > versao_mesa:
+            aplicar_estado_mesa(versao, estado)
+
+def aplicar_estado_mesa(versao, estado):
+    """
+    Repõe o pedido e o método de pagamento com o estado da mesa recebido do
+    servidor (alterado noutro terminal) e atualiza a vista atual.
+    """
+    global versao_mesa, metodo_pagamento, estado_atual, item_pedido_selecionado, scroll_conta_y
+    
+    versao_mesa = versao
+    quantidades = quantidades_de_itens(estado["itens"])
+    if quantidades == pedido.quantidades and estado["metodo_pagamento"] == metodo_pagamento:
+        return
+    
+    pedido.limpar()
+    for indice, quantidade in quantidades.items():
+        pedido.adicionar(indice, quantidade)
+    metodo_pagamento = estado["metodo_pagamento"]
+    
+    if metodo_pagamento and pedido and estado_atual != "conta":
+        # A conta foi paga noutro terminal
+        estado_atual = "conta"
+        scroll_conta_y = 0
+        criar_botoes()
+        criar_conta_scrollbar()
+    elif not metodo_pagamento and estado_atual == "conta":
+        # Foi começado um pedido novo noutro terminal
+        mudar_para_menu()
+    elif estado_atual == "pedido":
+        item_pedido_selecionado = None
+        criar_itens_pedido()
+    elif estado_atual == "conta":
+        criar_conta_scrollbar()
+    marcar_tela_suja()
+
+def fechar_cliente_pedidos():
+    """Fecha a ligação ao servidor de pedidos."""
+    global cliente_pedidos
+    if cliente_pedidos is not None:
+        cliente_pedidos.fechar()
+        cliente_pedidos = None
+
+# ================================
+# SESSÕES DAS MESAS
+# ================================
+
+gestor_sessoes = None  # Pedidos abertos de cada mesa (criado em main() se NUM_MESAS > 1)
+sessao_atual = None  # Sessão da mesa atual (os globais do pedido e da vista são os dela)
+
+def iniciar_sessoes():
+    """
+    Cria o gestor de sessões e carrega a sessão da mesa atual. O pedido
+    reposto pelo diário (mais recente do que o ficheiro da sessão) é o desta mesa.
+    """
+    global gestor_sessoes
+    
+    gestor_sessoes = GestorSessoes(os.path.join(PASTA_DADOS, "sessoes"), Pedido, itens_do_pedido,
+                                   pedido_de_itens)
+    gestor_sessoes.iniciar()
+    sessao = gestor_sessoes.obter(mesa_atual)
+    if diario is not None:
+        sessao.pedido = pedido
+        sessao.metodo_pagamento = metodo_pagamento
+        sessao.vista = estado_atual
+    carregar_sessao(sessao)
+
+def guardar_sessao_atual():
+    """Copia o pedido e o estado da vista para a sessão atual e grava-a."""
+    if sessao_atual is None:
+        return
+    sessao_atual.pedido = pedido
+    sessao_atual.metodo_pagamento = metodo_pagamento
+    sessao_atual.vista = estado_atual
+    sessao_atual.scroll.update(menu=scroll_y, pedido=scroll_pedido_y, conta=scroll_conta_y)
+    sessao_atual.item_selecionado = item_selecionado
+    sessao_atual.item_pedido_selecionado = item_pedido_selecionado
+    gestor_sessoes.guardar(sessao_atual)
+
+def carregar_sessao(sessao):
+    """Torna a sessão a atual: o pedido e o estado da vista passam a ser os dela."""
+    global sessao_atual, pedido, metodo_pagamento, estado_atual, scroll_y, scroll_pedido_y, scroll_conta_y
+    global item_selecionado, item_pedido_selecionado
+    
+    sessao_atual = sessao
+    pedido = sessao.pedido
+    metodo_pagamento = sessao.metodo_pagamento
+    estado_atual = sessao.vista
+    scroll_y = sessao.scroll["menu"]
+    scroll_pedido_y = sessao.scroll["pedido"]
+    scroll_conta_y = sessao.scroll["conta"]
+    item_selecionado = sessao.item_selecionado
+    item_pedido_selecionado = sessao.item_pedido_selecionado
+
+def repor_scroll(lista, posicao):
+    """Põe a lista na posição de scroll guardada (limitada ao conteúdo atual) e retorna-a."""
+    lista.scrollbar.scroll_y = max(0, min(posicao, lista.scrollbar.scroll_max))
+    return lista.scrollbar.scroll_y
+
+def mudar_de_mesa(mesa):
+    """
+    Passa o terminal para o pedido de outra mesa. A troca só muda a sessão
+    ativa (os totais de cada pedido já estão calculados); só as listas da
+    vista mostrada são refeitas. Com servidor, passa a subscrever a mesa nova.
+    """
+    global mesa_atual, scroll_y, scroll_pedido_y, scroll_conta_y, versao_mesa, estado_mesa_recebido
+    
+    fechar_popup()
+    if gestor_sessoes is None or mesa == mesa_atual:
+        return
+    
+    guardar_sessao_atual()
+    mesa_anterior = mesa_atual
+    mesa_atual = mesa
+    for item_obj in itens_menu_obj:
+        item_obj.selecionado = False
+    carregar_sessao(gestor_sessoes.obter(mesa))
+    gestor_sessoes.despejar(mesa)
+    # No diário, o pedido passa a ser o desta mesa
+    registar_no_diario(OP_MESA, mesa=mesa, itens=itens_do_pedido(pedido), metodo=metodo_pagamento)
+    
+    if cliente_pedidos is not None and cliente_pedidos.ligado:
+        # O estado da mesa no servidor é aplicado quando chegar a resposta
+        cliente_pedidos.pedir(OP_CANCELAR, mesa=mesa_anterior)
+        versao_mesa = -1
+        estado_mesa_recebido = None
+        pedidos_em_curso.append(cliente_pedidos.pedir(OP_SUBSCREVER, mesa=mesa))
+    
+    criar_botoes()
+    scroll_y = repor_scroll(lista_menu, scroll_y)
+    if estado_atual == "pedido":
+        criar_itens_pedido()
+        scroll_pedido_y = repor_scroll(lista_pedido, scroll_pedido_y)
+    elif estado_atual == "conta":
+        criar_conta_scrollbar()
+        scroll_conta_y = repor_scroll(lista_conta, scroll_conta_y)
+    marcar_tela_suja()
+
+def mesa_vizinha(passo):
+    """Nome da mesa anterior (passo -1) ou seguinte (passo 1), em círculo de 1 a NUM_MESAS."""
+    numero = int(mesa_atual) if mesa_atual.isdigit() else 1
+    return str((numero - 1 + passo) % NUM_MESAS + 1)
+
+def abrir_popup_mesas():
+    """Abre o pop-up para escolher a mesa."""
+    abrir_popup(PopupMesas())
+
+def fechar_sessoes():
+    """Grava as sessões em memória e pára a thread de escrita."""
+    global gestor_sessoes
+    if gestor_sessoes is not None:
+        guardar_sessao_atual()
+        gestor_sessoes.fechar()
+        gestor_sessoes = None
+
+# ================================
+# RECARREGAMENTO DO CATÁLOGO
+# ================================
+
+vigia_catalogo = None  # Vigia do ficheiro do catálogo (criado em main(); None = desligado)
+catalogo_pendente = None  # Catálogo novo à espera de ser aplicado
+
+def verificar_catalogo():
+    """
+    Chamado em cada iteração do loop principal: se o ficheiro do catálogo mudou,
+    carrega-o e aplica-o. Durante a conta ou com um pop-up aberto a alteração
+    fica pendente, para não mudar uma conta já paga nem o item do pop-up.
+    Um ficheiro inválido (ex.: ainda a ser gravado) é ignorado até voltar a mudar.
+    """
+    global catalogo_pendente
+    
+    if vigia_catalogo is not None and vigia_catalogo.alterado():
+        try:
+            catalogo_pendente = carregar_catalogo(FICHEIRO_CATALOGO)
+        except (OSError, ErroCatalogo) as erro:
+            print(f"Catálogo não recarregado: {erro}", file=sys.stderr)
+    
+    if catalogo_pendente is not None and estado_atual != "conta" and not popup_visivel:
+        novo_catalogo = catalogo_pendente
+        catalogo_pendente = None
+        recarregar_catalogo(novo_catalogo)
+
+def recarregar_catalogo(novo_catalogo):
+    """
+    Aplica um catálogo novo sem perder o pedido em curso: as quantidades são
+    passadas para os novos índices pelo id de cada item (itens que saíram do
+    catálogo são retirados) e ficam com os preços novos.
+    Se a disposição do menu não mudou (mesmos itens nas mesmas categorias),
+    só os itens alterados são atualizados e só os blocos do canvas onde estão
+    são redesenhados; caso contrário o menu é reconstruído mantendo o scroll.
+    """
+    global item_selecionado, item_pedido_selecionado, scroll_y
+    
+    itens_antigos = menu
+    ids_antigos = ids_menu
+    quantidades = {ids_antigos[i]: q for i, q in pedido.quantidades.items()}
+    id_selecionado = ids_antigos[item_selecionado] if item_selecionado is not None else None
+    
+    aplicar_catalogo(novo_catalogo)
+    indices_por_id = {id_item: i for i, id_item in enumerate(ids_menu)}
+    if gestor_sessoes is not None:
+        # Os pedidos das outras mesas usam os índices antigos: são lidos de novo do disco
+        gestor_sessoes.descartar_inativas(mesa_atual)
+    
+    # Passar o pedido para os novos índices (e preços)
+    pedido.limpar()
+    for id_item, quantidade in quantidades.items():
+        indice = indices_por_id.get(id_item)
+        if indice is not None:
+            pedido.adicionar(indice, quantidade)
+    item_selecionado = indices_por_id.get(id_selecionado)
+    
+    mesma_disposicao = (len(itens_antigos) == len(menu)
+                        and all(antigo[2] == novo[2] for antigo, novo in zip(itens_antigos, menu)))
+    if mesma_disposicao and len(itens_menu_obj) == len(menu):
+        # Só nomes/preços mudaram: atualizar esses itens e os blocos onde aparecem
+        for i, (antigo, novo) in enumerate(zip(itens_antigos, menu)):
+            item_obj = itens_menu_obj[i]
+            item_obj.selecionado = False
+            if antigo != novo:
+                item_obj.nome, item_obj.preco = novo[0], novo[1]
+                y = lista_menu.posicoes[lista_menu.linhas_itens[i]]
+                canvas_menu.invalidar_intervalo(y - 5, y + 40)
+    else:
+        scroll_anterior = scroll_y
+        criar_itens_menu()
+        scroll_y = lista_menu.scrollbar.scroll_y = min(scroll_anterior, lista_menu.scrollbar.scroll_max)
+    
+    if estado_atual == "pedido":
+        item_pedido_selecionado = None
+        criar_itens_pedido()
+    marcar_tela_suja()
+
+# ================================
+# REGISTO DE VENDAS
+# ================================
+
+registo_vendas = None  # Base de dados das contas pagas (criada em main(); None = desligado)
+
+def iniciar_registo_vendas():
+    """Abre a base de dados de vendas (falhas ao abrir desligam o registo)."""
+    global registo_vendas
+    try:
+        registo_vendas = RegistoVendas(os.path.join(PASTA_DADOS, "vendas.db"))
+    except (OSError, sqlite3.Error) as erro:
+        print(f"Registo de vendas desligado: {erro}", file=sys.stderr)
+        registo_vendas = None
+
+def guardar_conta_paga():
+    """
+    Guarda a conta atual (linhas, total e método de pagamento) no registo de
+    vendas. Como nos talões da cozinha, cada linha leva o id do item e o nome
+    e a categoria no idioma base do catálogo, e não os do idioma do menu.
+    """
+    if registo_vendas is not None and pedido:
+        linhas = [(ids_menu[linha.indice], catalogo.nomes[linha.indice],
+                   catalogo.categorias[catalogo.indice_categoria[linha.indice]],
+                   linha.quantidade, linha.subtotal)
+                  for linha in agrupar_itens_pedido()]
+        registo_vendas.registar_conta(linhas, calcular_total_pedido(), metodo_pagamento)
+
+def fechar_registo_vendas():
+    """Grava as contas em espera e fecha a base de dados de vendas."""
+    global registo_vendas
+    if registo_vendas is not None:
+        registo_vendas.fechar()
+        registo_vendas = None
+
 # ================================
-# Funções do sistema
+# RECIBOS
 # ================================
 
-def agrupar_itens_pedido():
+impressora_recibos = None  # Gerador de recibos em segundo plano (criado em main(); None = desligado)
+
+def iniciar_recibos():
+    """Arranca a thread que gera e grava os recibos."""
+    global impressora_recibos
+    impressora_recibos = ImpressoraRecibos(os.path.join(PASTA_DADOS, "recibos"), IMPRESSORA_RECIBOS)
+
+def imprimir_recibo():
     """
-    Agrupa e ordena os itens do pedido por categoria, contando quantidades.
-    
-    Retorna uma lista de tuplas: (nome, preco, categoria, quantidade)
-    ordenadas por categoria (segundo a ordem do restaurante) e posição no menu.
+    Pede o recibo da conta atual (linhas agrupadas, total e IVA já calculados
+    pelo pedido). Só copia os valores; o recibo é gerado na thread da impressora.
     """
-    if not pedido:
-        return []
-
-    # Contar quantidades de cada item único
-    contagem = {}
-    for nome, preco, categoria in pedido:
-        chave = (nome, preco, categoria)
-        contagem[chave] = contagem.get(chave, 0) + 1
-
-    # Definir ordem das categorias
-    ordem_categorias = [
-        "Entradas",
-        "Especialidades do Chef",
-        "Pastas",
-        "Pizza",
-        "Bebidas",
-        "Sobremesas",
-    ]
-
-    # Criar índice de posição dos itens no menu original
-    indice_menu = {}
-    for idx, (nome, preco, categoria) in enumerate(menu):
-        indice_menu[(nome, preco, categoria)] = idx
-
-    # Preparar lista com índices de ordenação
-    itens_ordenados = []
-    for (nome, preco, categoria), quantidade in contagem.items():
-        idx_cat = ordem_categorias.index(categoria) if categoria in ordem_categorias else 999
-        idx_menu = indice_menu.get((nome, preco, categoria), 999)
-        itens_ordenados.append((idx_cat, idx_menu, nome, preco, categoria, quantidade))
-
-    # Ordenar por categoria e depois por posição no menu
-    itens_ordenados.sort()
-    return [(nome, preco, categoria, quantidade) for _, _, nome, preco, categoria, quantidade in itens_ordenados]
+    if impressora_recibos is None or not pedido:
+        return
+    linhas = [LinhaRecibo(linha.nome, linha.quantidade, precos_centimos[linha.indice], linha.subtotal)
+              for linha in agrupar_itens_pedido()]
+    impressora_recibos.imprimir(Conta(NOME_RESTAURANTE, mesa_atual, time.time(), linhas,
+                                      calcular_total_pedido(), pedido.discriminacao_iva(), metodo_pagamento))
+
+def fechar_recibos():
+    """Grava os recibos em espera e pára a thread da impressora."""
+    global impressora_recibos
+    if impressora_recibos is not None:
+        impressora_recibos.fechar()
+        impressora_recibos = None
 
-def calcular_total_pedido():
-    """Calcula e retorna o total de preço de todos os itens no pedido."""
-    return sum(preco for _, preco, _ in pedido)
+# ================================
+# COZINHA (TALÕES DAS ESTAÇÕES)
+# ================================
 
-def sair_programa():
-    """Fecha a aplicação e sai do programa."""
-    pygame.quit()
-    sys.exit()
+cozinha = None  # Cadeia dos talões da cozinha (criada em main(); None = desligada)
+ecra_cozinha = None  # Talões abertos de cada estação, mostrados pelo PopupCozinha
+pedidos_cozinha_por_enviar = deque()  # (mesa, linhas, hora) recusados com a cozinha cheia, por ordem
+pedidos_cozinha_perdidos = 0  # Pedidos não enviados por a espera estar cheia (mostrado no rodapé)
+EVENTO_COZINHA = None  # Tipo de evento que acorda o loop quando o ecrã da cozinha muda
+aviso_cozinha_pendente = False  # Já há um EVENTO_COZINHA na fila do PyGame
+
+def iniciar_cozinha():
+    """Cria o ecrã da cozinha e arranca a cadeia de talões."""
+    global cozinha, ecra_cozinha, EVENTO_COZINHA
+    EVENTO_COZINHA = pygame.event.custom_type()
+    ecra_cozinha = EcraCozinha(ao_mudar=avisar_cozinha)
+    cozinha = CozinhaPedidos(ecra_cozinha)
+    cozinha.iniciar()
+
+def avisar_cozinha():
+    """
+    Chamada nas threads da cozinha quando o ecrã muda: com o ecrã da cozinha
+    aberto, acorda o loop principal (que pode estar a dormir à espera de
+    eventos) para os talões aparecerem logo. Com pedidos à espera de espaço
+    também acorda o loop, para os enviar logo que uma estação liberta talões.
+    Um aviso basta por frame.
+    """
+    global aviso_cozinha_pendente
+    if ((isinstance(popup_atual, PopupCozinha) or pedidos_cozinha_por_enviar)
+            and not aviso_cozinha_pendente):
+        aviso_cozinha_pendente = True
+        try:
+            pygame.event.post(pygame.event.Event(EVENTO_COZINHA))
+        except pygame.error:
+            pass  # Fila de eventos cheia: o loop acorda na mesma
+
+def linhas_cozinha():
+    """
+    Linhas do pedido atual para os talões: (id do item, nome, categoria,
+    quantidade), com o nome e a categoria no idioma base do catálogo (a
+    categoria decide a estação).
+    """
+    return [(ids_menu[linha.indice], catalogo.nomes[linha.indice],
+             catalogo.categorias[catalogo.indice_categoria[linha.indice]], linha.quantidade)
+            for linha in pedido.agrupados()]
+
+def enviar_para_cozinha():
+    """
+    Envia o pedido pago para a cozinha (sem esperar). Se a cozinha está
+    cheia o pedido fica em espera, até MAX_PEDIDOS_COZINHA_EM_ESPERA; acima
+    disso não é enviado e é contado em pedidos_cozinha_perdidos. As duas
+    situações aparecem no rodapé.
+    """
+    global pedidos_cozinha_perdidos
+    if cozinha is None or not pedido:
+        return
+    if len(pedidos_cozinha_por_enviar) >= MAX_PEDIDOS_COZINHA_EM_ESPERA:
+        pedidos_cozinha_perdidos += 1
+        print(f"Cozinha cheia: pedido da mesa {mesa_atual} não enviado", file=sys.stderr)
+        marcar_regiao_suja(area_rodape())
+        return
+    pedidos_cozinha_por_enviar.append((mesa_atual, linhas_cozinha(), time.time()))
+    enviar_pendentes_cozinha()
+    if pedidos_cozinha_por_enviar:
+        marcar_regiao_suja(area_rodape())
+
+def enviar_pendentes_cozinha():
+    """Envia, por ordem, os pedidos em espera até a cozinha recusar um."""
+    antes = len(pedidos_cozinha_por_enviar)
+    while pedidos_cozinha_por_enviar:
+        mesa, linhas, momento = pedidos_cozinha_por_enviar[0]
+        if cozinha.enviar(mesa, linhas, momento) is None:
+            break
+        pedidos_cozinha_por_enviar.popleft()
+    if len(pedidos_cozinha_por_enviar) != antes:
+        marcar_regiao_suja(area_rodape())  # O aviso da cozinha cheia mudou
+
+def aviso_cozinha():
+    """Texto do aviso da cozinha cheia para o rodapé (None se não há pedidos em espera nem perdidos)."""
+    em_espera = len(pedidos_cozinha_por_enviar)
+    if not em_espera and not pedidos_cozinha_perdidos:
+        return None
+    texto = f"Cozinha cheia: {em_espera} pedidos em espera"
+    if pedidos_cozinha_perdidos:
+        texto += f", {pedidos_cozinha_perdidos} não enviados"
+    return texto + " (F2 para despachar talões)"
+
+def verificar_cozinha():
+    """
+    Chamado em cada iteração do loop principal: envia os pedidos em espera e,
+    com o ecrã da cozinha aberto, refá-lo se chegaram ou saíram talões.
+    """
+    global aviso_cozinha_pendente
+    if cozinha is None:
+        return
+    enviar_pendentes_cozinha()
+    aviso_cozinha_pendente = False
+    if isinstance(popup_atual, PopupCozinha) and (popup_atual.versao != ecra_cozinha.versao
+                                                  or popup_atual.em_espera != len(pedidos_cozinha_por_enviar)):
+        popup_atual.invalidar(refazer_layout=True)
+
+def alternar_ecra_cozinha():
+    """Abre ou fecha o ecrã da cozinha (F2)."""
+    if cozinha is None:
+        return
+    if isinstance(popup_atual, PopupCozinha):
+        fechar_popup()
+    else:
+        abrir_popup(PopupCozinha())
+
+def despachar_talao(estacao, numero):
+    """Clique num talão do ecrã da cozinha: o talão está pronto e sai do ecrã."""
+    ecra_cozinha.despachar(estacao, numero)
+
+def fechar_cozinha():
+    """
+    Envia os pedidos em espera que ainda cabem, entrega os talões que estão
+    nas filas e pára as threads da cozinha. Os pedidos que ficaram por
+    enviar são indicados na saída de erro.
+    """
+    global cozinha
+    if cozinha is not None:
+        enviar_pendentes_cozinha()
+        if pedidos_cozinha_por_enviar or pedidos_cozinha_perdidos:
+            print(f"Cozinha cheia ao sair: {len(pedidos_cozinha_por_enviar)} pedidos por enviar, "
+                  f"{pedidos_cozinha_perdidos} não enviados", file=sys.stderr)
+        cozinha.fechar()
+        cozinha = None
 
 # ================================
 # INICIALIZAÇÃO E GESTÃO DE ESTADO
@@ -342,10 +2357,14 @@ def sair_programa():
 # Listas globais para guardar objetos da interface
 botoes = []  # Lista de botões da interface
 itens_menu_obj = []  # Lista de objetos ItemMenu
-scrollbar = None  # Scrollbar do menu
-scrollbar_pedido = None  # Scrollbar do pedido
-scrollbar_conta = None  # Scrollbar da conta
 itens_pedido_obj = []  # Lista de dicionários dos itens do pedido
+canvas_menu = CanvasMenu()  # Corpo do menu pré-renderizado
+
+# Listas virtuais de cada vista (linhas, índice de posições e scrollbar),
+# recriadas quando o conteúdo ou o tamanho da janela mudam
+lista_menu = None
+lista_pedido = None
+lista_conta = None
 
 def criar_botoes():
     """
@@ -355,120 +2374,150 @@ def criar_botoes():
     global botoes
     
     botoes.clear()
-    # Calcular dimensões responsivas dos botões
-    botao_largura = min(200, LARGURA // 6 - 20)
-    espacamento = (LARGURA - (4 * botao_largura)) // 5
+    invalidar_regioes_clique()
+    # Retângulos dos botões calculados uma vez por resolução
+    geometria = layout_atual()
     
     if estado_atual == "menu":
         # Botões do menu principal: Ver Pedido, Adicionar, Finalizar, Sair
-        botoes.append(Botao(espacamento, ALTURA - 100, botao_largura, 60, "Ver Pedido", mudar_para_pedido))
-        botoes.append(Botao(espacamento * 2 + botao_largura, ALTURA - 100, botao_largura, 60, "Adicionar", adicionar_item_ui))
-        botoes.append(Botao(espacamento * 3 + botao_largura * 2, ALTURA - 100, botao_largura, 60, "Finalizar", finalizar_pedido_ui))
-        botoes.append(Botao(espacamento * 4 + botao_largura * 3, ALTURA - 100, botao_largura, 60, "Sair", sair_programa))
+        acoes = (("Ver Pedido", mudar_para_pedido), ("Adicionar", adicionar_item_ui),
+                 ("Finalizar", finalizar_pedido_ui), ("Sair", sair_programa))
+        retangulos = geometria.botoes_acao
         
     elif estado_atual == "pedido":
         # Botões da tela do pedido: Voltar, Remover, Limpar, Finalizar
-        botoes.append(Botao(espacamento, ALTURA - 100, botao_largura, 60, "Voltar", mudar_para_menu))
-        botoes.append(Botao(espacamento * 2 + botao_largura, ALTURA - 100, botao_largura, 60, "Remover", iniciar_remocao))
-        botoes.append(Botao(espacamento * 3 + botao_largura * 2, ALTURA - 100, botao_largura, 60, "Limpar", limpar_pedido))
-        botoes.append(Botao(espacamento * 4 + botao_largura * 3, ALTURA - 100, botao_largura, 60, "Finalizar", finalizar_pedido_ui))
+        acoes = (("Voltar", mudar_para_menu), ("Remover", iniciar_remocao),
+                 ("Limpar", limpar_pedido), ("Finalizar", finalizar_pedido_ui))
+        retangulos = geometria.botoes_acao
     
     elif estado_atual == "conta":
         # Botões da tela da conta: Novo Pedido, Sair
-        botao_largura_pequeno = min(180, LARGURA // 4 - 20)
-        espacamento_conta = (LARGURA - (2 * botao_largura_pequeno)) // 3
-        botoes.append(Botao(espacamento_conta, ALTURA - 100, botao_largura_pequeno, 60, "Novo Pedido", novo_pedido))
-        botoes.append(Botao(espacamento_conta * 2 + botao_largura_pequeno, ALTURA - 100, botao_largura_pequeno, 60, "Sair", sair_programa))
+        acoes = (("Novo Pedido", novo_pedido), ("Sair", sair_programa))
+        retangulos = geometria.botoes_conta
+    
+    else:
+        return
+    
+    for rect, (texto, acao) in zip(retangulos, acoes):
+        botoes.append(Botao(rect.x, rect.y, rect.width, rect.height, texto, acao))
+
+def criar_lista_conteudo(linhas, espaco_final=0):
+    """Cria uma lista virtual na área de conteúdo, com a scrollbar à direita."""
+    geometria = layout_atual()
+    return ListaVirtual(geometria.area_conteudo, geometria.barra, linhas, espaco_final)
 
 def criar_itens_menu():
-    """Cria objetos ItemMenu a partir dos dados"""
-    global itens_menu_obj, scrollbar
+    """Cria objetos ItemMenu a partir dos dados e a lista do menu"""
+    global itens_menu_obj, lista_menu
     
     itens_menu_obj.clear()
     for i, (nome, preco, categoria) in enumerate(menu):
         itens_menu_obj.append(ItemMenu(nome, preco, categoria, i))
+    canvas_menu.invalidar()
     
-    altura_conteudo = calcular_altura_conteudo_menu()
-    scrollbar = Scrollbar(LARGURA - 40, 120, ALTURA - 220, altura_conteudo)
+    lista_menu = criar_lista_conteudo(linhas_menu())
 
 def criar_itens_pedido():
-    """Cria objetos para os itens do pedido (para seleção)"""
-    global itens_pedido_obj, scrollbar_pedido
+    """Cria objetos para os itens do pedido (para seleção) e a lista do pedido"""
+    global itens_pedido_obj, lista_pedido
     
     itens_pedido_obj.clear()
     itens_agrupados = agrupar_itens_pedido()
     
-    for i, (nome, preco, categoria, quantidade) in enumerate(itens_agrupados):
+    for i, linha in enumerate(itens_agrupados):
         item_obj = {
-            'nome': nome,
-            'preco': preco,
-            'categoria': categoria,
-            'quantidade': quantidade,
+            'nome': linha.nome,
+            'preco': linha.preco,
+            'categoria': linha.categoria,
+            'quantidade': linha.quantidade,
+            'subtotal': linha.subtotal,
+            'indice_menu': linha.indice,
             'index': i,
-            'selecionado': False,
-            'rect': None
+            'selecionado': False
         }
         itens_pedido_obj.append(item_obj)
     
-    # Calcular altura do conteúdo do pedido para a scrollbar (INCLUINDO O TOTAL)
-    altura_conteudo = calcular_altura_conteudo_pedido()
-    scrollbar_pedido = Scrollbar(LARGURA - 40, 120, ALTURA - 220, altura_conteudo)
+    # Espaço extra no fim para o total não ficar coberto pelos botões
+    espaco_botao = 140
+    lista_pedido = criar_lista_conteudo(linhas_pedido(), espaco_botao if pedido else 0)
 
 def criar_conta_scrollbar():
-    """Cria a scrollbar para a tela da conta"""
-    global scrollbar_conta
+    """Cria a lista (e a scrollbar) da tela da conta"""
+    global lista_conta
     
-    altura_conteudo = calcular_altura_conteudo_conta()
-    scrollbar_conta = Scrollbar(LARGURA - 40, 120, ALTURA - 220, altura_conteudo)
+    lista_conta = criar_lista_conteudo(linhas_conta())
 
-def calcular_altura_conteudo_menu():
-    """Calcula a altura total do conteúdo do menu"""
-    altura = 0
+def linhas_menu():
+    """
+    Retorna as linhas da lista do menu: o cabeçalho de cada categoria (50 px)
+    seguido dos seus itens (45 px cada, identificados pelo índice no menu).
+    """
+    linhas = []
     categoria_atual = None
     
-    for nome, preco, categoria in menu:
+    for i, (nome, preco, categoria) in enumerate(menu):
         if categoria != categoria_atual:
             categoria_atual = categoria
-            altura += 50
-        altura += 45
-    
-    return altura
+            linhas.append(("categoria", categoria, 50))
+        linhas.append(("item", i, 45))
+    return linhas
 
-def calcular_altura_conteudo_pedido():
-    """Calcula a altura total do conteúdo do pedido (INCLUINDO TOTAL)"""
+def item_menu_na_posicao(pos):
+    """
+    Retorna o índice do item do menu sob a posição do mouse (ou None),
+    por pesquisa binária na lista do menu.
+    """
+    esquerda, direita = layout_atual().colunas_menu
+    if not esquerda <= pos[0] < direita:
+        return None
+    return lista_menu.item_na_posicao(pos)
+
+def item_pedido_na_posicao(pos):
+    """Retorna o índice do item do pedido sob a posição do mouse (ou None)."""
+    esquerda, direita = layout_atual().colunas_pedido
+    if not esquerda <= pos[0] < direita:
+        return None
+    return lista_pedido.item_na_posicao(pos)
+
+def linhas_pedido():
+    """
+    Retorna as linhas da lista do pedido: título, cabeçalhos de categoria,
+    itens (identificados pelo índice em itens_pedido_obj) e o total no fim.
+    """
+    linhas = [("titulo", None, 60)]  # Título "SEU PEDIDO"
     if not pedido:
-        return 100  # Altura mínima para mensagem "pedido vazio"
+        linhas.append(("vazio", None, 40))  # Mensagem "pedido vazio"
+        return linhas
     
-    altura = 60  # Altura do título "SEU PEDIDO"
     categoria_atual = None
-    
-    for nome, preco, categoria, quantidade in agrupar_itens_pedido():
-        if categoria != categoria_atual:
-            categoria_atual = categoria
-            altura += 50  # Espaço para categoria
-        altura += 45  # Espaço para item
-    # Adicionar espaço para linha separadora, total e espaço extra para evitar
-    # que o total fique coberto pelos botões na parte inferior da tela.
-    # 80 = 20 (espaço) + 30 (linha) + 30 (total); + espaco_botao para garantir visualização
-    espaco_botao = 140  # espaço reservado para rodapé/botões
-    altura += 80 + espaco_botao
-
-    return altura
-
-def calcular_altura_conteudo_conta():
-    """Calcula a altura total do conteúdo da conta"""
+    for i, item_obj in enumerate(itens_pedido_obj):
+        if item_obj['categoria'] != categoria_atual:
+            categoria_atual = item_obj['categoria']
+            linhas.append(("categoria", categoria_atual, 50))
+        linhas.append(("item", i, 45))
+    # 80 = 20 (espaço) + 30 (linha) + 30 (total)
+    linhas.append(("total", None, 80))
+    return linhas
+
+def linhas_conta():
+    """
+    Retorna as linhas da lista da conta: título, um item por linha do pedido
+    e, no fim, a linha separadora, o total, o IVA, o método de pagamento e a
+    mensagem de agradecimento.
+    """
+    linhas = [("titulo", None, 80)]  # Título "CONTA FINAL"
     if not pedido:
-        return 100  # Altura mínima
-    
-    altura = 80  # Altura do título "CONTA FINAL"
-    
-    for nome, preco, categoria, quantidade in agrupar_itens_pedido():
-        altura += 45  # Espaço para cada item
-    
-    # Adicionar espaço para linha separadora, total e mensagem
-    altura += 140
-    
-    return altura
+        return linhas
+    
+    for linha in agrupar_itens_pedido():
+        linhas.append(("item", linha, 45))
+    linhas.append(("separador", None, 80))
+    linhas.append(("total", None, 60))
+    linhas.append(("iva", None, 40))
+    if metodo_pagamento:
+        linhas.append(("metodo", None, 50))
+    linhas.append(("obrigado", None, 40))
+    return linhas
 
 # ================================
 # AÇÕES DOS BOTÕES E NAVEGAÇÃO
@@ -484,6 +2533,7 @@ def mudar_para_pedido():
     item_pedido_selecionado = None
     criar_botoes()
     criar_itens_pedido()
+    marcar_tela_suja()
 
 def mudar_para_menu():
     """Muda o estado da aplicação de volta para o menu."""
@@ -493,29 +2543,34 @@ def mudar_para_menu():
     item_pedido_selecionado = None
     scroll_y = 0
     criar_botoes()
+    marcar_tela_suja()
 
 def novo_pedido():
     """
     Limpa o pedido atual e volta ao menu, permitindo iniciar um novo pedido.
     Chamado após o cliente finalizar e ver a conta.
     """
-    global estado_atual, pedido, item_selecionado, scroll_y, scroll_conta_y, metodo_pagamento
+    global estado_atual, item_selecionado, scroll_y, scroll_conta_y, metodo_pagamento
     estado_atual = "menu"
-    pedido.clear()
+    pedido.limpar()
+    registar_acao(OP_NOVO)
     item_selecionado = None
     scroll_y = 0
     scroll_conta_y = 0
     metodo_pagamento = None  # Resetar método de pagamento para próximo pedido
     criar_botoes()
+    marcar_tela_suja()
 
 def adicionar_item_ui():
     """Adiciona o item do menu selecionado ao pedido."""
     if item_selecionado is not None:
-        item = menu[item_selecionado]
-        pedido.append(item)
+        pedido.adicionar(item_selecionado)
+        registar_acao(OP_ADICIONAR, id=ids_menu[item_selecionado], i=item_selecionado, q=1)
         # Resetar seleção visual no menu após adicionar
         for item_obj in itens_menu_obj:
             item_obj.selecionado = False
+        # Só o contador de itens no rodapé muda
+        marcar_regiao_suja(area_rodape())
 
 def iniciar_remocao():
     """
@@ -523,7 +2578,7 @@ def iniciar_remocao():
     Se o item tem apenas 1 unidade, remove diretamente.
     Se tem múltiplas, abre um pop-up para escolher a quantidade.
     """
-    global popup_visivel, popup_tipo, item_para_remover, quantidade_a_remover
+    global item_para_remover, quantidade_a_remover
     
     if item_pedido_selecionado is not None:
         item_info = itens_pedido_obj[item_pedido_selecionado]
@@ -534,49 +2589,65 @@ def iniciar_remocao():
             remover_item_pedido(item_info)
         else:
             # Abrir pop-up para escolher quantidade
-            popup_visivel = True
-            popup_tipo = "remover"
             item_para_remover = item_info
             quantidade_a_remover = 1
+            abrir_popup(PopupRemover())
 
 def remover_item_pedido(item_info, quantidade=1):
     """
     Remove um número específico de unidades de um item do pedido.
     Atualiza o estado e a interface após remover.
     """
-    global pedido, item_pedido_selecionado
-    
-    nome = item_info['nome']
-    preco = item_info['preco']
-    categoria = item_info['categoria']
-    
-    # Contar quantas unidades foram removidas
-    removidos = 0
-    nova_lista = []
-    
-    # Percorrer o pedido e remover apenas as unidades necessárias
-    for item in pedido:
-        item_nome, item_preco, item_categoria = item
-        
-        # Se é o item a remover e ainda não removemos o suficiente, skip
-        if (item_nome == nome and item_preco == preco and 
-            item_categoria == categoria and removidos < quantidade):
-            removidos += 1
-            continue
-        
-        nova_lista.append(item)
+    global item_pedido_selecionado
     
-    # Atualizar pedido com a nova lista
-    pedido.clear()
-    pedido.extend(nova_lista)
+    removidos = pedido.remover(item_info['indice_menu'], quantidade)
+    if removidos:
+        registar_acao(OP_REMOVER, id=ids_menu[item_info['indice_menu']], i=item_info['indice_menu'],
+                      q=removidos)
     
     # Recriar lista de itens do pedido com update visual
     item_pedido_selecionado = None
     criar_itens_pedido()
+    marcar_tela_suja()
+
+def abrir_popup(popup):
+    """Mostra um pop-up (widget retido) por cima da vista atual."""
+    global popup_visivel, popup_tipo, popup_atual
+    popup_atual = popup
+    popup_visivel = True
+    popup_tipo = popup.TIPO
+    # Os botões por baixo ficam inativos (sem hover) enquanto o pop-up está aberto
+    for botao in botoes:
+        botao.definir_hover(False)
+    invalidar_regioes_clique()
+    marcar_tela_suja()
+
+def fechar_popup():
+    """Fecha o pop-up aberto e volta a desenhar a vista por baixo."""
+    global popup_visivel, popup_tipo, popup_atual
+    popup_atual = None
+    popup_visivel = False
+    popup_tipo = None
+    invalidar_regioes_clique()
+    marcar_tela_suja()
+
+def diminuir_quantidade_remover():
+    """Botão "-" do pop-up de remoção."""
+    global quantidade_a_remover
+    if quantidade_a_remover > 1:
+        quantidade_a_remover -= 1
+        popup_atual.invalidar(refazer_layout=True)
+
+def aumentar_quantidade_remover():
+    """Botão "+" do pop-up de remoção."""
+    global quantidade_a_remover
+    if item_para_remover and quantidade_a_remover < item_para_remover['quantidade']:
+        quantidade_a_remover += 1
+        popup_atual.invalidar(refazer_layout=True)
 
 def confirmar_remocao():
     """Confirma a remoção com a quantidade especificada no pop-up."""
-    global popup_visivel, popup_tipo, quantidade_a_remover, item_para_remover
+    global quantidade_a_remover, item_para_remover
     
     if item_para_remover:
         # Verificar se quantidade é válida
@@ -584,18 +2655,16 @@ def confirmar_remocao():
             remover_item_pedido(item_para_remover, quantidade_a_remover)
     
     # Fechar pop-up e resetar valores
-    popup_visivel = False
-    popup_tipo = None
     item_para_remover = None
     quantidade_a_remover = 1
+    fechar_popup()
 
 def cancelar_remocao():
     """Cancela o processo de remoção e fecha o pop-up."""
-    global popup_visivel, popup_tipo, item_para_remover, quantidade_a_remover
-    popup_visivel = False
-    popup_tipo = None
+    global item_para_remover, quantidade_a_remover
     item_para_remover = None
     quantidade_a_remover = 1
+    fechar_popup()
 
 def limpar_selecao():
     """Remove a seleção visual de todos os itens do menu."""
@@ -606,48 +2675,53 @@ def limpar_selecao():
 
 def limpar_pedido():
     """Limpa todos os itens do pedido e redefine o estado."""
-    global pedido, item_pedido_selecionado
-    pedido.clear()
+    global item_pedido_selecionado
+    pedido.limpar()
+    registar_acao(OP_LIMPAR)
     item_pedido_selecionado = None
     criar_itens_pedido()
+    marcar_tela_suja()
 
 def abrir_popup_pagamento():
     """Abre o pop-up para o utilizador escolher o método de pagamento."""
-    global popup_visivel, popup_tipo
-    popup_visivel = True
-    popup_tipo = "pagamento"
+    abrir_popup(PopupPagamento())
 
 def confirmar_pagamento_numerario():
     """Confirma pagamento em numerário e vai para a conta."""
-    global metodo_pagamento, popup_visivel, popup_tipo, estado_atual, scroll_conta_y
+    global metodo_pagamento, estado_atual, scroll_conta_y
     metodo_pagamento = "numerario"
-    popup_visivel = False
-    popup_tipo = None
+    registar_acao(OP_PAGAMENTO, metodo=metodo_pagamento)
+    guardar_conta_paga()
+    imprimir_recibo()
+    enviar_para_cozinha()
+    fechar_popup()
     estado_atual = "conta"
     scroll_conta_y = 0
     criar_botoes()
     criar_conta_scrollbar()
+    marcar_tela_suja()
 
 def confirmar_pagamento_cartao():
     """Confirma pagamento em cartão e vai para a conta."""
-    global metodo_pagamento, popup_visivel, popup_tipo, estado_atual, scroll_conta_y
+    global metodo_pagamento, estado_atual, scroll_conta_y
     metodo_pagamento = "cartao"
-    popup_visivel = False
-    popup_tipo = None
+    registar_acao(OP_PAGAMENTO, metodo=metodo_pagamento)
+    guardar_conta_paga()
+    imprimir_recibo()
+    enviar_para_cozinha()
+    fechar_popup()
     estado_atual = "conta"
     scroll_conta_y = 0
     criar_botoes()
     criar_conta_scrollbar()
+    marcar_tela_suja()
 
 def cancelar_popup_pagamento():
     """Cancela o pop-up de pagamento e volta ao pedido."""
-    global popup_visivel, popup_tipo
-    popup_visivel = False
-    popup_tipo = None
+    fechar_popup()
 
 def finalizar_pedido_ui():
     """Valida o pedido e abre o pop-up de pagamento se há itens."""
-    global popup_visivel, popup_tipo
     if pedido:  # Só finalizar se há itens no pedido
         abrir_popup_pagamento()
 
@@ -663,11 +2737,11 @@ def desenhar_item_com_preco(tela, x_esquerda, x_direita, y, texto_item, preco,
     Coloca o texto do item à esquerda e o preço à direita.
     """
     # Desenhar nome/descrição do item
-    item_surf = fonte_item.render(texto_item, True, cor_texto)
+    item_surf = renderizar_texto(fonte_item, texto_item, cor_texto)
     tela.blit(item_surf, (x_esquerda, y))
     
     # Desenhar preço à direita
-    preco_surf = fonte_preco.render(preco, True, cor_preco)
+    preco_surf = renderizar_texto(fonte_preco, preco, cor_preco)
     preco_rect = preco_surf.get_rect()
     preco_rect.right = x_direita
     preco_rect.top = y
@@ -677,7 +2751,7 @@ def desenhar_categoria(tela, x, y, categoria_nome, cor=COR_TEXTO_SECUNDARIO):
     """
     Função auxiliar que desenha um cabeçalho de categoria.
     """
-    cat_surf = FONTE_CATEGORIA.render(categoria_nome.upper(), True, cor)
+    cat_surf = renderizar_texto(FONTE_CATEGORIA, categoria_nome.upper(), cor)
     tela.blit(cat_surf, (x, y))
     # Linha separadora sob a categoria
     pygame.draw.line(tela, (100, 100, 100), (x, y + 40), (x + 300, y + 40), 2)
@@ -686,14 +2760,25 @@ def aplicar_area_clipping(tela, x, y, largura, altura):
     """
     Aplica uma área de recorte (clipping) retangular para limitar o desenho.
     Útil para implementar scroll sem desenhar fora dos limites.
+    Durante um redesenho parcial, o recorte fica limitado à região suja.
     """
     clip_rect = pygame.Rect(x, y, largura, altura)
+    if clip_base is not None:
+        clip_rect = clip_rect.clip(clip_base)
     tela.set_clip(clip_rect)
     return clip_rect
 
 def remover_area_clipping(tela):
-    """Remove a área de clipping, permitindo desenho em toda a tela."""
-    tela.set_clip(None)
+    """Remove a área de clipping, voltando ao recorte base do frame."""
+    tela.set_clip(clip_base)
+
+def area_conteudo():
+    """Retorna o retângulo da área com scroll (menu, pedido ou conta); não deve ser alterado."""
+    return layout_atual().area_conteudo
+
+def area_rodape():
+    """Retorna o retângulo ocupado pelo texto do rodapé; não deve ser alterado."""
+    return layout_atual().area_rodape
 
 # ================================
 # FUNÇÕES DE DESENHO PRINCIPAL
@@ -727,453 +2812,180 @@ def desenhar_cabecalho(tela, titulo):
     pygame.draw.rect(tela, (40, 35, 30), (0, 0, LARGURA, 100))
     
     # Desenhar título centrado
-    titulo_surf = FONTE_TITULO.render(titulo, True, COR_DESTAQUE)
+    titulo_surf = renderizar_texto(FONTE_TITULO, titulo, COR_DESTAQUE)
     titulo_rect = titulo_surf.get_rect(center=(LARGURA//2, 50))
     tela.blit(titulo_surf, titulo_rect)
     
+    # Mesa atual (com várias mesas; clicar abre o pop-up das mesas)
+    if NUM_MESAS > 1:
+        etiqueta = layout_atual().etiqueta_mesa
+        pygame.draw.rect(tela, COR_BOTAO, etiqueta, border_radius=10)
+        mesa_surf = renderizar_texto(FONTE_BOTAO, f"Mesa {mesa_atual}", COR_TEXTO)
+        tela.blit(mesa_surf, mesa_surf.get_rect(center=etiqueta.center))
+    
     # Desenhar linha separadora bajo o cabeçalho
     pygame.draw.line(tela, COR_TEXTO_SECUNDARIO, (100, 90), (LARGURA-100, 90), 3)
 
-def desenhar_menu(tela, eventos):
+def desenhar_menu(tela):
     """
     Desenha o menu completo com todas as categorias e itens com scroll.
-    Processa também eventos de scroll (roda do mouse e arrastamento).
+    O corpo do menu vem do canvas pré-renderizado; só o item selecionado é
+    desenhado por cima. A posição de scroll é atualizada antes em atualizar_scroll().
     """
-    global scroll_y
-    
-    # Atualizar scroll baseado na entrada do utilizador
-    if scrollbar:
-        scroll_y = scrollbar.atualizar(pygame.mouse.get_pos(), eventos)
-    
     # Aplicar clipping para não desenhar fora do limite
-    aplicar_area_clipping(tela, 50, 120, LARGURA - 100, ALTURA - 230)
+    area = aplicar_area_clipping(tela, *lista_menu.area)
     
-    y = 120 - scroll_y
-    categoria_atual = None
+    # Copiar a fatia visível do canvas do menu
+    canvas_menu.desenhar(tela, lista_menu.area.y, lista_menu.scroll, lista_menu.area.height)
     
-    # Desenhar cada item do menu
-    for item_obj in itens_menu_obj:
-        # Atualizar estado de seleção
-        item_obj.selecionado = (item_selecionado == item_obj.index)
-        
-        # Desenhar cabeçalho de categoria se mudou
-        if categoria_atual != item_obj.categoria:
-            categoria_atual = item_obj.categoria
-            # Desenhar apenas se estiver visível
-            if y + 50 > 120 and y < ALTURA - 80:
-                desenhar_categoria(tela, 100, y, categoria_atual)
-            y += 50
-            
-            # Desenhar linha separadora sob a categoria
-            if y - scroll_y - 10 > 120 and y - scroll_y - 10 < ALTURA - 80:
-                pygame.draw.line(tela, (100, 100, 100), (100, y-10), (LARGURA-140, y-10), 2)
-        
-        # Desenhar item se estiver visível na tela
-        if y > 120 - 45 and y < ALTURA - 80:
+    # Desenhar o destaque do item selecionado
+    if item_selecionado is not None:
+        item_obj = itens_menu_obj[item_selecionado]
+        item_obj.selecionado = True
+        linha = lista_menu.linhas_itens[item_selecionado]
+        if linha in lista_menu.visiveis():
+            # Apagar a linha do canvas e redesenhá-la com as cores de seleção
+            y = lista_menu.y_linha(linha)
+            tela.set_clip(pygame.Rect(50, y - 5, LARGURA - 100, 45).clip(area))
+            tela.fill(COR_FUNDO)
             item_obj.desenhar(tela, 120, y)
-        
-        y += 45
     
     # Remover clipping e desenhar scrollbar
     remover_area_clipping(tela)
     
-    if scrollbar and scrollbar.scroll_max > 0:
-        scrollbar.desenhar(tela)
+    if lista_menu.scrollbar.scroll_max > 0:
+        lista_menu.scrollbar.desenhar(tela)
 
-def desenhar_pedido(tela, eventos):
+def rect_item_menu(indice):
+    """Retorna o retângulo de seleção de um item do menu na tela (com o scroll atual)."""
+    y = lista_menu.y_item(indice)
+    return pygame.Rect(110, y - 5, LARGURA - 140, 40)
+
+def rect_item_pedido(indice):
+    """Retorna o retângulo de seleção de um item do pedido na tela (com o scroll atual)."""
+    y = lista_pedido.y_item(indice)
+    return pygame.Rect(160, y - 5, LARGURA - 180, 40)
+
+def desenhar_linha_pedido(tela, tipo, dados, y):
+    """Desenha uma linha da lista do pedido (título, categoria, item ou total)."""
+    if tipo == "titulo":
+        pedido_surf = renderizar_texto(FONTE_CATEGORIA, "SEU PEDIDO", COR_DESTAQUE)
+        tela.blit(pedido_surf, (LARGURA//2 - pedido_surf.get_width()//2, y))
+    
+    elif tipo == "vazio":
+        vazio_surf = renderizar_texto(FONTE_ITEM, "O pedido está vazio.", COR_TEXTO_SECUNDARIO)
+        tela.blit(vazio_surf, (LARGURA//2 - vazio_surf.get_width()//2, y))
+    
+    elif tipo == "categoria":
+        cat_surf = renderizar_texto(FONTE_CATEGORIA, dados.upper(), COR_TEXTO_SECUNDARIO)
+        tela.blit(cat_surf, (150, y))
+    
+    elif tipo == "item":
+        item_obj = itens_pedido_obj[dados]
+        # Determinar cor baseada em seleção
+        cor = COR_DESTAQUE if item_pedido_selecionado == dados else COR_TEXTO
+        
+        # Desenhar quantidade e nome do item
+        item_texto = f"{item_obj['quantidade']}x {item_obj['nome']}"
+        item_surf = renderizar_texto(FONTE_ITEM, item_texto, cor)
+        tela.blit(item_surf, (170, y))
+        
+        # Desenhar preço total do item (subtotal mantido pelo pedido)
+        preco_texto = formatar_euros(item_obj['subtotal'])
+        desenhar_item_com_preco(tela, 170, LARGURA - 150, y, "", preco_texto, 
+                               cor, COR_TEXTO_SECUNDARIO)
+        
+        # Desenhar retângulo de seleção se item está selecionado
+        if item_pedido_selecionado == dados:
+            pygame.draw.rect(tela, (255, 255, 255, 50), rect_item_pedido(dados), 2, border_radius=5)
+    
+    elif tipo == "total":
+        # Linha separadora e total do pedido
+        pygame.draw.line(tela, COR_TEXTO, (150, y + 20), (LARGURA-150, y + 20), 2)
+        total_texto = f"TOTAL: {formatar_euros(calcular_total_pedido())}"
+        total_surf = renderizar_texto(FONTE_CATEGORIA, total_texto, COR_DESTAQUE)
+        total_rect = total_surf.get_rect()
+        total_rect.right = LARGURA - 150
+        total_rect.top = y + 50
+        tela.blit(total_surf, total_rect)
+
+def desenhar_pedido(tela):
     """
     Desenha a lista do pedido atual com scroll.
     Permite selecionar itens para remover.
     Mostra também o total no final da lista.
+    Só as linhas visíveis são desenhadas (ver ListaVirtual).
     """
-    global scroll_pedido_y, itens_pedido_obj
-    
-    # Atualizar scroll baseado na entrada do utilizador
-    if scrollbar_pedido:
-        scroll_pedido_y = scrollbar_pedido.atualizar(pygame.mouse.get_pos(), eventos)
-    
-    # Aplicar clipping para limitar desenho
-    aplicar_area_clipping(tela, 50, 120, LARGURA - 100, ALTURA - 230)
+    lista_pedido.desenhar(tela, desenhar_linha_pedido)
     
-    y = 120 - scroll_pedido_y
-    
-    # Desenhar título da seção
-    pedido_surf = FONTE_CATEGORIA.render("SEU PEDIDO", True, COR_DESTAQUE)
-    tela.blit(pedido_surf, (LARGURA//2 - pedido_surf.get_width()//2, y))
-    y += 60
-    
-    if not pedido:
-        # Mostrar mensagem se pedido vazio
-        vazio_surf = FONTE_ITEM.render("O pedido está vazio.", True, COR_TEXTO_SECUNDARIO)
-        tela.blit(vazio_surf, (LARGURA//2 - vazio_surf.get_width()//2, y))
-        y += 80
-    else:
-        categoria_atual = None
-        itens_desenhados = 0
-        total_itens = len(itens_pedido_obj)
-        
-        # Desenhar cada item do pedido
-        for i, item_obj in enumerate(itens_pedido_obj):
-            nome = item_obj['nome']
-            preco = item_obj['preco']
-            categoria = item_obj['categoria']
-            quantidade = item_obj['quantidade']
-            
-            # Desenhar cabeçalho de categoria se mudou
-            if categoria != categoria_atual:
-                categoria_atual = categoria
-                cat_surf = FONTE_CATEGORIA.render(categoria.upper(), True, COR_TEXTO_SECUNDARIO)
-                if y + 50 > 120 and y < ALTURA - 80:
-                    tela.blit(cat_surf, (150, y))
-                y += 50
-            
-            # Desenhar item se estiver visível
-            if y > 120 - 45 and y < ALTURA - 80:
-                # Determinar cor baseada em seleção
-                cor = COR_DESTAQUE if item_pedido_selecionado == i else COR_TEXTO
-                
-                # Desenhar quantidade e nome do item
-                item_texto = f"{quantidade}x {nome}"
-                item_surf = FONTE_ITEM.render(item_texto, True, cor)
-                tela.blit(item_surf, (170, y))
-                
-                # Desenhar preço total do item (quantidade * preço unitário)
-                total_item = preco * quantidade
-                preco_texto = f"{total_item:.2f}€"
-                desenhar_item_com_preco(tela, 170, LARGURA - 150, y, "", preco_texto, 
-                                       cor, COR_TEXTO_SECUNDARIO)
-                
-                # Guardar retângulo para deteção de clique
-                item_obj['rect'] = pygame.Rect(160, y-5, LARGURA - 180, 40)
-                
-                # Desenhar retângulo de seleção se item está selecionado
-                if item_pedido_selecionado == i:
-                    pygame.draw.rect(tela, (255, 255, 255, 50), item_obj['rect'], 2, border_radius=5)
-            
-            y += 45
-            itens_desenhados += 1
-            
-            # Se é o último item, adicionar linha separadora e total
-            if i == total_itens - 1:
-                # Espaço antes da linha
-                if y > 120 - 20 and y < ALTURA - 80:
-                    y += 20
-                    pygame.draw.line(tela, COR_TEXTO, (150, y), (LARGURA-150, y), 2)
-                    y += 30
-                    
-                    # Desenhar total
-                    total = calcular_total_pedido()
-                    total_texto = f"TOTAL: {total:.2f}€"
-                    total_surf = FONTE_CATEGORIA.render(total_texto, True, COR_DESTAQUE)
-                    total_rect = total_surf.get_rect()
-                    total_rect.right = LARGURA - 150
-                    total_rect.top = y
-                    
-                    if y > 120 - 30 and y < ALTURA - 80:
-                        tela.blit(total_surf, total_rect)
-            
-            # Verificar se chegou ao limite de tela
-            if y > ALTURA - 80 + scroll_pedido_y:
-                if itens_desenhados < total_itens:
-                    # Mostrar indicador de mais itens
-                    mais_surf = FONTE_ITEM.render("... mais itens (faça scroll para ver o total)", 
-                                                  True, COR_TEXTO_SECUNDARIO)
-                    tela.blit(mais_surf, (LARGURA//2 - mais_surf.get_width()//2, ALTURA - 120))
-                break
-    
-    # Remover clipping e desenhar scrollbar
-    remover_area_clipping(tela)
-    
-    if scrollbar_pedido and scrollbar_pedido.scroll_max > 0:
-        scrollbar_pedido.desenhar(tela)
+    if pedido and lista_pedido.ha_mais_abaixo():
+        # Mostrar indicador de mais itens enquanto o total não está visível
+        aplicar_area_clipping(tela, *lista_pedido.area)
+        mais_surf = renderizar_texto(FONTE_ITEM, "... mais itens (faça scroll para ver o total)",
+                                     COR_TEXTO_SECUNDARIO)
+        tela.blit(mais_surf, (LARGURA//2 - mais_surf.get_width()//2, ALTURA - 120))
+        remover_area_clipping(tela)
 
 def desenhar_popup(tela):
     """
-    Desenha um pop-up modal genérico que se adapta ao tipo de popup.
-    Tipos suportados: "remover" (quantidade de itens), "pagamento" (escolha método)
-    
-    Retorna um dicionário com os retângulos dos botões para deteção de clique.
+    Desenha o pop-up aberto (remover ou pagamento) por cima da cena:
+    escurece a tela e copia o painel pré-renderizado do widget.
     """
-    global quantidade_a_remover, popup_tipo
-    
-    # Desenhar fundo semi-transparente para escurecer a tela atrás
-    overlay = pygame.Surface((LARGURA, ALTURA), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 150))  # 150 = nível de transparência
-    tela.blit(overlay, (0, 0))
-    
-    # Dimensões base do pop-up
-    popup_largura = 550
-    popup_altura = 380
-    popup_x = (LARGURA - popup_largura) // 2
-    popup_y = (ALTURA - popup_altura) // 2
-    
-    # ========================
-    # POP-UP DE REMOÇÃO DE ITENS
-    # ========================
-    if popup_tipo == "remover":
-        # Desenhar fundo do pop-up com borda
-        pygame.draw.rect(tela, COR_POPUP_FUNDO, (popup_x, popup_y, popup_largura, popup_altura), border_radius=15)
-        pygame.draw.rect(tela, COR_POPUP_BORDA, (popup_x, popup_y, popup_largura, popup_altura), 3, border_radius=15)
-        
-        # Desenhar título
-        titulo = "Quantos itens pretende remover?"
-        titulo_surf = FONTE_POPUP.render(titulo, True, COR_POPUP_TEXTO)
-        titulo_x = popup_x + (popup_largura - titulo_surf.get_width()) // 2
-        titulo_y = popup_y + 30
-        tela.blit(titulo_surf, (titulo_x, titulo_y))
-        
-        # Informação do item a remover
-        if item_para_remover:
-            # Desenhar nome do item
-            item_texto = f"{item_para_remover['nome']}"
-            item_surf = FONTE_POPUP_PEQUENA.render(item_texto, True, COR_POPUP_TEXTO)
-            item_x = popup_x + (popup_largura - item_surf.get_width()) // 2
-            tela.blit(item_surf, (item_x, popup_y + 80))
-            
-            # Desenhar quantidade disponível no pedido
-            quantidade_texto = f"Quantidade no pedido: {item_para_remover['quantidade']}"
-            quantidade_surf = FONTE_POPUP_PEQUENA.render(quantidade_texto, True, COR_TEXTO_SECUNDARIO)
-            quantidade_x = popup_x + (popup_largura - quantidade_surf.get_width()) // 2
-            tela.blit(quantidade_surf, (quantidade_x, popup_y + 120))
-        
-        # Rótulo para a quantidade a remover
-        qtd_texto = f"Quantidade a remover:"
-        qtd_surf = FONTE_POPUP_PEQUENA.render(qtd_texto, True, COR_POPUP_TEXTO)
-        qtd_x = popup_x + (popup_largura - qtd_surf.get_width()) // 2
-        tela.blit(qtd_surf, (qtd_x, popup_y + 180))
-        
-        # Desenhar valor da quantidade (grande e destacado)
-        valor_qtd_texto = f"{quantidade_a_remover}"
-        valor_qtd_surf = FONTE_CATEGORIA.render(valor_qtd_texto, True, COR_DESTAQUE)
-        valor_qtd_x = popup_x + (popup_largura - valor_qtd_surf.get_width()) // 2
-        tela.blit(valor_qtd_surf, (valor_qtd_x, popup_y + 210))
-        
-        # Criar botões para controlar a quantidade (- e +)
-        btn_tamanho = 50
-        espacamento_btns = 80
-        
-        # Botão "-" (diminuir quantidade)
-        menos_x = valor_qtd_x - espacamento_btns - btn_tamanho//2
-        menos_y = popup_y + 210 + valor_qtd_surf.get_height()//2 - btn_tamanho//2
-        menos_rect = pygame.Rect(menos_x, menos_y, btn_tamanho, btn_tamanho)
-        
-        # Botão "+" (aumentar quantidade)
-        mais_x = valor_qtd_x + espacamento_btns - btn_tamanho//2
-        mais_y = popup_y + 210 + valor_qtd_surf.get_height()//2 - btn_tamanho//2
-        mais_rect = pygame.Rect(mais_x, mais_y, btn_tamanho, btn_tamanho)
-        
-        # Desenhar os botões - e +
-        pygame.draw.rect(tela, COR_BOTAO, menos_rect, border_radius=25)
-        pygame.draw.rect(tela, COR_BOTAO, mais_rect, border_radius=25)
-        
-        # Desenhar símbolos nos botões
-        menos_text = FONTE_BOTAO.render("-", True, COR_TEXTO)
-        mais_text = FONTE_BOTAO.render("+", True, COR_TEXTO)
+    if popup_atual is not None:
+        popup_atual.desenhar(tela)
+
+def desenhar_linha_conta(tela, tipo, dados, y):
+    """Desenha uma linha da lista da conta (título, item ou uma das linhas finais)."""
+    if tipo == "titulo":
+        conta_surf = renderizar_texto(FONTE_TITULO, "CONTA FINAL", COR_DESTAQUE)
+        tela.blit(conta_surf, (LARGURA//2 - conta_surf.get_width()//2, y))
+    
+    elif tipo == "item":
+        # Desenhar nome e preço do item
+        item_surf = renderizar_texto(FONTE_ITEM, f"{dados.quantidade}x {dados.nome}", COR_TEXTO)
+        tela.blit(item_surf, (200, y))
         
-        tela.blit(menos_text, (menos_rect.centerx - menos_text.get_width()//2, 
-                               menos_rect.centery - menos_text.get_height()//2))
-        tela.blit(mais_text, (mais_rect.centerx - mais_text.get_width()//2, 
-                              mais_rect.centery - mais_text.get_height()//2))
-        
-        # Criar botões de ação (Cancelar e Confirmar)
-        btn_altura = 50
-        btn_largura = 180
-        espacamento = 40
-        
-        # Botão Cancelar (à esquerda)
-        cancelar_btn = pygame.Rect(popup_x + espacamento, 
-                                   popup_y + popup_altura - btn_altura - 30, 
-                                   btn_largura, btn_altura)
-        
-        # Botão Confirmar (à direita)
-        confirmar_btn = pygame.Rect(popup_x + popup_largura - btn_largura - espacamento, 
-                                    popup_y + popup_altura - btn_altura - 30, 
-                                    btn_largura, btn_altura)
-        
-        # Desenhar os botões de ação
-        pygame.draw.rect(tela, COR_BOTAO, cancelar_btn, border_radius=10)
-        pygame.draw.rect(tela, COR_BOTAO_HOVER, confirmar_btn, border_radius=10)
-        
-        # Desenhar texto dos botões
-        cancelar_text = FONTE_BOTAO.render("Cancelar", True, COR_TEXTO)
-        confirmar_text = FONTE_BOTAO.render("Confirmar", True, COR_TEXTO)
-        
-        tela.blit(cancelar_text, (cancelar_btn.centerx - cancelar_text.get_width()//2, 
-                                  cancelar_btn.centery - cancelar_text.get_height()//2))
-        tela.blit(confirmar_text, (confirmar_btn.centerx - confirmar_text.get_width()//2, 
-                                   confirmar_btn.centery - confirmar_text.get_height()//2))
-        
-        # Retornar dicionário com botões do pop-up remover
-        return {
-            'menos': menos_rect,
-            'mais': mais_rect,
-            'cancelar': cancelar_btn,
-            'confirmar': confirmar_btn
-        }
-    
-    # ========================
-    # POP-UP DE ESCOLHA DE PAGAMENTO
-    # ========================
-    elif popup_tipo == "pagamento":
-        # Ajustar altura do pop-up para pagamento
-        popup_altura = 320
-        popup_y = (ALTURA - popup_altura) // 2
-        
-        # Desenhar fundo do pop-up com borda
-        pygame.draw.rect(tela, COR_POPUP_FUNDO, (popup_x, popup_y, popup_largura, popup_altura), border_radius=15)
-        pygame.draw.rect(tela, COR_POPUP_BORDA, (popup_x, popup_y, popup_largura, popup_altura), 3, border_radius=15)
-        
-        # Desenhar título
-        titulo = "Escolha o método de pagamento"
-        titulo_surf = FONTE_POPUP.render(titulo, True, COR_POPUP_TEXTO)
-        titulo_x = popup_x + (popup_largura - titulo_surf.get_width()) // 2
-        titulo_y = popup_y + 30
-        tela.blit(titulo_surf, (titulo_x, titulo_y))
-        
-        # Botão para pagamento em numerário
-        btn_altura = 60
-        btn_largura = 200
-        espacamento_vertical = 20
-        
-        # Posição dos botões (verticalmente centrados)
-        y_botoes = popup_y + 100
-        
-        # Botão Numerário (esquerda)
-        numerario_btn = pygame.Rect(
-            popup_x + (popup_largura // 2 - btn_largura - espacamento_vertical // 2),
-            y_botoes,
-            btn_largura,
-            btn_altura
-        )
-        
-        # Botão Cartão (direita)
-        cartao_btn = pygame.Rect(
-            popup_x + (popup_largura // 2 + espacamento_vertical // 2),
-            y_botoes,
-            btn_largura,
-            btn_altura
-        )
-        
-        # Desenhar botões
-        pygame.draw.rect(tela, COR_BOTAO, numerario_btn, border_radius=10)
-        pygame.draw.rect(tela, COR_BOTAO, cartao_btn, border_radius=10)
-        
-        # Desenhar texto dos botões
-        numerario_text = FONTE_BOTAO.render("Numerário", True, COR_TEXTO)
-        cartao_text = FONTE_BOTAO.render("Cartão", True, COR_TEXTO)
-        
-        tela.blit(numerario_text, (numerario_btn.centerx - numerario_text.get_width()//2,
-                                   numerario_btn.centery - numerario_text.get_height()//2))
-        tela.blit(cartao_text, (cartao_btn.centerx - cartao_text.get_width()//2,
-                               cartao_btn.centery - cartao_text.get_height()//2))
-        
-        # Botão Cancelar (na base)
-        cancelar_btn = pygame.Rect(
-            popup_x + (popup_largura - btn_largura) // 2,
-            popup_y + popup_altura - btn_altura - 30,
-            btn_largura,
-            btn_altura
-        )
-        
-        # Desenhar botão cancelar
-        pygame.draw.rect(tela, (80, 80, 80), cancelar_btn, border_radius=10)
-        cancelar_text = FONTE_BOTAO.render("Cancelar", True, COR_TEXTO)
-        tela.blit(cancelar_text, (cancelar_btn.centerx - cancelar_text.get_width()//2,
-                                 cancelar_btn.centery - cancelar_text.get_height()//2))
-        
-        # Retornar dicionário com botões do pop-up pagamento
-        return {
-            'numerario': numerario_btn,
-            'cartao': cartao_btn,
-            'cancelar': cancelar_btn
-        }
+        preco_surf = renderizar_texto(FONTE_PRECO, formatar_euros(dados.subtotal), COR_TEXTO_SECUNDARIO)
+        preco_rect = preco_surf.get_rect()
+        preco_rect.right = LARGURA - 200
+        preco_rect.top = y
+        tela.blit(preco_surf, preco_rect)
     
-    return {}
-
-def desenhar_conta(tela, eventos):
+    elif tipo == "separador":
+        pygame.draw.line(tela, COR_DESTAQUE, (200, y + 30), (LARGURA-200, y + 30), 3)
+    
+    elif tipo == "total":
+        # Desenhar total a pagar
+        total_texto = f"TOTAL A PAGAR: {formatar_euros(calcular_total_pedido())}"
+        total_surf = renderizar_texto(FONTE_CATEGORIA, total_texto, COR_DESTAQUE)
+        tela.blit(total_surf, (LARGURA//2 - total_surf.get_width()//2, y))
+    
+    elif tipo == "iva":
+        # Desenhar o IVA incluído, por taxa (valores já calculados pelo pedido)
+        partes_iva = [f"{taxa}%: {formatar_euros(iva)}"
+                      for taxa, _, iva, _ in pedido.discriminacao_iva()]
+        iva_texto = "IVA incluído - " + " · ".join(partes_iva)
+        iva_surf = renderizar_texto(FONTE_POPUP_PEQUENA, iva_texto, COR_TEXTO_SECUNDARIO)
+        tela.blit(iva_surf, (LARGURA//2 - iva_surf.get_width()//2, y))
+    
+    elif tipo == "metodo":
+        # Desenhar método de pagamento escolhido
+        metodo_texto = "Pagamento em Numerário" if metodo_pagamento == "numerario" else "Pagamento em Cartão"
+        metodo_surf = renderizar_texto(FONTE_POPUP, metodo_texto, COR_TEXTO_SECUNDARIO)
+        tela.blit(metodo_surf, (LARGURA//2 - metodo_surf.get_width()//2, y))
+    
+    elif tipo == "obrigado":
+        # Desenhar mensagem de agradecimento
+        obrigado_surf = renderizar_texto(FONTE_ITEM, "Obrigado! Volte sempre!", COR_TEXTO_SECUNDARIO)
+        tela.blit(obrigado_surf, (LARGURA//2 - obrigado_surf.get_width()//2, y))
+
+def desenhar_conta(tela):
     """
     Desenha a conta final com todos os itens e o valor total a pagar.
-    Inclui scroll para visualizar itens se houver muitos.
+    Inclui scroll para visualizar itens se houver muitos; só as linhas
+    visíveis são desenhadas (ver ListaVirtual).
     """
-    global scroll_conta_y
-    
-    # Atualizar scroll baseado na entrada do utilizador
-    if scrollbar_conta:
-        scroll_conta_y = scrollbar_conta.atualizar(pygame.mouse.get_pos(), eventos)
-    
-    # Aplicar clipping para limitar desenho
-    aplicar_area_clipping(tela, 50, 120, LARGURA - 100, ALTURA - 230)
-    
-    y = 120 - scroll_conta_y
-    
-    # Desenhar título da conta
-    conta_surf = FONTE_TITULO.render("CONTA FINAL", True, COR_DESTAQUE)
-    tela.blit(conta_surf, (LARGURA//2 - conta_surf.get_width()//2, y))
-    y += 80
-    
-    if pedido:
-        itens_agrupados = agrupar_itens_pedido()
-        total = 0
-        total_itens = len(itens_agrupados)
-        
-        # Desenhar cada item da conta
-        for idx, (nome, preco, categoria, quantidade) in enumerate(itens_agrupados):
-            # Calcular total do item (antes do if para sempre ter valor)
-            total_item = preco * quantidade
-            
-            # Desenhar item se estiver visível
-            if y > 120 - 45 and y < ALTURA - 80:
-                # Preparar textos
-                item_texto = f"{quantidade}x {nome}"
-                preco_texto = f"{total_item:.2f}€"
-                
-                # Desenhar nome e preço do item
-                item_surf = FONTE_ITEM.render(item_texto, True, COR_TEXTO)
-                tela.blit(item_surf, (200, y))
-                
-                preco_surf = FONTE_PRECO.render(preco_texto, True, COR_TEXTO_SECUNDARIO)
-                preco_rect = preco_surf.get_rect()
-                preco_rect.right = LARGURA - 200
-                preco_rect.top = y
-                tela.blit(preco_surf, preco_rect)
-            
-            # Adicionar ao total geral
-            total += total_item
-            y += 45
-            
-            # Se é o último item, adicionar linha separadora e total
-            if idx == total_itens - 1:
-                # Desenhar linha separadora se visível
-                if y > 120 - 30 and y < ALTURA - 80:
-                    y += 30
-                    pygame.draw.line(tela, COR_DESTAQUE, (200, y), (LARGURA-200, y), 3)
-                    y += 50
-                    
-                    # Desenhar total a pagar
-                    total_texto = f"TOTAL A PAGAR: {total:.2f}€"
-                    total_surf = FONTE_CATEGORIA.render(total_texto, True, COR_DESTAQUE)
-                    if y > 120 - 50 and y < ALTURA - 80:
-                        tela.blit(total_surf, (LARGURA//2 - total_surf.get_width()//2, y))
-                        y += 60
-                        
-                        # Desenhar método de pagamento escolhido
-                        if metodo_pagamento:
-                            metodo_texto = "Pagamento em Numerário" if metodo_pagamento == "numerario" else "Pagamento em Cartão"
-                            metodo_surf = FONTE_POPUP.render(metodo_texto, True, COR_TEXTO_SECUNDARIO)
-                            if y > 120 - 50 and y < ALTURA - 80:
-                                tela.blit(metodo_surf, (LARGURA//2 - metodo_surf.get_width()//2, y))
-                                y += 50
-                        
-                        # Desenhar mensagem de agradecimento
-                        obrigado_surf = FONTE_ITEM.render("Obrigado! Volte sempre!", True, COR_TEXTO_SECUNDARIO)
-                        if y > 120 - 60 and y < ALTURA - 80:
-                            tela.blit(obrigado_surf, (LARGURA//2 - obrigado_surf.get_width()//2, y))
-    
-    # Remover clipping e desenhar scrollbar
-    remover_area_clipping(tela)
-    
-    if scrollbar_conta and scrollbar_conta.scroll_max > 0:
-        scrollbar_conta.desenhar(tela)
+    lista_conta.desenhar(tela, desenhar_linha_conta)
 
 def desenhar_rodape(tela):
     """
@@ -1182,31 +2994,112 @@ def desenhar_rodape(tela):
     """
     y = ALTURA - 40
     
+    # A cozinha cheia tem prioridade sobre as instruções
+    aviso = aviso_cozinha()
+    if aviso is not None:
+        tela.blit(renderizar_texto(FONTE_PEDIDO, aviso, COR_DESTAQUE), (50, y))
+    
     if estado_atual == "menu":
         # No menu, mostrar quantidade de itens no pedido
         qtd_texto = f"Itens no pedido: {len(pedido)}"
-        qtd_surf = FONTE_PEDIDO.render(qtd_texto, True, COR_TEXTO_SECUNDARIO)
+        qtd_surf = renderizar_texto(FONTE_PEDIDO, qtd_texto, COR_TEXTO_SECUNDARIO)
         tela.blit(qtd_surf, (LARGURA - 250, y))
         
         # Mostrar instruções (dinâmicas baseado em seleção)
-        if item_selecionado is not None:
-            instr_texto = "Item Selecionado. Clique em \"Adicionar\" para adicionar."
-        else:
-            instr_texto = "Clique em um item para selecionar • Use a roda do mouse para scroll"
-        instr_surf = FONTE_PEDIDO.render(instr_texto, True, COR_TEXTO_SECUNDARIO)
-        tela.blit(instr_surf, (50, y))
+        if aviso is None:
+            if item_selecionado is not None:
+                instr_texto = "Item Selecionado. Clique em \"Adicionar\" para adicionar."
+            else:
+                instr_texto = "Clique em um item para selecionar • Use a roda do mouse para scroll"
+            instr_surf = renderizar_texto(FONTE_PEDIDO, instr_texto, COR_TEXTO_SECUNDARIO)
+            tela.blit(instr_surf, (50, y))
     
-    elif estado_atual == "pedido":
+    elif estado_atual == "pedido" and aviso is None:
         # No pedido, mostrar instruções sobre seleção de itens
         if item_pedido_selecionado is not None:
             instr_texto = "Item selecionado. Clique em 'Remover' para remover."
-            instr_surf = FONTE_PEDIDO.render(instr_texto, True, COR_TEXTO_SECUNDARIO)
+            instr_surf = renderizar_texto(FONTE_PEDIDO, instr_texto, COR_TEXTO_SECUNDARIO)
             tela.blit(instr_surf, (50, y))
         else:
             instr_texto = "Clique em um item do pedido para selecioná-lo"
-            instr_surf = FONTE_PEDIDO.render(instr_texto, True, COR_TEXTO_SECUNDARIO)
+            instr_surf = renderizar_texto(FONTE_PEDIDO, instr_texto, COR_TEXTO_SECUNDARIO)
             tela.blit(instr_surf, (50, y))
 
+# ================================
+# OVERLAY DO PERFILADOR
+# ================================
+
+overlay_perfilador = False  # Mostrar o gráfico do tempo por frame (F3)
+LIMITE_GRAFICO_MS = 50.0  # Tempo de frame (ms) que enche a altura do gráfico
+
+def rect_overlay_perfilador():
+    """Retorna o retângulo do overlay do perfilador (canto superior direito, por baixo do cabeçalho)."""
+    return pygame.Rect(LARGURA - 390, 110, 370, 160)
+
+def alternar_overlay_perfilador():
+    """Mostra ou esconde o overlay (F3); o perfilador só mede enquanto é preciso."""
+    global overlay_perfilador
+    overlay_perfilador = not overlay_perfilador
+    if overlay_perfilador:
+        perfilador.ligar()
+    elif not PERFIL_AO_ARRANCAR:
+        perfilador.desligar()
+    # Repor a cena por baixo (ou desenhar o overlay já no próximo frame)
+    marcar_regiao_suja(rect_overlay_perfilador())
+
+def exportar_perfil():
+    """Grava os intervalos medidos num ficheiro Chrome Trace na pasta dos dados (F4)."""
+    caminho = os.path.join(PASTA_DADOS, "perfis", time.strftime("perfil_%Y%m%d-%H%M%S.json"))
+    try:
+        eventos = perfilador.exportar_chrome_trace(caminho)
+    except OSError as erro:
+        print(f"Não foi possível exportar o perfil: {erro}", file=sys.stderr)
+        return
+    print(f"Perfil exportado ({eventos} eventos): {caminho}")
+
+def desenhar_overlay_perfilador(tela):
+    """
+    Desenha o overlay do perfilador (opaco, por cima da cena): gráfico da
+    duração dos últimos frames, com as linhas de 60 e 30 FPS, e por baixo a
+    duração do último frame, as fases mais lentas e os contadores.
+    É desenhado fora do frame medido e com textos sem cache (os valores mudam
+    em cada frame), por isso não aparece nas medições. Retorna o retângulo.
+    """
+    rect = rect_overlay_perfilador()
+    pygame.draw.rect(tela, (15, 15, 22), rect)
+    pygame.draw.rect(tela, COR_BORDA, rect, 2)
+    grafico = pygame.Rect(rect.x + 10, rect.y + 10, rect.width - 20, 70)
+    
+    # Barras da duração de cada frame (2 px por frame, as mais recentes à direita)
+    frames = list(perfilador.frames)[-(grafico.width // 2):]
+    for i, (duracao, _, _) in enumerate(frames):
+        altura = min(grafico.height, round(duracao / LIMITE_GRAFICO_MS * grafico.height))
+        cor = (90, 200, 90) if duracao < 1000 / 60 else (230, 200, 60) if duracao < 1000 / 30 else (230, 70, 60)
+        x = grafico.right - 2 * (len(frames) - i)
+        pygame.draw.line(tela, cor, (x, grafico.bottom - 1), (x, grafico.bottom - altura))
+    for limite in (1000 / 60, 1000 / 30):
+        y = grafico.bottom - round(limite / LIMITE_GRAFICO_MS * grafico.height)
+        pygame.draw.line(tela, COR_TEXTO_SECUNDARIO, (grafico.x, y), (grafico.right, y))
+    
+    resumo = perfilador.resumo()
+    if resumo is None:
+        linhas = ["sem frames medidos"]
+    else:
+        media, p95, maximo, (duracao, fases, contadores) = resumo
+        lentas = sorted(fases.items(), key=lambda fase: -fase[1])[:3]
+        linhas = [
+            f"frame {duracao:.2f} ms  média {media:.2f}  p95 {p95:.2f}  máx {maximo:.1f}",
+            "  ".join(f"{nome} {ms:.2f}" for nome, ms in lentas) or "-",
+            "  ".join(f"{nome} {valor}" for nome, valor in sorted(contadores.items()))
+            or "sem textos nem superfícies novos",
+            "F4 exporta o perfil (Chrome Trace)",
+        ]
+    y = grafico.bottom + 6
+    for linha in linhas:
+        tela.blit(FONTE_PERFIL.render(linha, True, COR_TEXTO), (rect.x + 10, y))
+        y += 17
+    return rect
+
 # ================================
 # REDIMENSIONAMENTO E LOOP PRINCIPAL
 # ================================
@@ -1214,175 +3107,365 @@ def desenhar_rodape(tela):
 def redimensionar_tela(nova_largura, nova_altura):
     """
     Redimensiona a tela e atualiza todos os elementos da interface.
-    Chamado quando o utilizador redimensiona a janela.
+    A geometria vem do layout da nova resolução (calculado uma só vez por
+    tamanho); as listas mantêm as linhas e só mudam de área.
     """
-    global LARGURA, ALTURA, TELA, scrollbar, scrollbar_pedido, scrollbar_conta
-    LARGURA = nova_largura
-    ALTURA = nova_altura
     # Recriar a surface do PyGame com novo tamanho
-    TELA = pygame.display.set_mode((LARGURA, ALTURA), pygame.RESIZABLE)
-    # Recriar todos os elementos para se adaptarem ao novo tamanho
+    aplicacao.redimensionar(nova_largura, nova_altura)
+    geometria = layout_atual()
+    if popup_atual is not None:
+        popup_atual.reposicionar()
+    # Botões e listas adaptam-se ao novo tamanho
     criar_botoes()
-    criar_itens_menu()
-    if estado_atual == "pedido":
-        criar_itens_pedido()
+    for lista in (lista_menu, lista_pedido, lista_conta):
+        if lista is not None:
+            lista.reposicionar(geometria.area_conteudo, geometria.barra)
+    invalidar_regioes_clique()
+    marcar_tela_suja()
+
+def pedir_redimensionamento(nova_largura, nova_altura):
+    """
+    Guarda o tamanho pedido por um VIDEORESIZE. A interface só é reconstruída
+    em aplicar_redimensionamento_pendente(), quando não chegam novos tamanhos
+    durante ATRASO_REDIMENSIONAMENTO (a janela deixou de ser arrastada).
+    """
+    global redimensionamento_pendente
+    redimensionamento_pendente = (nova_largura, nova_altura, time.monotonic())
+    # Entretanto a interface antiga é desenhada na janela com o novo tamanho
+    marcar_tela_suja()
+
+def aplicar_redimensionamento_pendente(agora=None):
+    """
+    Aplica o último tamanho pedido se já passou o atraso desde o último
+    VIDEORESIZE. Retorna True se ainda há um redimensionamento à espera.
+    """
+    global redimensionamento_pendente
+    if redimensionamento_pendente is None:
+        return False
+    largura, altura, instante = redimensionamento_pendente
+    if agora is None:
+        agora = time.monotonic()
+    if agora - instante < ATRASO_REDIMENSIONAMENTO:
+        return True
+    redimensionamento_pendente = None
+    if (largura, altura) != (LARGURA, ALTURA):
+        redimensionar_tela(largura, altura)
+    return False
+
+def obter_scrollbar_ativa():
+    """Retorna a scrollbar da vista atual (menu, pedido ou conta)."""
+    if estado_atual == "menu":
+        lista = lista_menu
+    elif estado_atual == "pedido":
+        lista = lista_pedido
     elif estado_atual == "conta":
-        criar_conta_scrollbar()
+        lista = lista_conta
+    else:
+        lista = None
+    return lista.scrollbar if lista is not None else None
+
+def atualizar_scroll(eventos):
+    """
+    Processa os eventos de scroll (roda do mouse e arrastamento) da vista atual
+    e marca como sujas as regiões afetadas pela mudança.
+    """
+    global scroll_y, scroll_pedido_y, scroll_conta_y
+    
+    barra = obter_scrollbar_ativa()
+    if barra is None:
+        return
+    
+    antes = (barra.scroll_y, barra.hover, barra.arrastando)
+    with perfilador.intervalo("Scrollbar.atualizar"):
+        posicao = barra.atualizar(pygame.mouse.get_pos(), eventos)
+    
+    if estado_atual == "menu":
+        scroll_y = posicao
+    elif estado_atual == "pedido":
+        scroll_pedido_y = posicao
+    elif estado_atual == "conta":
+        scroll_conta_y = posicao
+    
+    if barra.scroll_y != antes[0]:
+        # O conteúdo deslocou-se: redesenhar a área com scroll e a barra
+        marcar_regiao_suja(area_conteudo())
+        marcar_regiao_suja((barra.x, barra.y, barra.largura, barra.altura))
+    elif (barra.hover, barra.arrastando) != antes[1:]:
+        # Só a cor do thumb mudou
+        marcar_regiao_suja((barra.x, barra.y, barra.largura, barra.altura))
+
+def marcar_selecao_alterada(rect_anterior, rect_novo):
+    """Marca como sujos os itens cuja seleção mudou e o rodapé (instruções)."""
+    for rect in (rect_anterior, rect_novo):
+        if rect is not None:
+            marcar_regiao_suja(rect.inflate(4, 4))
+        else:
+            marcar_regiao_suja(area_conteudo())
+    marcar_regiao_suja(area_rodape())
+
+def desenhar_cena(tela, regioes=None):
+    """
+    Desenha a interface completa (moldura, cabeçalho, conteúdo, botões, rodapé e pop-up).
+    Se forem dadas regiões, o desenho fica limitado à área que as contém.
+    Com um pop-up aberto, a cena por baixo é reposta a partir do fundo que o
+    pop-up guardou, sem a voltar a desenhar.
+    """
+    global clip_base
+    
+    if regioes:
+        clip_base = regioes[0].unionall(regioes[1:])
+    else:
+        clip_base = None
+    tela.set_clip(clip_base)
+    
+    if popup_atual is not None and popup_atual.fundo is not None:
+        # A cena por baixo do pop-up não muda: copiar o fundo e o painel
+        tela.blit(popup_atual.fundo, (0, 0))
+        with perfilador.intervalo("desenhar_popup"):
+            popup_atual.desenhar_painel(tela)
+        clip_base = None
+        tela.set_clip(None)
+        return
+    
+    # Limpar a área a redesenhar
+    tela.fill(COR_FUNDO)
+    # Desenhar moldura decorativa
+    desenhar_moldura(tela)
+    
+    # Desenhar conteúdo específico baseado no estado atual
+    if estado_atual == "menu":
+        # Mostrar menu completo com categorias e itens
+        desenhar_cabecalho(tela, "RESTAURANTE ITALIANO - MENU DO DIA")
+        with perfilador.intervalo("desenhar_menu"):
+            desenhar_menu(tela)
+    elif estado_atual == "pedido":
+        # Mostrar pedido atual do cliente
+        desenhar_cabecalho(tela, "SEU PEDIDO")
+        with perfilador.intervalo("desenhar_pedido"):
+            desenhar_pedido(tela)
+    elif estado_atual == "conta":
+        # Mostrar conta final a pagar
+        desenhar_cabecalho(tela, "OBRIGADO PELA VISITA!")
+        with perfilador.intervalo("desenhar_conta"):
+            desenhar_conta(tela)
+    
+    # Desenhar os botões de ação
+    for botao in botoes:
+        botao.desenhar(tela)
+    
+    # Desenhar informações no rodapé
+    desenhar_rodape(tela)
+    
+    # Desenhar pop-up de confirmação se estiver visível
+    if popup_visivel:
+        with perfilador.intervalo("desenhar_popup"):
+            desenhar_popup(tela)
+    
+    clip_base = None
+    tela.set_clip(None)
+
+def clicar_item_menu(pos):
+    """Seleciona o item do menu clicado (pesquisa binária na lista do menu)."""
+    global item_selecionado
+    
+    item_index = item_menu_na_posicao(pos)
+    if item_index is not None and item_selecionado != item_index:
+        anterior = None
+        if item_selecionado is not None:
+            itens_menu_obj[item_selecionado].selecionado = False
+            anterior = rect_item_menu(item_selecionado)
+        item_selecionado = item_index
+        marcar_selecao_alterada(anterior, rect_item_menu(item_index))
+
+def clicar_item_pedido(pos):
+    """Seleciona (ou deseleciona) o item do pedido clicado."""
+    global item_pedido_selecionado
+    
+    i = item_pedido_na_posicao(pos)
+    if i is not None:
+        anterior = None
+        if item_pedido_selecionado is not None:
+            anterior = rect_item_pedido(item_pedido_selecionado)
+        # Toggle selection (selecionar ou deselecionar)
+        if item_pedido_selecionado == i:
+            item_pedido_selecionado = None  # Deselecionar
+        else:
+            item_pedido_selecionado = i  # Selecionar novo item
+        marcar_selecao_alterada(anterior, rect_item_pedido(i))
+
+def registar_regioes_clique(grade):
+    """
+    Preenche a grelha do roteador com as regiões clicáveis do estado atual.
+    Com um pop-up aberto só os botões dele existem (modal); senão, a lista
+    da vista (menu ou pedido) e, por cima, os botões de ação.
+    """
+    if popup_atual is not None:
+        popup = popup_atual
+        for botao in popup.botoes.values():
+            grade.adicionar(botao.rect, lambda pos, b=botao: b.acao(),
+                            lambda ativo, b=botao: popup.definir_hover(b, ativo))
+        return
+    
+    if estado_atual == "menu":
+        grade.adicionar(area_conteudo(), clicar_item_menu)
+    elif estado_atual == "pedido":
+        grade.adicionar(area_conteudo(), clicar_item_pedido)
+    
+    def hover_botao(botao, ativo):
+        if botao.definir_hover(ativo):
+            marcar_regiao_suja(botao.rect)
+    
+    for botao in botoes:
+        grade.adicionar(botao.rect, botao.verificar_clique, lambda ativo, b=botao: hover_botao(b, ativo))
+    
+    if NUM_MESAS > 1:
+        grade.adicionar(layout_atual().etiqueta_mesa, lambda pos: abrir_popup_mesas())
+
+def clicar_botao_esquerdo(event):
+    """Clique do botão esquerdo: executa a ação da região sob o mouse."""
+    if event.button == 1:
+        roteador.clicar(event.pos)
+
+def tecla_mesa(event):
+    """PageUp/PageDown: passar para a mesa anterior/seguinte."""
+    if event.key == pygame.K_PAGEUP:
+        mudar_de_mesa(mesa_vizinha(-1))
+    elif event.key == pygame.K_PAGEDOWN:
+        mudar_de_mesa(mesa_vizinha(1))
+
+def tecla_premida(event):
+    """
+    Atalhos de teclado: F2 abre/fecha o ecrã da cozinha, F3 o overlay do
+    perfilador, F4 exporta o perfil e PageUp/PageDown mudam de mesa.
+    """
+    if event.key == pygame.K_F2:
+        alternar_ecra_cozinha()
+    elif event.key == pygame.K_F3:
+        alternar_overlay_perfilador()
+    elif event.key == pygame.K_F4:
+        exportar_perfil()
+    elif NUM_MESAS > 1 and popup_atual is None:
+        tecla_mesa(event)
+
+def registar_handlers():
+    """Regista no roteador os handlers de eventos de cada estado."""
+    roteador.registar(None, pygame.QUIT, lambda event: sair_programa())
+    roteador.registar(None, pygame.VIDEORESIZE, lambda event: pedir_redimensionamento(event.w, event.h))
+    # A janela voltou a ficar visível: o conteúdo tem de ser reposto
+    roteador.registar(None, pygame.VIDEOEXPOSE, lambda event: marcar_tela_suja())
+    roteador.registar(None, pygame.WINDOWEXPOSED, lambda event: marcar_tela_suja())
+    for estado in ("menu", "pedido", "conta", "popup"):
+        roteador.registar(estado, pygame.MOUSEBUTTONDOWN, clicar_botao_esquerdo)
+    roteador.registar(None, pygame.KEYDOWN, tecla_premida)
 
 def main():
     """
     Loop principal da aplicação.
     Processa eventos, atualiza estado e desenha a interface.
     """
-    global item_selecionado, estado_atual, scroll_y, LARGURA, ALTURA
-    global item_pedido_selecionado, quantidade_a_remover, scroll_pedido_y, scroll_conta_y
+    global aplicacao, vigia_catalogo
+    
+    # Ler o catálogo do menu (o diário e as sessões precisam dos ids dos itens)
+    carregar_menu()
+    
+    # Criar a janela (define LARGURA e ALTURA usadas pelos elementos da interface)
+    aplicacao = Aplicacao()
+    aplicacao.iniciar_display()
+    
+    # Repor o pedido guardado no diário (ex.: depois de uma falha)
+    if USAR_DIARIO_PEDIDOS:
+        iniciar_diario()
+    if USAR_REGISTO_VENDAS:
+        iniciar_registo_vendas()
+    # Com várias mesas, um pedido aberto por mesa
+    if NUM_MESAS > 1:
+        iniciar_sessoes()
+    # Com servidor, o pedido da mesa vem dele (partilhado com os outros terminais)
+    if SERVIDOR_PEDIDOS:
+        iniciar_cliente_pedidos()
+    if USAR_RECIBOS:
+        iniciar_recibos()
+    # Os pedidos pagos seguem para as estações da cozinha
+    if USAR_COZINHA:
+        iniciar_cozinha()
     
     # Inicializar elementos da interface
     criar_itens_menu()
     criar_botoes()
+    registar_handlers()
+    if estado_atual == "pedido":
+        criar_itens_pedido()
+    elif estado_atual == "conta":
+        criar_conta_scrollbar()
     
-    # Clock para controlar frame rate (60 FPS)
-    clock = pygame.time.Clock()
+    # Vigiar o ficheiro do catálogo para aplicar alterações sem reiniciar
+    if RECARREGAR_CATALOGO:
+        vigia_catalogo = VigiaCatalogo(FICHEIRO_CATALOGO, INTERVALO_VIGIA_CATALOGO)
     
-    # Dicionário para guardar retângulos dos botões do pop-up
-    popup_botoes = {}
+    if PERFIL_AO_ARRANCAR:
+        perfilador.ligar()
+    
+    # Agendador que controla o frame rate (60 FPS só quando há animação)
+    agendador = AgendadorFrames()
+    animando = True
     
     while True:
-        pos_mouse = pygame.mouse.get_pos()
-        
-        # Coletar todos os eventos do PyGame
-        eventos = []
-        for event in pygame.event.get():
-            eventos.append(event)
-            
-            if event.type == pygame.QUIT:
-                # Utilizador fecha a janela
-                pygame.quit()
-                sys.exit()
-            
-            elif event.type == pygame.VIDEORESIZE:
-                # Utilizador redimensiona a janela
-                redimensionar_tela(event.w, event.h)
-            
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Botão esquerdo do mouse
-                    # Se pop-up está visível, processar cliques nele primeiro
-                    if popup_visivel:
-                        # ===== POP-UP DE REMOÇÃO =====
-                        if popup_tipo == "remover":
-                            if 'menos' in popup_botoes and popup_botoes['menos'].collidepoint(pos_mouse):
-                                # Botão para diminuir quantidade
-                                if quantidade_a_remover > 1:
-                                    quantidade_a_remover -= 1
-                            elif 'mais' in popup_botoes and popup_botoes['mais'].collidepoint(pos_mouse):
-                                # Botão para aumentar quantidade
-                                if item_para_remover and quantidade_a_remover < item_para_remover['quantidade']:
-                                    quantidade_a_remover += 1
-                            elif 'cancelar' in popup_botoes and popup_botoes['cancelar'].collidepoint(pos_mouse):
-                                # Botão para cancelar a remoção
-                                cancelar_remocao()
-                            elif 'confirmar' in popup_botoes and popup_botoes['confirmar'].collidepoint(pos_mouse):
-                                # Botão para confirmar a remoção
-                                confirmar_remocao()
-                        
-                        # ===== POP-UP DE PAGAMENTO =====
-                        elif popup_tipo == "pagamento":
-                            if 'numerario' in popup_botoes and popup_botoes['numerario'].collidepoint(pos_mouse):
-                                # Botão pagamento em numerário
-                                confirmar_pagamento_numerario()
-                            elif 'cartao' in popup_botoes and popup_botoes['cartao'].collidepoint(pos_mouse):
-                                # Botão pagamento em cartão
-                                confirmar_pagamento_cartao()
-                            elif 'cancelar' in popup_botoes and popup_botoes['cancelar'].collidepoint(pos_mouse):
-                                # Botão para cancelar (voltar ao pedido)
-                                cancelar_popup_pagamento()
-                        
-                        # Não processar mais cliques se o pop-up está aberto
-                        continue
-                    
-                    # Verificar clique nos botões principais
-                    for botao in botoes:
-                        if botao.verificar_clique(pos_mouse):
-                            break
-                    
-                    # Verificar clique nos itens do menu (apenas no estado "menu")
-                    if estado_atual == "menu":
-                        mouse_y_ajustado = pos_mouse[1] + scroll_y
-                        y = 120
-                        categoria_atual = None
-                        item_index = 0
-                        
-                        # Procurar qual item foi clicado
-                        for nome, preco, categoria in menu:
-                            if categoria != categoria_atual:
-                                categoria_atual = categoria
-                                y += 50
-                            
-                            item_rect = pygame.Rect(100, y, LARGURA - 200, 40)
-                            item_rect_na_tela = pygame.Rect(100, y - scroll_y, LARGURA - 200, 40)
-                            
-                            # Verificar se o item está visível e foi clicado
-                            if (item_rect_na_tela.top < ALTURA - 100 and 
-                                item_rect_na_tela.bottom > 120):
-                                
-                                if item_rect_na_tela.collidepoint(pos_mouse):
-                                    item_selecionado = item_index
-                                    break
-                            
-                            y += 45
-                            item_index += 1
-                    
-                    # Verificar clique nos itens do pedido (apenas no estado "pedido")
-                    elif estado_atual == "pedido":
-                        # Procurar qual item do pedido foi clicado
-                        for i, item_obj in enumerate(itens_pedido_obj):
-                            if item_obj['rect'] and item_obj['rect'].collidepoint(pos_mouse):
-                                # Toggle selection (selecionar ou deselecionar)
-                                if item_pedido_selecionado == i:
-                                    item_pedido_selecionado = None  # Deselecionar
-                                else:
-                                    item_pedido_selecionado = i  # Selecionar novo item
-                                break
+        # Esperar pelo próximo frame e coletar todos os eventos do PyGame
+        # (o tempo a dormir não conta para o perfilador)
+        eventos = agendador.obter_eventos(animando)
+        perfilador.iniciar_frame()
         
-        # Atualizar estado visual dos botões (hover effect)
-        for botao in botoes:
-            botao.atualizar(pos_mouse)
+        with perfilador.intervalo("eventos"):
+            # Coalescer os movimentos e encaminhar cada evento para o handler do estado atual
+            eventos = roteador.processar(eventos)
+            # Hover dos botões (ou dos botões do pop-up) pela grelha de regiões
+            roteador.atualizar_hover(pygame.mouse.get_pos())
         
-        # ===== DESENHO DA INTERFACE =====
-        # Limpar a tela
-        TELA.fill(COR_FUNDO)
-        # Desenhar moldura decorativa
-        desenhar_moldura(TELA)
+        if popup_atual is None:
+            # Atualizar scroll da vista atual (roda do mouse e arrastamento);
+            # com o pop-up modal aberto a vista por baixo não faz scroll
+            atualizar_scroll(eventos)
         
-        # Desenhar conteúdo específico baseado no estado atual
-        if estado_atual == "menu":
-            # Mostrar menu completo com categorias e itens
-            desenhar_cabecalho(TELA, "RESTAURANTE ITALIANO - MENU DO DIA")
-            desenhar_menu(TELA, eventos)
-        elif estado_atual == "pedido":
-            # Mostrar pedido atual do cliente
-            desenhar_cabecalho(TELA, "SEU PEDIDO")
-            desenhar_pedido(TELA, eventos)
-        elif estado_atual == "conta":
-            # Mostrar conta final a pagar
-            desenhar_cabecalho(TELA, "OBRIGADO PELA VISITA!")
-            desenhar_conta(TELA, eventos)
+        # Reconstruir a interface só quando a janela deixou de mudar de tamanho
+        with perfilador.intervalo("redimensionamento"):
+            a_redimensionar = aplicar_redimensionamento_pendente()
         
-        # Desenhar os botões de ação
-        for botao in botoes:
-            botao.desenhar(TELA)
+        with perfilador.intervalo("verificacoes"):
+            # Aplicar alterações do ficheiro do catálogo (preços, itens, traduções)
+            verificar_catalogo()
+            # Aplicar alterações do pedido da mesa feitas noutros terminais
+            verificar_servidor()
+            # Enviar os pedidos em espera e mostrar os talões novos da cozinha
+            verificar_cozinha()
         
-        # Desenhar informações no rodapé
-        desenhar_rodape(TELA)
+        # ===== DESENHO DA INTERFACE =====
+        if REDESENHO_COMPLETO:
+            # Modo antigo: redesenhar e enviar a tela inteira em cada frame
+            with perfilador.intervalo("desenhar_cena"):
+                desenhar_cena(aplicacao.tela)
+            with perfilador.intervalo("display.flip"):
+                pygame.display.flip()
+        else:
+            # Redesenhar e enviar apenas as regiões que mudaram
+            regioes = regioes_sujas.recolher(LARGURA, ALTURA)
+            if regioes:
+                with perfilador.intervalo("desenhar_cena"):
+                    desenhar_cena(aplicacao.tela, regioes)
+                with perfilador.intervalo("display.update"):
+                    pygame.display.update(regioes)
+        perfilador.terminar_frame()
         
-        # Desenhar pop-up de confirmação se estiver visível
-        if popup_visivel:
-            popup_botoes = desenhar_popup(TELA)
+        if overlay_perfilador:
+            # Fora do frame medido: o overlay não entra nas próprias medições
+            pygame.display.update(desenhar_overlay_perfilador(aplicacao.tela))
         
-        # Atualizar a tela para mostrar o desenho
-        pygame.display.flip()
-        # Controlar velocidade (60 FPS)
-        clock.tick(60)
+        # Manter 60 FPS apenas enquanto o scroll se move (arrastar, roda, inércia)
+        # ou há um redimensionamento à espera
+        barra = obter_scrollbar_ativa() if popup_atual is None else None
+        animando = (REDESENHO_COMPLETO
+                    or a_redimensionar
+                    or (barra is not None and not barra.esta_inativo())
+                    or regioes_sujas.pendente())
 
 # ================================
 # PONTO DE ENTRADA DA APLICAÇÃO
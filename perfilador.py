@@ -0,0 +1,181 @@
+"""
+PERFILADOR - MENU DO RESTAURANTE
+
+Mede onde vai o tempo de cada frame: intervalos com nome à volta de cada
+fase do loop principal (eventos, scroll, desenho, envio para o ecrã, ...),
+contadores de operações caras (textos rasterizados, superfícies criadas) e o
+tempo total de cada frame. Os últimos frames ficam guardados para o gráfico
+do overlay da aplicação (F3) e os intervalos podem ser exportados para um
+ficheiro JSON no formato Chrome Trace (abre em chrome://tracing ou no
+Perfetto), para analisar um terminal lento no local.
+
+Desligado, o perfilador quase não custa nada: intervalo() retorna sempre o
+mesmo contexto vazio (sem ler o relógio nem criar objetos) e contar(),
+iniciar_frame() e terminar_frame() só testam `ativo`.
+
+    perfilador = Perfilador()
+    perfilador.iniciar_frame()
+    with perfilador.intervalo("desenho"):
+        desenhar_cena(tela)
+    perfilador.contar("font.render")
+    perfilador.terminar_frame()
+    perfilador.exportar_chrome_trace("perfil.json")
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+FRAMES_GUARDADOS = 240  # Frames mostrados no gráfico (4 s a 60 FPS)
+MAX_EVENTOS = 50000  # Intervalos guardados para exportar (os mais antigos são descartados)
+
+# ================================
+# INTERVALOS
+# ================================
+
+class _IntervaloNulo:
+    """Contexto vazio usado com o perfilador desligado (partilhado, não faz nada)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traceback):
+        return False
+
+_INTERVALO_NULO = _IntervaloNulo()
+
+class _Intervalo:
+    """Mede o tempo entre a entrada e a saída do bloco `with` e regista-o no perfilador."""
+    __slots__ = ("perfilador", "nome", "inicio")
+
+    def __init__(self, perfilador, nome):
+        self.perfilador = perfilador
+        self.nome = nome
+        self.inicio = 0
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, valor, traceback):
+        self.perfilador.registar(self.nome, self.inicio, time.perf_counter_ns())
+        return False
+
+# ================================
+# PERFILADOR
+# ================================
+
+class Perfilador:
+    """
+    Recolhe os intervalos e contadores de cada frame enquanto está ativo.
+    `frames` guarda, para os últimos frames, (duração em ms, {fase: ms},
+    {contador: valor}); `eventos` guarda os intervalos para exportar, como
+    (nome, início ns, duração ns, thread), num buffer circular.
+    """
+    def __init__(self, frames_guardados=FRAMES_GUARDADOS, max_eventos=MAX_EVENTOS):
+        self.ativo = False
+        self.frames = deque(maxlen=frames_guardados)
+        self.eventos = deque(maxlen=max_eventos)
+        self.contadores_frames = deque(maxlen=max_eventos // 8)  # (instante ns, contadores) por frame
+        self.fases = {}  # Fase -> ns acumulados no frame em curso
+        self.contadores = {}  # Contador -> valor no frame em curso
+        self.inicio_frame = None  # perf_counter_ns do início do frame em curso
+        self.origem = time.perf_counter_ns()  # Instante zero dos eventos exportados
+        self.nomes_threads = {threading.get_ident(): threading.current_thread().name}
+
+    def ligar(self):
+        """Começa a medir (a partir do próximo frame)."""
+        self.ativo = True
+        self.inicio_frame = None
+
+    def desligar(self):
+        """Pára de medir; os frames e eventos já recolhidos ficam guardados."""
+        self.ativo = False
+        self.inicio_frame = None
+        self.fases = {}
+        self.contadores = {}
+
+    def intervalo(self, nome):
+        """Contexto `with` que mede um intervalo com o nome dado (vazio se desligado)."""
+        if not self.ativo:
+            return _INTERVALO_NULO
+        return _Intervalo(self, nome)
+
+    def registar(self, nome, inicio_ns, fim_ns):
+        """Regista um intervalo já medido (ex.: por código que não usa `with`)."""
+        if not self.ativo:
+            return
+        duracao = fim_ns - inicio_ns
+        self.fases[nome] = self.fases.get(nome, 0) + duracao
+        thread = threading.get_ident()
+        if thread not in self.nomes_threads:
+            self.nomes_threads[thread] = threading.current_thread().name
+        self.eventos.append((nome, inicio_ns, duracao, thread))
+
+    def contar(self, nome, quantidade=1):
+        """Soma `quantidade` a um contador do frame em curso."""
+        if self.ativo:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def iniciar_frame(self):
+        """Marca o início de um frame."""
+        if self.ativo:
+            self.inicio_frame = time.perf_counter_ns()
+
+    def terminar_frame(self):
+        """Fecha o frame em curso: guarda a duração, as fases e os contadores."""
+        if not self.ativo or self.inicio_frame is None:
+            return
+        fim = time.perf_counter_ns()
+        self.registar("frame", self.inicio_frame, fim)
+        duracao = self.fases.pop("frame")
+        self.frames.append((duracao / 1e6, {nome: ns / 1e6 for nome, ns in self.fases.items()},
+                            self.contadores))
+        self.contadores_frames.append((fim, self.contadores))
+        self.fases = {}
+        self.contadores = {}
+        self.inicio_frame = None
+
+    def resumo(self):
+        """
+        Retorna (média, p95, máximo) da duração dos frames guardados em ms e o
+        último frame (duração, fases, contadores), ou None se não há frames.
+        """
+        if not self.frames:
+            return None
+        duracoes = sorted(frame[0] for frame in self.frames)
+        p95 = duracoes[min(len(duracoes) - 1, int(0.95 * len(duracoes)))]
+        return sum(duracoes) / len(duracoes), p95, duracoes[-1], self.frames[-1]
+
+    def exportar_chrome_trace(self, caminho):
+        """
+        Grava os intervalos e contadores guardados no formato Chrome Trace
+        (JSON com "traceEvents"; tempos em microssegundos). Retorna o número
+        de eventos gravados.
+        """
+        pid = os.getpid()
+        eventos = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": thread, "args": {"name": nome}}
+                   for thread, nome in self.nomes_threads.items()]
+        for nome, inicio, duracao, thread in list(self.eventos):
+            eventos.append({"name": nome, "ph": "X", "pid": pid, "tid": thread,
+                            "ts": (inicio - self.origem) / 1000, "dur": duracao / 1000})
+        for instante, contadores in list(self.contadores_frames):
+            if contadores:
+                eventos.append({"name": "contadores", "ph": "C", "pid": pid,
+                                "ts": (instante - self.origem) / 1000, "args": contadores})
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+        os.replace(temporario, caminho)
+        return len(eventos)
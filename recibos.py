@@ -0,0 +1,367 @@
+"""
+RECIBOS - MENU DO RESTAURANTE
+
+Gera o recibo de uma conta paga em três formatos, todos a partir do mesmo
+modelo da conta (as linhas agrupadas do pedido, o total e o IVA por taxa):
+
+    texto   recibo em texto simples, com a largura de um talão de 80 mm
+    escpos  bytes ESC/POS para impressoras térmicas (escritos num ficheiro
+            .bin ou diretamente no dispositivo da impressora, ex.: /dev/usb/lp0)
+    pdf     PDF de uma página com a largura do talão (fonte Courier)
+
+Os modelos das linhas são compilados uma vez (ModeloRecibo), e os recibos são
+gerados e escritos por uma thread em segundo plano com uma fila limitada:
+imprimir() nunca bloqueia, por isso o loop da interface não espera pela
+impressora nem pelo disco.
+
+Uso:
+    python recibos.py                    (mostra um recibo de exemplo em texto)
+    python recibos.py --teste 1000       (gera 1000 recibos nos três formatos e mostra o tempo)
+"""
+
+import argparse
+import os
+import queue
+import string
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from catalogo import formatar_euros
+from sessoes import nome_seguro
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+LARGURA_TEXTO = 42  # Colunas de um talão de 80 mm (fonte A das impressoras térmicas)
+TAMANHO_FILA = 256  # Recibos à espera da thread de impressão
+FORMATOS = ("texto", "escpos", "pdf")
+EXTENSOES = {"texto": ".txt", "escpos": ".bin", "pdf": ".pdf"}
+
+NOMES_METODOS = {"numerario": "Numerário", "cartao": "Cartão"}
+
+# Linha do recibo: nome do item, quantidade, preço unitário e subtotal (cêntimos)
+LinhaRecibo = namedtuple("LinhaRecibo", "nome quantidade preco subtotal")
+
+# Conta a imprimir: nome do restaurante, mesa, data/hora do pagamento
+# (time.time), linhas, total (cêntimos), IVA por taxa como tuplas
+# (taxa, base, iva, total) e método de pagamento ("numerario" ou "cartao")
+Conta = namedtuple("Conta", "restaurante mesa momento linhas total iva metodo")
+
+# ================================
+# MODELOS COMPILADOS
+# ================================
+
+class Modelo:
+    """
+    Modelo de uma linha no formato de str.format ("{nome:<30.30}{valor:>10}"),
+    partido uma só vez em pedaços fixos e campos; preencher() só formata os
+    valores, sem voltar a analisar o texto do modelo.
+    """
+    def __init__(self, texto):
+        self.partes = [(fixo, campo, formato or "")
+                       for fixo, campo, formato, _ in string.Formatter().parse(texto)]
+
+    def preencher(self, **valores):
+        """Retorna a linha com os valores dados."""
+        return "".join(fixo if campo is None else fixo + format(valores[campo], formato)
+                       for fixo, campo, formato in self.partes)
+
+class ModeloRecibo:
+    """
+    Modelos das linhas do recibo para uma largura (em colunas), compilados uma
+    vez e reutilizados em todos os recibos. linhas() dá as linhas do recibo
+    com o seu estilo, que cada formato traduz à sua maneira.
+    """
+    def __init__(self, largura=LARGURA_TEXTO):
+        self.largura = largura
+        valor = 10  # Colunas dos valores em euros, à direita
+        nome = largura - valor - 5  # "NNNx " antes do nome
+        self.item = Modelo(f"{{quantidade:>3}}x {{nome:<{nome}.{nome}}}{{subtotal:>{valor}}}")
+        self.preco_unitario = Modelo("      {preco} cada")
+        self.total = Modelo(f"{{rotulo:<{largura - valor}}}{{total:>{valor}}}")
+        self.iva = Modelo(f"IVA {{taxa:>2}}%  base {{base:>{valor}}}  IVA {{iva:>{valor}}}")
+        self.mesa = Modelo(f"Mesa {{mesa:<{largura // 2 - 5}}}{{data:>{largura - largura // 2}}}")
+        self.separador = "-" * largura
+
+    def linhas(self, conta):
+        """
+        Retorna as linhas do recibo como (estilo, texto); estilos: "titulo",
+        "centro", "normal" e "total".
+        """
+        data = time.strftime("%d/%m/%Y %H:%M", time.localtime(conta.momento))
+        linhas = [("titulo", conta.restaurante),
+                  ("normal", self.mesa.preencher(mesa=conta.mesa, data=data)),
+                  ("normal", self.separador)]
+        for linha in conta.linhas:
+            linhas.append(("normal", self.item.preencher(quantidade=linha.quantidade, nome=linha.nome,
+                                                         subtotal=formatar_euros(linha.subtotal))))
+            if linha.quantidade > 1:
+                linhas.append(("normal", self.preco_unitario.preencher(preco=formatar_euros(linha.preco))))
+        linhas.append(("normal", self.separador))
+        linhas.append(("total", self.total.preencher(rotulo="TOTAL", total=formatar_euros(conta.total))))
+        for taxa, base, iva, _ in conta.iva:
+            linhas.append(("normal", self.iva.preencher(taxa=taxa, base=formatar_euros(base),
+                                                        iva=formatar_euros(iva))))
+        if conta.metodo:
+            linhas.append(("normal", f"Pagamento: {NOMES_METODOS.get(conta.metodo, conta.metodo)}"))
+        linhas.append(("centro", "Obrigado! Volte sempre!"))
+        return linhas
+
+# ================================
+# FORMATOS
+# ================================
+
+def gerar_texto(modelo, conta):
+    """Recibo em texto simples (UTF-8), com os títulos centrados."""
+    saida = []
+    for estilo, texto in modelo.linhas(conta):
+        saida.append(texto.center(modelo.largura).rstrip() if estilo in ("titulo", "centro") else texto)
+    return ("\n".join(saida) + "\n").encode("utf-8")
+
+# Comandos ESC/POS
+ESC_INICIAR = b"\x1b@"
+ESC_TABELA_CP858 = b"\x1bt\x13"  # Página de código 19 (CP858, com o símbolo do euro)
+ESC_ALINHAR = {"esquerda": b"\x1ba\x00", "centro": b"\x1ba\x01"}
+ESC_NEGRITO = (b"\x1bE\x00", b"\x1bE\x01")
+GS_TAMANHO = {"normal": b"\x1d!\x00", "duplo": b"\x1d!\x11", "alto": b"\x1d!\x01"}
+GS_CORTAR = b"\x1dVB\x03"  # Avançar 3 linhas e cortar o papel
+
+def gerar_escpos(modelo, conta):
+    """Recibo em bytes ESC/POS (texto em CP858), com o título e o total destacados e corte no fim."""
+    saida = [ESC_INICIAR, ESC_TABELA_CP858]
+    for estilo, texto in modelo.linhas(conta):
+        if estilo == "titulo":
+            comandos = ESC_ALINHAR["centro"] + ESC_NEGRITO[1] + GS_TAMANHO["duplo"]
+        elif estilo == "centro":
+            comandos = ESC_ALINHAR["centro"] + ESC_NEGRITO[0] + GS_TAMANHO["normal"]
+        elif estilo == "total":
+            comandos = ESC_ALINHAR["esquerda"] + ESC_NEGRITO[1] + GS_TAMANHO["alto"]
+        else:
+            comandos = ESC_ALINHAR["esquerda"] + ESC_NEGRITO[0] + GS_TAMANHO["normal"]
+        saida.append(comandos + texto.encode("cp858", errors="replace") + b"\n")
+    saida.append(GS_TAMANHO["normal"] + ESC_NEGRITO[0] + GS_CORTAR)
+    return b"".join(saida)
+
+def _texto_pdf(texto):
+    """Texto de uma linha como string literal do PDF (WinAnsi, com \\, ( e ) escapados)."""
+    dados = texto.encode("cp1252", errors="replace")
+    return b"(" + dados.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def gerar_pdf(modelo, conta, tamanho_fonte=8):
+    """
+    Recibo em PDF: uma página com a largura do talão e a altura das linhas,
+    em Courier (a mesma grelha de colunas do texto), sem bibliotecas externas.
+    """
+    linhas = modelo.linhas(conta)
+    margem = 12
+    entrelinha = tamanho_fonte * 1.25
+    largura = round(modelo.largura * tamanho_fonte * 0.6 + 2 * margem)  # Courier: 0,6 em por carácter
+    altura = round(len(linhas) * entrelinha + 2 * margem + tamanho_fonte)
+
+    conteudo = [b"BT", b"%.2f TL" % entrelinha, b"%d %d Td" % (margem, altura - margem - tamanho_fonte)]
+    for estilo, texto in linhas:
+        if estilo in ("titulo", "centro"):
+            texto = texto.center(modelo.largura).rstrip()
+        fonte = b"/F2" if estilo in ("titulo", "total") else b"/F1"
+        conteudo.append(b"%s %d Tf %s Tj T*" % (fonte, tamanho_fonte, _texto_pdf(texto)))
+    conteudo.append(b"ET")
+    fluxo = b"\n".join(conteudo)
+
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> >>" % (largura, altura),
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(fluxo), fluxo),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n%s\nendobj\n" % (numero, objeto)
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for posicao in posicoes:
+        saida += b"%010d 00000 n \n" % posicao
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(saida)
+
+GERADORES = {"texto": gerar_texto, "escpos": gerar_escpos, "pdf": gerar_pdf}
+
+# ================================
+# IMPRESSORA DE RECIBOS
+# ================================
+
+class ImpressoraRecibos:
+    """
+    Gera e guarda os recibos numa thread em segundo plano. imprimir() coloca a
+    conta numa fila limitada e retorna logo; a thread gera cada formato com os
+    modelos já compilados e grava um ficheiro por formato em
+    pasta/AAAA-MM-DD/. Com um dispositivo, os bytes ESC/POS são escritos nele
+    (a impressora, ou um ficheiro que a substitui) em vez de num ficheiro .bin.
+    """
+    def __init__(self, pasta, dispositivo=None, formatos=FORMATOS, largura=LARGURA_TEXTO,
+                 tamanho_fila=TAMANHO_FILA):
+        self.pasta = pasta
+        self.dispositivo = dispositivo
+        self.formatos = tuple(formatos)
+        self.modelo = ModeloRecibo(largura)
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.impressos = 0
+        self.descartados = 0  # Recibos perdidos por a fila estar cheia
+        self.formatos_falhados = 0  # Formatos não gravados (ex.: impressora desligada); os outros gravam-se
+        self.tempo_total = 0.0  # Segundos gastos a gerar e gravar recibos
+        self.erro = None  # Último erro de escrita (a thread continua)
+        self._thread = threading.Thread(target=self._trabalhar, name="impressora-recibos", daemon=True)
+        self._thread.start()
+
+    def imprimir(self, conta):
+        """Pede o recibo de uma conta. Nunca bloqueia; retorna False se o recibo foi descartado."""
+        try:
+            self.fila.put_nowait(conta)
+        except queue.Full:
+            self.descartados += 1
+            return False
+        return True
+
+    def sincronizar(self, tempo_maximo=5.0):
+        """Espera até todos os recibos pedidos estarem gravados."""
+        if self._thread is None:
+            return False
+        feito = threading.Event()
+        try:
+            self.fila.put(feito, timeout=tempo_maximo)
+        except queue.Full:
+            return False
+        return feito.wait(tempo_maximo)
+
+    def fechar(self, tempo_maximo=2.0):
+        """Grava os recibos em espera e pára a thread."""
+        if self._thread is None:
+            return
+        try:
+            self.fila.put(None, timeout=tempo_maximo)
+        except queue.Full:
+            pass
+        self._thread.join(tempo_maximo)
+        self._thread = None
+
+    def _trabalhar(self):
+        """Ciclo da thread: gera e grava cada recibo da fila (None termina)."""
+        while True:
+            conta = self.fila.get()
+            if conta is None:
+                return
+            if isinstance(conta, threading.Event):
+                conta.set()  # Pedido de sincronizar: tudo o que veio antes já foi gravado
+                continue
+            inicio = time.perf_counter()
+            try:
+                self._gravar(conta)
+                self.impressos += 1
+            except Exception as erro:
+                # Qualquer erro perde só este recibo: a thread continua com os seguintes
+                self.erro = erro
+                self.formatos_falhados += len(self.formatos)
+            self.tempo_total += time.perf_counter() - inicio
+
+    def _gravar(self, conta):
+        """
+        Gera os formatos de um recibo e grava-os (ficheiros novos por ficheiro
+        temporário + rename). Cada formato é gerado e gravado à parte: se um
+        falhar (ex.: a impressora está desligada), os outros são gravados na
+        mesma. O nome da mesa é escapado no nome do ficheiro, como nas sessões.
+        """
+        local = time.localtime(conta.momento)
+        pasta = os.path.join(self.pasta, time.strftime("%Y-%m-%d", local))
+        os.makedirs(pasta, exist_ok=True)
+        milissegundos = int(conta.momento * 1000) % 1000
+        nome = f"recibo_{time.strftime('%H%M%S', local)}{milissegundos:03d}_mesa{nome_seguro(conta.mesa)}_{self.impressos + 1}"
+        for formato in self.formatos:
+            try:
+                dados = GERADORES[formato](self.modelo, conta)
+                if formato == "escpos" and self.dispositivo:
+                    with open(self.dispositivo, "ab") as impressora:
+                        impressora.write(dados)
+                else:
+                    self._gravar_ficheiro(pasta, nome + EXTENSOES[formato], dados)
+            except Exception as erro:
+                self.erro = erro
+                self.formatos_falhados += 1
+
+    @staticmethod
+    def _gravar_ficheiro(pasta, nome, dados):
+        """Grava um ficheiro novo por ficheiro temporário + rename (o temporário é apagado se falhar)."""
+        descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(descritor, "wb") as ficheiro:
+                ficheiro.write(dados)
+            os.replace(temporario, os.path.join(pasta, nome))
+        except Exception:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            raise
+
+    def estatisticas(self):
+        """Retorna os recibos impressos, descartados e em espera, os formatos falhados e o tempo médio por recibo."""
+        return {
+            'impressos': self.impressos,
+            'descartados': self.descartados,
+            'formatos_falhados': self.formatos_falhados,
+            'em_espera': self.fila.qsize(),
+            'tempo_medio_ms': self.tempo_total / self.impressos * 1000 if self.impressos else 0.0,
+            'erro': str(self.erro) if self.erro else None,
+        }
+
+# ================================
+# LINHA DE COMANDO
+# ================================
+
+def conta_exemplo(mesa="4"):
+    """Conta de exemplo (pizzas, massa, bebidas e sobremesa) para testes."""
+    linhas = [
+        LinhaRecibo("Pizza Margherita", 2, 900, 1800),
+        LinhaRecibo("Spaghetti alla Carbonara", 1, 1300, 1300),
+        LinhaRecibo("Vino Rosso della Casa (copo)", 3, 450, 1350),
+        LinhaRecibo("Tiramisù", 2, 600, 1200),
+    ]
+    iva = [(13, 3805, 495, 4300), (23, 1098, 252, 1350)]
+    return Conta("RESTAURANTE ITALIANO", mesa, time.time(), linhas, 5650, iva, "cartao")
+
+def main(argumentos=None):
+    """Mostra um recibo de exemplo ou mede a geração de recibos."""
+    parser = argparse.ArgumentParser(description="Recibos das contas (texto, ESC/POS e PDF).")
+    parser.add_argument("--teste", type=int, metavar="RECIBOS",
+                        help="gerar este número de recibos nos três formatos numa pasta temporária")
+    args = parser.parse_args(argumentos)
+
+    if not args.teste:
+        print(gerar_texto(ModeloRecibo(), conta_exemplo()).decode("utf-8"), end="")
+        return 0
+
+    with tempfile.TemporaryDirectory() as pasta:
+        impressora = ImpressoraRecibos(pasta, tamanho_fila=args.teste + 1)
+        inicio = time.perf_counter()
+        for n in range(args.teste):
+            impressora.imprimir(conta_exemplo(str(n % 30 + 1)))
+        enfileirar = time.perf_counter() - inicio
+        impressora.sincronizar(tempo_maximo=600)
+        duracao = time.perf_counter() - inicio
+        estatisticas = impressora.estatisticas()
+        impressora.fechar()
+    print(f"{estatisticas['impressos']} recibos em {duracao:.2f} s "
+          f"({estatisticas['impressos'] / duracao:.0f} recibos/s, "
+          f"{estatisticas['tempo_medio_ms']:.2f} ms por recibo nos três formatos)")
+    print(f"imprimir() na thread da interface: {enfileirar / args.teste * 1e6:.1f} µs por recibo")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,566 @@
+"""
+SERVIDOR DE PEDIDOS - MENU DO RESTAURANTE
+
+Serviço de pedidos partilhado pelos terminais (tablets) da sala: cada mesa
+tem um único pedido, guardado no servidor, e qualquer terminal pode
+alterá-lo. Os terminais que subscrevem uma mesa recebem o estado novo
+sempre que outro terminal a altera. Só usa a biblioteca padrão (asyncio e
+sockets), por isso corre em localhost ou numa rede local sem mais nada.
+
+Protocolo: cada mensagem é um objeto JSON compacto precedido do seu tamanho
+(4 bytes, big-endian). Os pedidos levam um "id" escolhido pelo cliente e a
+resposta devolve o mesmo id, por isso um cliente pode enviar vários pedidos
+seguidos sem esperar pelas respostas (pipelining); as respostas de uma
+ligação chegam pela ordem dos pedidos. As notificações das mesas subscritas
+não têm id.
+
+    pedido:      {"id": 7, "op": "adicionar", "mesa": "4", "item": "tiramisu", "i": 21, "q": 1}
+    resposta:    {"id": 7, "ok": true, "mesa": "4", "v": 12, "estado": {...}}
+    erro:        {"id": 7, "ok": false, "erro": "mesa em falta"}
+    notificação: {"mesa": "4", "v": 12, "estado": {...}}
+
+O estado de uma mesa tem o formato do diário de pedidos
+({"itens": {id do item: [índice no menu, quantidade]}, "metodo_pagamento": ...})
+e "v" é a versão da mesa, que aumenta a cada alteração. Todas as mensagens,
+nos dois sentidos, têm no máximo TAMANHO_MAXIMO_MENSAGEM bytes: um item que
+faria o estado da mesa passar desse tamanho é recusado.
+
+Uso:
+    python servidor_pedidos.py [--host 0.0.0.0] [--porta 8765]
+    python servidor_pedidos.py --teste-carga 200   (servidor e terminais em loopback)
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+
+from diario_pedidos import (estado_vazio, aplicar_registo, OP_ADICIONAR, OP_REMOVER, OP_LIMPAR,
+                            OP_PAGAMENTO, OP_NOVO)
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8765
+TAMANHO_MAXIMO_MENSAGEM = 64 * 1024  # Mensagens maiores fecham a ligação
+TAMANHO_MAXIMO_ESTADO = TAMANHO_MAXIMO_MENSAGEM - 1024  # Notificação de uma mesa (folga para o id da resposta)
+TAMANHO_MAXIMO_MESA = 64  # Caracteres do nome de uma mesa
+LIMITE_BUFFER_ESCRITA = 64 * 1024  # Acima disto o servidor espera que o cliente leia as respostas
+LIMITE_BUFFER_ASSINANTE = 1024 * 1024  # Terminal que não lê as notificações: a ligação é fechada
+QUANTIDADE_MAXIMA = 1000  # Unidades por operação
+
+# Operações além das do diário (que alteram a mesa)
+OP_OBTER = "obter"  # Estado atual da mesa
+OP_SUBSCREVER = "subscrever"  # Receber notificações da mesa
+OP_CANCELAR = "cancelar"  # Deixar de receber notificações da mesa
+OP_PING = "ping"
+
+OPERACOES_MESA = (OP_ADICIONAR, OP_REMOVER, OP_LIMPAR, OP_PAGAMENTO, OP_NOVO)
+METODOS_PAGAMENTO = ("numerario", "cartao")
+
+CABECALHO = struct.Struct(">I")  # Tamanho da mensagem (bytes)
+
+# ================================
+# PROTOCOLO (MENSAGENS EM FRAMES)
+# ================================
+
+class ErroProtocolo(Exception):
+    """Mensagem inválida (tamanho, JSON ou campos)."""
+
+def codificar(mensagem):
+    """Retorna os bytes de uma mensagem: tamanho (4 bytes) seguido do JSON compacto."""
+    corpo = json.dumps(mensagem, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(corpo) > TAMANHO_MAXIMO_MENSAGEM:
+        raise ErroProtocolo(f"mensagem com {len(corpo)} bytes")
+    return CABECALHO.pack(len(corpo)) + corpo
+
+def descodificar(corpo):
+    """Retorna o objeto JSON de uma mensagem (sem o cabeçalho)."""
+    try:
+        mensagem = json.loads(corpo.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as erro:
+        raise ErroProtocolo(f"JSON inválido: {erro}") from None
+    if not isinstance(mensagem, dict):
+        raise ErroProtocolo("a mensagem não é um objeto")
+    return mensagem
+
+async def ler_mensagem(leitor):
+    """Lê uma mensagem de um asyncio.StreamReader (None no fim da ligação)."""
+    try:
+        cabecalho = await leitor.readexactly(CABECALHO.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (tamanho,) = CABECALHO.unpack(cabecalho)
+    if tamanho > TAMANHO_MAXIMO_MENSAGEM:
+        raise ErroProtocolo(f"mensagem com {tamanho} bytes")
+    try:
+        corpo = await leitor.readexactly(tamanho)
+    except asyncio.IncompleteReadError:
+        return None
+    return descodificar(corpo)
+
+# ================================
+# MESAS
+# ================================
+
+class Mesa:
+    """Pedido de uma mesa no servidor: estado (formato do diário), versão e assinantes."""
+    def __init__(self, nome):
+        self.nome = nome
+        self.estado = estado_vazio()
+        self.versao = 0
+        self.assinantes = set()  # Ligações que recebem as alterações
+
+    def aplicar(self, mensagem):
+        """
+        Valida uma operação de alteração e aplica-a ao estado (com
+        aplicar_registo, como o diário). Retorna o registo aplicado.
+        Só "adicionar" faz crescer o estado: se a mesa deixasse de caber numa
+        mensagem, a operação é desfeita e recusada (a versão não muda).
+        """
+        op = mensagem["op"]
+        registo = {"op": op}
+        if op in (OP_ADICIONAR, OP_REMOVER):
+            item = mensagem.get("item")
+            quantidade = mensagem.get("q", 1)
+            indice = mensagem.get("i", -1)
+            if not isinstance(item, str) or not item:
+                raise ErroProtocolo("item em falta")
+            if type(quantidade) is not int or not 0 < quantidade <= QUANTIDADE_MAXIMA:
+                raise ErroProtocolo(f"quantidade inválida: {quantidade!r}")
+            if type(indice) is not int:
+                raise ErroProtocolo(f"índice inválido: {indice!r}")
+            registo.update(id=item, i=indice, q=quantidade)
+        elif op == OP_PAGAMENTO:
+            if mensagem.get("metodo") not in METODOS_PAGAMENTO:
+                raise ErroProtocolo(f"método de pagamento inválido: {mensagem.get('metodo')!r}")
+            registo["metodo"] = mensagem["metodo"]
+        itens = self.estado["itens"]
+        anterior = itens.get(registo["id"]) if op == OP_ADICIONAR else None
+        anterior = None if anterior is None else list(anterior)  # Para desfazer
+        aplicar_registo(self.estado, registo)
+        if op == OP_ADICIONAR and self.tamanho_notificacao() > TAMANHO_MAXIMO_ESTADO:
+            if anterior is None:
+                del itens[registo["id"]]
+            else:
+                itens[registo["id"]] = anterior
+            raise ErroProtocolo("a mesa não cabe numa mensagem")
+        self.versao += 1
+        return registo
+
+    def notificacao(self):
+        """Mensagem com o estado atual da mesa (resposta ou notificação)."""
+        return {"mesa": self.nome, "v": self.versao, "estado": self.estado}
+
+    def tamanho_notificacao(self):
+        """Bytes do JSON da notificação (sem o cabeçalho)."""
+        return len(json.dumps(self.notificacao(), separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+# ================================
+# SERVIDOR
+# ================================
+
+class Ligacao:
+    """Um terminal ligado ao servidor."""
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.mesas = set()  # Nomes das mesas subscritas
+        self.tarefa = asyncio.current_task()  # Tarefa que lê os pedidos desta ligação
+        endereco = escritor.get_extra_info("peername")
+        self.nome = f"{endereco[0]}:{endereco[1]}" if isinstance(endereco, tuple) else str(endereco)
+
+    def enviar(self, dados):
+        """Coloca bytes no buffer de escrita (não espera pela rede)."""
+        self.escritor.write(dados)
+
+    def buffer_escrita(self):
+        """Bytes à espera de serem enviados a este terminal."""
+        return self.escritor.transport.get_write_buffer_size()
+
+class ServidorPedidos:
+    """
+    Servidor asyncio das mesas. Cada ligação é lida por uma tarefa que
+    trata os pedidos pela ordem em que chegam; como as operações são todas em
+    memória e de tempo constante, nenhuma espera por outra ligação. As
+    respostas são escritas sem esperar pela rede (só se espera quando o
+    buffer de um cliente passa de LIMITE_BUFFER_ESCRITA) e a notificação de
+    uma alteração é codificada uma vez e copiada para todos os assinantes.
+    """
+    def __init__(self):
+        self.mesas = {}  # Nome -> Mesa
+        self.ligacoes = set()
+        self.pedidos = 0  # Pedidos tratados
+        self.notificacoes = 0  # Notificações enviadas
+        self.desligados = 0  # Assinantes lentos desligados
+        self._servidor = None
+        self._loop = None
+        self._thread = None
+
+    # ---------- Ciclo de vida ----------
+
+    async def iniciar(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        """Começa a aceitar ligações; retorna a porta (útil com porta=0)."""
+        self._servidor = await asyncio.start_server(self._tratar_ligacao, host, porta)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def servir(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        """Serve até a tarefa ser cancelada (uso na linha de comando)."""
+        porta = await self.iniciar(host, porta)
+        print(f"Servidor de pedidos em {host}:{porta}", flush=True)
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def parar(self):
+        """Deixa de aceitar ligações e fecha as que existem."""
+        if self._servidor is not None:
+            self._servidor.close()
+            tarefas = [ligacao.tarefa for ligacao in self.ligacoes]
+            for ligacao in list(self.ligacoes):
+                ligacao.escritor.close()
+            # As tarefas das ligações terminam ao ler o fim da ligação
+            await asyncio.gather(*tarefas, return_exceptions=True)
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+    def iniciar_em_thread(self, host=HOST_PADRAO, porta=0):
+        """
+        Corre o servidor num loop asyncio próprio, numa thread em segundo plano
+        (servidor local para testes e para a aplicação). Retorna a porta.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="servidor-pedidos", daemon=True)
+        self._thread.start()
+        return asyncio.run_coroutine_threadsafe(self.iniciar(host, porta), self._loop).result()
+
+    def parar_thread(self, tempo_maximo=2.0):
+        """Pára o servidor iniciado com iniciar_em_thread()."""
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.parar(), self._loop).result(tempo_maximo)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(tempo_maximo)
+        self._loop.close()
+        self._thread = self._loop = None
+
+    # ---------- Ligações ----------
+
+    async def _tratar_ligacao(self, leitor, escritor):
+        """Lê os pedidos de um terminal até a ligação fechar."""
+        ligacao = Ligacao(escritor)
+        self.ligacoes.add(ligacao)
+        try:
+            while True:
+                try:
+                    mensagem = await ler_mensagem(leitor)
+                except ErroProtocolo as erro:
+                    # Sem frames válidos não se sabe onde começa a próxima mensagem
+                    ligacao.enviar(codificar({"ok": False, "erro": str(erro)}))
+                    break
+                if mensagem is None:
+                    break
+                ligacao.enviar(self._codificar_resposta(self.tratar(ligacao, mensagem)))
+                if ligacao.buffer_escrita() > LIMITE_BUFFER_ESCRITA:
+                    await escritor.drain()
+        except (ConnectionError, OSError, ErroProtocolo):
+            # ErroProtocolo: nem a resposta de erro cabe numa mensagem (id enorme)
+            pass
+        finally:
+            self._desligar(ligacao)
+
+    @staticmethod
+    def _codificar_resposta(resposta):
+        """Codifica uma resposta; se não couber numa mensagem, responde com o erro."""
+        try:
+            return codificar(resposta)
+        except ErroProtocolo as erro:
+            return codificar({"id": resposta.get("id"), "ok": False, "erro": str(erro)})
+
+    def _desligar(self, ligacao):
+        """Retira a ligação das mesas subscritas e fecha-a."""
+        self.ligacoes.discard(ligacao)
+        for nome in ligacao.mesas:
+            mesa = self.mesas.get(nome)
+            if mesa is not None:
+                mesa.assinantes.discard(ligacao)
+        ligacao.mesas.clear()
+        ligacao.escritor.close()
+
+    # ---------- Pedidos ----------
+
+    def tratar(self, ligacao, mensagem):
+        """Trata um pedido e retorna a resposta (com o mesmo id)."""
+        self.pedidos += 1
+        resposta = {"id": mensagem.get("id"), "ok": True}
+        try:
+            op = mensagem.get("op")
+            if op == OP_PING:
+                return resposta
+            mesa = self._obter_mesa(mensagem)
+            if op in OPERACOES_MESA:
+                mesa.aplicar(mensagem)
+                self._notificar(mesa, ligacao)
+            elif op == OP_SUBSCREVER:
+                mesa.assinantes.add(ligacao)
+                ligacao.mesas.add(mesa.nome)
+            elif op == OP_CANCELAR:
+                mesa.assinantes.discard(ligacao)
+                ligacao.mesas.discard(mesa.nome)
+            elif op != OP_OBTER:
+                raise ErroProtocolo(f"operação desconhecida: {op!r}")
+        except ErroProtocolo as erro:
+            return {"id": mensagem.get("id"), "ok": False, "erro": str(erro)}
+        resposta["mesa"] = mesa.nome
+        resposta["v"] = mesa.versao
+        resposta["estado"] = mesa.estado
+        return resposta
+
+    def _obter_mesa(self, mensagem):
+        """Retorna a mesa do pedido, criando-a (vazia) no primeiro uso."""
+        nome = mensagem.get("mesa")
+        if isinstance(nome, int) and not isinstance(nome, bool):
+            nome = str(nome)
+        if not isinstance(nome, str) or not nome:
+            raise ErroProtocolo("mesa em falta")
+        if len(nome) > TAMANHO_MAXIMO_MESA:
+            raise ErroProtocolo("nome de mesa demasiado longo")
+        mesa = self.mesas.get(nome)
+        if mesa is None:
+            mesa = self.mesas[nome] = Mesa(nome)
+        return mesa
+
+    def _notificar(self, mesa, origem):
+        """Envia o novo estado da mesa aos assinantes (menos ao terminal que a alterou)."""
+        if not mesa.assinantes:
+            return
+        dados = codificar(mesa.notificacao())
+        for ligacao in list(mesa.assinantes):
+            if ligacao is origem:
+                continue
+            if ligacao.buffer_escrita() > LIMITE_BUFFER_ASSINANTE:
+                # Terminal parado: não deixar a memória do servidor crescer por causa dele
+                self.desligados += 1
+                self._desligar(ligacao)
+                continue
+            ligacao.enviar(dados)
+            self.notificacoes += 1
+
+    def estatisticas(self):
+        """Retorna contadores do servidor (ligações, mesas, pedidos e notificações)."""
+        return {
+            'ligacoes': len(self.ligacoes),
+            'mesas': len(self.mesas),
+            'pedidos': self.pedidos,
+            'notificacoes': self.notificacoes,
+            'desligados': self.desligados,
+        }
+
+# ================================
+# CLIENTE (TERMINAL)
+# ================================
+
+class ClientePedidos:
+    """
+    Cliente usado pela aplicação: um socket normal e uma thread que lê as
+    respostas e notificações, para o loop de desenho nunca esperar pela rede.
+    pedir() envia logo o pedido e retorna um concurrent.futures.Future com a
+    resposta; as notificações das mesas subscritas ficam numa fila lida com
+    obter_notificacoes(). Se a ligação cair, `ligado` fica False e os pedidos
+    pendentes falham com ConnectionError.
+    ao_receber (opcional) é chamada na thread de leitura depois de cada
+    resposta ou notificação e quando a ligação cai, para acordar o loop da
+    aplicação (que pode estar a dormir à espera de eventos).
+    """
+    def __init__(self, host=HOST_PADRAO, porta=PORTA_PADRAO, tempo_ligacao=2.0, ao_receber=None):
+        self.host = host
+        self.porta = porta
+        self.tempo_ligacao = tempo_ligacao
+        self.ao_receber = ao_receber
+        self.notificacoes = queue.Queue()  # Notificações ainda não lidas
+        self.pendentes = {}  # Id do pedido -> Future da resposta
+        self.ligado = False
+        self.erro = None  # Motivo do fim da ligação
+        self._ids = itertools.count(1)
+        self._trinco = threading.Lock()  # Protege o envio e o dicionário de pendentes
+        self._socket = None
+        self._thread = None
+
+    def ligar(self):
+        """Liga ao servidor e arranca a thread de leitura (OSError se falhar)."""
+        self._socket = socket.create_connection((self.host, self.porta), timeout=self.tempo_ligacao)
+        self._socket.settimeout(None)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.ligado = True
+        self._thread = threading.Thread(target=self._ler, name="cliente-pedidos", daemon=True)
+        self._thread.start()
+
+    def pedir(self, op, **dados):
+        """Envia um pedido sem esperar pela resposta; retorna o Future da resposta."""
+        futuro = concurrent.futures.Future()
+        with self._trinco:
+            if not self.ligado:
+                futuro.set_exception(ConnectionError(self.erro or "sem ligação ao servidor"))
+                return futuro
+            identificador = next(self._ids)
+            mensagem = {"id": identificador, "op": op}
+            mensagem.update(dados)
+            self.pendentes[identificador] = futuro
+            try:
+                self._socket.sendall(codificar(mensagem))
+            except OSError as erro:
+                del self.pendentes[identificador]
+                futuro.set_exception(ConnectionError(str(erro)))
+        return futuro
+
+    def pedir_e_esperar(self, op, tempo_maximo=2.0, **dados):
+        """Envia um pedido e espera pela resposta (ErroProtocolo se o servidor recusar)."""
+        resposta = self.pedir(op, **dados).result(tempo_maximo)
+        if not resposta.get("ok"):
+            raise ErroProtocolo(resposta.get("erro"))
+        return resposta
+
+    def obter_notificacoes(self):
+        """Retorna (sem esperar) as notificações recebidas desde a última chamada."""
+        resultado = []
+        while True:
+            try:
+                resultado.append(self.notificacoes.get_nowait())
+            except queue.Empty:
+                return resultado
+
+    def fechar(self):
+        """Fecha a ligação e espera pela thread de leitura."""
+        if self._socket is None:
+            return
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        if self._thread is not None:
+            self._thread.join(2.0)
+        self._socket = self._thread = None
+
+    def _ler(self):
+        """Thread de leitura: separa as mensagens e entrega respostas e notificações."""
+        buffer = bytearray()
+        try:
+            while True:
+                dados = self._socket.recv(65536)
+                if not dados:
+                    raise ConnectionError("ligação fechada pelo servidor")
+                buffer += dados
+                inicio = 0
+                while len(buffer) - inicio >= CABECALHO.size:
+                    (tamanho,) = CABECALHO.unpack_from(buffer, inicio)
+                    if tamanho > TAMANHO_MAXIMO_MENSAGEM:
+                        raise ErroProtocolo(f"mensagem com {tamanho} bytes")
+                    fim = inicio + CABECALHO.size + tamanho
+                    if len(buffer) < fim:
+                        break
+                    self._entregar(descodificar(bytes(buffer[inicio + CABECALHO.size:fim])))
+                    inicio = fim
+                del buffer[:inicio]
+        except (OSError, ErroProtocolo) as erro:
+            self.erro = str(erro)
+        finally:
+            with self._trinco:
+                self.ligado = False
+                pendentes, self.pendentes = self.pendentes, {}
+            for futuro in pendentes.values():
+                futuro.set_exception(ConnectionError(self.erro or "ligação fechada"))
+            if self.ao_receber is not None:
+                self.ao_receber()
+
+    def _entregar(self, mensagem):
+        """Resolve o Future de uma resposta ou guarda uma notificação (e avisa ao_receber)."""
+        identificador = mensagem.get("id")
+        if identificador is None:
+            self.notificacoes.put(mensagem)
+        else:
+            with self._trinco:
+                futuro = self.pendentes.pop(identificador, None)
+            if futuro is not None:
+                futuro.set_result(mensagem)
+        if self.ao_receber is not None:
+            self.ao_receber()
+
+# ================================
+# TESTE DE CARGA (LOOPBACK)
+# ================================
+
+async def _terminal_carga(host, porta, mesa, pedidos, latencias):
+    """Um terminal simulado: subscreve a mesa e envia pedidos um a um, medindo a latência."""
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    identificadores = itertools.count(1)
+
+    async def pedir(mensagem):
+        identificador = next(identificadores)
+        escritor.write(codificar(dict(mensagem, id=identificador)))
+        inicio = time.perf_counter()
+        while True:
+            resposta = await ler_mensagem(leitor)
+            if resposta.get("id") == identificador:  # Ignorar notificações de outros terminais
+                return time.perf_counter() - inicio
+
+    await pedir({"op": OP_SUBSCREVER, "mesa": mesa})
+    for n in range(pedidos):
+        op = OP_ADICIONAR if n % 2 == 0 else OP_REMOVER
+        latencias.append(await pedir({"op": op, "mesa": mesa, "item": f"item-{n % 7}", "i": n % 7, "q": 1}))
+    escritor.close()
+
+async def teste_carga(terminais, pedidos, terminais_por_mesa=4):
+    """Servidor e terminais no mesmo processo (loopback); retorna as latências ordenadas (s)."""
+    servidor = ServidorPedidos()
+    porta = await servidor.iniciar(HOST_PADRAO, 0)
+    latencias = []
+    await asyncio.gather(*(
+        _terminal_carga(HOST_PADRAO, porta, str(t // terminais_por_mesa), pedidos, latencias)
+        for t in range(terminais)))
+    await servidor.parar()
+    return sorted(latencias), servidor.estatisticas()
+
+# ================================
+# LINHA DE COMANDO
+# ================================
+
+def main(argumentos=None):
+    """Corre o servidor de pedidos (ou o teste de carga em loopback)."""
+    parser = argparse.ArgumentParser(description="Servidor de pedidos partilhado pelos terminais.")
+    parser.add_argument("--host", default=HOST_PADRAO, help="endereço (0.0.0.0 para a rede local)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--teste-carga", type=int, metavar="TERMINAIS",
+                        help="simular este número de terminais em loopback e mostrar as latências")
+    parser.add_argument("--pedidos", type=int, default=200, help="pedidos por terminal no teste de carga")
+    args = parser.parse_args(argumentos)
+
+    if args.teste_carga:
+        inicio = time.perf_counter()
+        latencias, estatisticas = asyncio.run(teste_carga(args.teste_carga, args.pedidos))
+        duracao = time.perf_counter() - inicio
+
+        def percentil(p):
+            return latencias[min(len(latencias) - 1, int(p / 100 * len(latencias)))] * 1000
+
+        print(f"{args.teste_carga} terminais, {len(latencias)} pedidos em {duracao:.2f} s "
+              f"({len(latencias) / duracao:.0f} pedidos/s), {estatisticas['notificacoes']} notificações")
+        print(f"latência p50 {percentil(50):.3f} ms  p99 {percentil(99):.3f} ms  "
+              f"máx {latencias[-1] * 1000:.3f} ms")
+        return 0
+
+    try:
+        asyncio.run(ServidorPedidos().servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
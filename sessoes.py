@@ -0,0 +1,284 @@
+"""
+SESSÕES DAS MESAS - MENU DO RESTAURANTE
+
+Guarda os pedidos abertos de várias mesas para o terminal poder passar de
+uma mesa para outra. Cada sessão tem o seu próprio pedido (com os totais
+incrementais) e o estado da vista (vista atual, scroll e seleções); mudar de
+mesa só troca a sessão ativa, sem recalcular nada.
+
+As sessões ficam num dicionário em memória (as usadas há mais tempo primeiro).
+Ao sair de uma sessão ela é gravada em disco por uma thread em segundo plano,
+por isso as sessões que não estão ativas podem sair da memória a qualquer
+momento (quando há mais de max_em_memoria, ou sem uso há tempo_inatividade) e
+são lidas do disco quando voltam a ser pedidas.
+
+Cada sessão é um ficheiro mesa_<nome>.json, com os itens no formato do diário
+de pedidos ({id do item: [índice no menu, quantidade]}). No nome do ficheiro,
+os caracteres do nome da mesa além de letras e algarismos ASCII e "-" são
+escritos como _XX (bytes UTF-8 em hexadecimal), por isso mesas diferentes
+nunca partilham o ficheiro.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+MAX_SESSOES_MEMORIA = 16  # Sessões mantidas em memória (a ativa nunca sai)
+TEMPO_INATIVIDADE = 600.0  # Segundos sem uso a partir dos quais uma sessão sai da memória
+
+# ================================
+# FUNÇÕES AUXILIARES
+# ================================
+
+def nome_seguro(texto):
+    """
+    Converte um texto num nome de ficheiro seguro e sem colisões: letras e
+    algarismos ASCII e "-" ficam, tudo o resto (incluindo "_") passa a _XX.
+    """
+    return re.sub(r"[^A-Za-z0-9-]", lambda m: "".join(f"_{b:02x}" for b in m.group().encode("utf-8")),
+                  str(texto))
+
+def itens_validos(itens):
+    """
+    Retorna os itens {id: [índice, quantidade]} bem formados (id em texto,
+    índice e quantidade inteiros, quantidade positiva); os outros são ignorados.
+    """
+    validos = {}
+    for id_item, item in itens.items():
+        if (isinstance(item, list) and len(item) == 2
+                and all(type(valor) is int for valor in item) and item[1] > 0):
+            validos[id_item] = item
+    return validos
+
+# ================================
+# SESSÃO
+# ================================
+
+class Sessao:
+    """Pedido aberto de uma mesa e o estado da vista do terminal nessa mesa."""
+    def __init__(self, mesa, pedido):
+        self.mesa = mesa
+        self.pedido = pedido  # Objeto do pedido (Pedido da aplicação)
+        self.metodo_pagamento = None
+        self.vista = "menu"  # "menu", "pedido" ou "conta"
+        self.scroll = {"menu": 0, "pedido": 0, "conta": 0}  # Posição de scroll de cada vista
+        self.item_selecionado = None  # Índice no menu (não é gravado: muda com o catálogo)
+        self.item_pedido_selecionado = None
+        self.ultimo_uso = time.monotonic()
+
+# ================================
+# GESTOR DE SESSÕES
+# ================================
+
+class GestorSessoes:
+    """
+    Sessões das mesas, por nome da mesa. O pedido de cada sessão é criado e
+    convertido pelas funções dadas pela aplicação:
+    criar_pedido(), exportar_itens(pedido) -> {id: [índice, quantidade]} e
+    importar_itens(itens) -> pedido (os itens que já não existem no catálogo
+    são ignorados).
+
+    obter() é O(1) para uma sessão em memória. guardar() só copia o estado da
+    sessão para um dicionário; a gravação é feita pela thread de escrita.
+    """
+    def __init__(self, pasta, criar_pedido, exportar_itens, importar_itens,
+                 max_em_memoria=MAX_SESSOES_MEMORIA, tempo_inatividade=TEMPO_INATIVIDADE):
+        self.pasta = pasta
+        self.criar_pedido = criar_pedido
+        self.exportar_itens = exportar_itens
+        self.importar_itens = importar_itens
+        self.max_em_memoria = max_em_memoria
+        self.tempo_inatividade = tempo_inatividade
+        self.sessoes = OrderedDict()  # Mesa -> Sessao (LRU: a usada mais recentemente no fim)
+        self.unidades = {}  # Mesa -> unidades no pedido (de todas as sessões conhecidas)
+        self.lidas = 0  # Sessões restauradas do disco
+        self.despejadas = 0  # Sessões retiradas da memória
+        self.erro = None  # Último erro de escrita (a thread continua)
+        self._por_gravar = {}  # Mesa -> dados ainda não gravados (protegido pelo trinco)
+        self._trinco = threading.Lock()
+        self._acordar = threading.Event()
+        self._terminar = False
+        self._thread = None
+
+    # ---------- Ciclo de vida ----------
+
+    def iniciar(self):
+        """Cria a pasta, lê o resumo das sessões gravadas e arranca a thread de escrita."""
+        os.makedirs(self.pasta, exist_ok=True)
+        for nome in os.listdir(self.pasta):
+            if nome.startswith("mesa_") and nome.endswith(".json"):
+                caminho = os.path.join(self.pasta, nome)
+                dados = self._ler_ficheiro(caminho)
+                if dados is None:
+                    continue
+                self.unidades[dados["mesa"]] = sum(q for _, q in dados["itens"].values())
+                atual = self._ficheiro(dados["mesa"])
+                if caminho != atual and not os.path.exists(atual):
+                    # Ficheiro com o nome antigo (sem escape): passa para o nome atual
+                    try:
+                        os.replace(caminho, atual)
+                    except OSError as erro:
+                        self.erro = erro
+        self._thread = threading.Thread(target=self._escrever, name="sessoes-mesas", daemon=True)
+        self._thread.start()
+
+    def fechar(self, tempo_maximo=2.0):
+        """Grava todas as sessões em memória e pára a thread de escrita."""
+        for sessao in self.sessoes.values():
+            self.guardar(sessao)
+        if self._thread is None:
+            return
+        self._terminar = True
+        self._acordar.set()
+        self._thread.join(tempo_maximo)
+        self._thread = None
+
+    # ---------- Sessões ----------
+
+    def obter(self, mesa):
+        """
+        Retorna a sessão da mesa: da memória, dos dados ainda por gravar, do
+        disco ou, se a mesa não tem sessão, uma sessão nova com o pedido vazio.
+        """
+        sessao = self.sessoes.get(mesa)
+        if sessao is None:
+            with self._trinco:
+                dados = self._por_gravar.get(mesa)
+            if dados is None:
+                dados = self._ler_ficheiro(self._ficheiro(mesa))
+            if dados is not None:
+                sessao = self._sessao_de_dados(dados)
+                self.lidas += 1
+            else:
+                sessao = Sessao(mesa, self.criar_pedido())
+            self.sessoes[mesa] = sessao
+        else:
+            self.sessoes.move_to_end(mesa)
+        sessao.ultimo_uso = time.monotonic()
+        return sessao
+
+    def guardar(self, sessao):
+        """Copia o estado da sessão e pede à thread de escrita que o grave."""
+        dados = {
+            "mesa": sessao.mesa,
+            "itens": self.exportar_itens(sessao.pedido),
+            "metodo_pagamento": sessao.metodo_pagamento,
+            "vista": sessao.vista,
+            "scroll": dict(sessao.scroll),
+        }
+        self.unidades[sessao.mesa] = len(sessao.pedido)
+        with self._trinco:
+            self._por_gravar[sessao.mesa] = dados
+        self._acordar.set()
+
+    def despejar(self, ativa, agora=None):
+        """
+        Retira da memória as sessões sem uso há mais de tempo_inatividade e as
+        mais antigas acima de max_em_memoria, menos a sessão ativa. As sessões
+        que não estão ativas já foram gravadas ao sair delas.
+        """
+        if agora is None:
+            agora = time.monotonic()
+        for mesa in list(self.sessoes):
+            sessao = self.sessoes[mesa]
+            excedente = len(self.sessoes) > self.max_em_memoria
+            if mesa != ativa and (excedente or agora - sessao.ultimo_uso > self.tempo_inatividade):
+                del self.sessoes[mesa]
+                self.despejadas += 1
+
+    def descartar_inativas(self, ativa):
+        """Retira da memória todas as sessões menos a ativa (ex.: o catálogo mudou)."""
+        for mesa in list(self.sessoes):
+            if mesa != ativa:
+                del self.sessoes[mesa]
+                self.despejadas += 1
+
+    def tem_pedido(self, mesa):
+        """Indica se a mesa tem um pedido com itens (sem ler o disco)."""
+        sessao = self.sessoes.get(mesa)
+        if sessao is not None:
+            return bool(sessao.pedido)
+        return self.unidades.get(mesa, 0) > 0
+
+    def _sessao_de_dados(self, dados):
+        """Cria uma sessão a partir dos dados gravados."""
+        sessao = Sessao(dados["mesa"], self.importar_itens(dados["itens"]))
+        sessao.metodo_pagamento = dados.get("metodo_pagamento")
+        sessao.vista = dados.get("vista", "menu")
+        sessao.scroll.update(dados.get("scroll", {}))
+        return sessao
+
+    # ---------- Ficheiros ----------
+
+    def _ficheiro(self, mesa):
+        """Caminho do ficheiro de uma mesa (nome da mesa escapado com nome_seguro())."""
+        return os.path.join(self.pasta, "mesa_" + nome_seguro(mesa) + ".json")
+
+    @staticmethod
+    def _ler_ficheiro(caminho):
+        """
+        Lê os dados de uma sessão (None se o ficheiro não existe ou é inválido).
+        Os itens mal formados são ignorados e o scroll inválido é descartado.
+        """
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not (isinstance(dados, dict) and isinstance(dados.get("mesa"), str)
+                and isinstance(dados.get("itens"), dict)):
+            return None
+        dados["itens"] = itens_validos(dados["itens"])
+        scroll = dados.get("scroll")
+        if not isinstance(scroll, dict) or not all(type(valor) is int for valor in scroll.values()):
+            dados["scroll"] = {}
+        return dados
+
+    def _escrever(self):
+        """
+        Thread de escrita: grava os dados pendentes (ficheiro temporário + rename).
+        Os dados só saem de _por_gravar depois de gravados, para obter() nunca
+        ler um ficheiro mais antigo do que a última versão da sessão.
+        """
+        while True:
+            self._acordar.wait()
+            self._acordar.clear()
+            with self._trinco:
+                lote = dict(self._por_gravar)
+            for mesa, dados in lote.items():
+                caminho = self._ficheiro(mesa)
+                temporario = caminho + ".tmp"
+                try:
+                    with open(temporario, "w", encoding="utf-8") as f:
+                        json.dump(dados, f, separators=(",", ":"), ensure_ascii=False)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temporario, caminho)
+                except OSError as erro:
+                    self.erro = erro  # Fica pendente e é tentado de novo na próxima gravação
+                    continue
+                with self._trinco:
+                    if self._por_gravar.get(mesa) is dados:
+                        del self._por_gravar[mesa]
+            if self._terminar:
+                return
+
+    def estatisticas(self):
+        """Retorna contadores das sessões (em memória, conhecidas, lidas e despejadas)."""
+        with self._trinco:
+            por_gravar = len(self._por_gravar)
+        return {
+            'em_memoria': len(self.sessoes),
+            'conhecidas': len(self.unidades),
+            'por_gravar': por_gravar,
+            'lidas': self.lidas,
+            'despejadas': self.despejadas,
+            'erro': str(self.erro) if self.erro else None,
+        }
@@ -0,0 +1,75 @@
+"""
+TESTES DO CATÁLOGO - MENU DO RESTAURANTE
+
+Taxas de IVA inválidas nos ficheiros do catálogo (JSON e CSV) têm de dar
+ErroCatalogo, o erro que a aplicação ignora ao recarregar o catálogo, e nunca
+outro erro (ex.: OverflowError ao gravar a cache binária).
+
+Uso:
+    python -m unittest test_catalogo
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import catalogo
+from catalogo import ErroCatalogo, carregar_catalogo, taxa_iva
+
+TAXAS_INVALIDAS = (200, 101, -5, 13.5, "13.5", "abc", True)
+
+class TestTaxasIva(unittest.TestCase):
+    """Validação das taxas de IVA das categorias."""
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        # A cache binária vai para a pasta temporária
+        pasta_cache = catalogo.PASTA_CACHE
+        catalogo.PASTA_CACHE = os.path.join(self.pasta.name, "cache")
+        self.addCleanup(setattr, catalogo, "PASTA_CACHE", pasta_cache)
+
+    def gravar_json(self, iva):
+        caminho = os.path.join(self.pasta.name, "menu.json")
+        dados = {"categorias": [{"nome": "Bebidas", "iva": iva,
+                                 "itens": [{"id": "agua", "nome": "Água", "preco": 1.5}]}]}
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f)
+        return caminho
+
+    def gravar_csv(self, iva):
+        caminho = os.path.join(self.pasta.name, "menu.csv")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(f"id,categoria,nome,preco,iva\nagua,Bebidas,Água,1.50,{iva}\n")
+        return caminho
+
+    def test_taxas_validas(self):
+        self.assertEqual(taxa_iva(23), 23)
+        self.assertEqual(taxa_iva(" 6 "), 6)
+        self.assertEqual(taxa_iva(0), 0)
+        self.assertEqual(taxa_iva(100.0), 100)
+
+    def test_taxas_invalidas(self):
+        for iva in TAXAS_INVALIDAS:
+            with self.subTest(iva=iva), self.assertRaises(ErroCatalogo):
+                taxa_iva(iva)
+
+    def test_json_com_taxa_fora_do_intervalo(self):
+        for iva in (200, -5, 13.5):
+            with self.subTest(iva=iva), self.assertRaises(ErroCatalogo):
+                carregar_catalogo(self.gravar_json(iva))
+
+    def test_csv_com_taxa_fora_do_intervalo(self):
+        for iva in ("200", "-5", "13.5"):
+            with self.subTest(iva=iva), self.assertRaises(ErroCatalogo):
+                carregar_catalogo(self.gravar_csv(iva))
+
+    def test_taxa_valida_passa_pela_cache(self):
+        for caminho in (self.gravar_json(23), self.gravar_csv("23")):
+            with self.subTest(caminho=caminho):
+                self.assertEqual(carregar_catalogo(caminho).iva_categorias, [23])
+                self.assertEqual(carregar_catalogo(caminho).iva_categorias, [23])  # Lido da cache
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,430 @@
+"""
+REGISTO DE VENDAS - MENU DO RESTAURANTE
+
+Guarda as contas pagas numa base de dados SQLite local e responde a
+relatórios (totais diários, itens mais vendidos, mistura de categorias,
+totais por método de pagamento) sem percorrer todas as contas: além das
+contas e das suas linhas, indexadas por item, categoria, método e data, são
+mantidos resumos por dia (atualizados na mesma transação que a conta), por
+isso um relatório de meses lê só algumas linhas por dia.
+
+As contas são escritas por uma thread em segundo plano que junta várias
+contas na mesma transação: a aplicação nunca espera pelo disco. As consultas
+usam uma ligação própria (modo WAL) e só veem contas já gravadas; chamar
+sincronizar() antes de uma consulta garante que tudo o que foi registado
+está incluído.
+
+Uso na linha de comando (relatório):
+    python vendas_db.py [ficheiro.db] [--desde AAAA-MM-DD] [--ate AAAA-MM-DD]
+"""
+
+import argparse
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from catalogo import formatar_euros
+
+# ================================
+# CONFIGURAÇÃO
+# ================================
+
+CONTAS_POR_TRANSACAO = 50  # Gravar logo que haja este número de contas em espera
+INTERVALO_TRANSACAO = 0.5  # Tempo máximo (s) que uma conta fica por gravar
+TAMANHO_FILA = 1024  # Contas em espera para a thread de escrita
+VERSAO_ESQUEMA = 1  # PRAGMA user_version; 0 = bases antigas, sem o id dos itens
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS contas (
+    id INTEGER PRIMARY KEY,
+    momento REAL NOT NULL,          -- Data/hora do pagamento (segundos Unix)
+    dia TEXT NOT NULL,              -- Dia local do pagamento (AAAA-MM-DD)
+    metodo TEXT NOT NULL,           -- "numerario" ou "cartao"
+    total_centimos INTEGER NOT NULL,
+    unidades INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS linhas_conta (
+    conta_id INTEGER NOT NULL REFERENCES contas(id),
+    dia TEXT NOT NULL,              -- Copiado da conta, para filtrar sem junção
+    item_id TEXT NOT NULL,          -- Id do item no catálogo
+    item TEXT NOT NULL,             -- Nome no idioma base do catálogo
+    categoria TEXT NOT NULL,        -- Categoria no idioma base do catálogo
+    quantidade INTEGER NOT NULL,
+    preco_centimos INTEGER NOT NULL,
+    subtotal_centimos INTEGER NOT NULL
+);
+-- Resumos por dia, atualizados junto com cada conta
+CREATE TABLE IF NOT EXISTS resumo_dia_metodo (
+    dia TEXT NOT NULL,
+    metodo TEXT NOT NULL,
+    contas INTEGER NOT NULL,
+    total_centimos INTEGER NOT NULL,
+    PRIMARY KEY (dia, metodo)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS resumo_dia_item (
+    dia TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    item TEXT NOT NULL,             -- Último nome com que o item foi vendido no dia
+    categoria TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    total_centimos INTEGER NOT NULL,
+    PRIMARY KEY (dia, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_contas_dia ON contas(dia, total_centimos);
+CREATE INDEX IF NOT EXISTS idx_contas_momento ON contas(momento);
+CREATE INDEX IF NOT EXISTS idx_contas_metodo ON contas(metodo, dia, total_centimos);
+CREATE INDEX IF NOT EXISTS idx_linhas_conta ON linhas_conta(conta_id);
+CREATE INDEX IF NOT EXISTS idx_linhas_item ON linhas_conta(item_id, dia);
+CREATE INDEX IF NOT EXISTS idx_linhas_categoria ON linhas_conta(categoria, dia);
+CREATE INDEX IF NOT EXISTS idx_linhas_dia ON linhas_conta(dia);
+"""
+
+# ================================
+# FUNÇÕES AUXILIARES
+# ================================
+
+def abrir_ligacao(ficheiro):
+    """Abre uma ligação SQLite configurada para escrita concorrente com leituras (WAL)."""
+    ligacao = sqlite3.connect(ficheiro, check_same_thread=False)
+    ligacao.execute("PRAGMA journal_mode=WAL")
+    ligacao.execute("PRAGMA synchronous=NORMAL")
+    ligacao.execute("PRAGMA foreign_keys=ON")
+    return ligacao
+
+def migrar_esquema(ligacao):
+    """
+    Atualiza uma base de dados da versão 0 do esquema, em que as linhas e o
+    resumo por item eram identificados pelo nome: o nome antigo passa a ser
+    também o id desses itens (não há forma de saber o id do catálogo).
+    """
+    if ligacao.execute("PRAGMA user_version").fetchone()[0] >= VERSAO_ESQUEMA:
+        return
+    colunas = [linha[1] for linha in ligacao.execute("PRAGMA table_info(linhas_conta)")]
+    if colunas and "item_id" not in colunas:
+        ligacao.executescript("""
+            BEGIN;
+            ALTER TABLE linhas_conta ADD COLUMN item_id TEXT NOT NULL DEFAULT '';
+            UPDATE linhas_conta SET item_id = item;
+            DROP INDEX IF EXISTS idx_linhas_item;
+            ALTER TABLE resumo_dia_item RENAME TO resumo_dia_item_v0;
+            CREATE TABLE resumo_dia_item (
+                dia TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                item TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                quantidade INTEGER NOT NULL,
+                total_centimos INTEGER NOT NULL,
+                PRIMARY KEY (dia, item_id)
+            ) WITHOUT ROWID;
+            INSERT INTO resumo_dia_item
+                SELECT dia, item, item, categoria, quantidade, total_centimos FROM resumo_dia_item_v0;
+            DROP TABLE resumo_dia_item_v0;
+            COMMIT;
+        """)
+
+def texto_dia(dia):
+    """Converte um dia (date, datetime ou texto AAAA-MM-DD) para o texto guardado na base de dados."""
+    if dia is None or isinstance(dia, str):
+        return dia
+    if isinstance(dia, datetime.datetime):
+        dia = dia.date()
+    return dia.isoformat()
+
+def filtro_dias(desde, ate, coluna="dia"):
+    """Retorna (condição SQL, parâmetros) para um intervalo de dias inclusivo."""
+    condicoes = []
+    parametros = []
+    if desde is not None:
+        condicoes.append(f"{coluna} >= ?")
+        parametros.append(texto_dia(desde))
+    if ate is not None:
+        condicoes.append(f"{coluna} <= ?")
+        parametros.append(texto_dia(ate))
+    return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+# ================================
+# REGISTO DE VENDAS
+# ================================
+
+class RegistoVendas:
+    """
+    Base de dados de vendas. registar_conta() coloca a conta numa fila
+    (nunca bloqueia); a thread de escrita grava as contas em lote, numa
+    transação por lote. As consultas correm na thread de quem as chama.
+    """
+    def __init__(self, ficheiro, contas_por_transacao=CONTAS_POR_TRANSACAO,
+                 intervalo_transacao=INTERVALO_TRANSACAO, tamanho_fila=TAMANHO_FILA):
+        self.ficheiro = ficheiro
+        self.contas_por_transacao = contas_por_transacao
+        self.intervalo_transacao = intervalo_transacao
+        pasta = os.path.dirname(ficheiro)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        escrita = abrir_ligacao(ficheiro)
+        migrar_esquema(escrita)
+        escrita.executescript(ESQUEMA)
+        escrita.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        escrita.commit()
+
+        self.leitura = abrir_ligacao(ficheiro)  # Ligação das consultas
+        self._trinco_leitura = threading.Lock()
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.descartadas = 0  # Contas perdidas por a fila estar cheia
+        self.rejeitadas = 0  # Contas que a base de dados recusou (as outras do lote são gravadas)
+        self.erro = None  # Último erro de escrita
+        self._thread = threading.Thread(target=self._escrever, args=(escrita,),
+                                        name="registo-vendas", daemon=True)
+        self._thread.start()
+
+    # ---------- Escrita ----------
+
+    def registar_conta(self, linhas, total_centimos, metodo, momento=None):
+        """
+        Regista uma conta paga. `linhas` são tuplas (id do item, nome,
+        categoria, quantidade, subtotal em cêntimos), com o nome e a categoria
+        no idioma base do catálogo: os relatórios agrupam pelo id, por isso
+        mudar o idioma do menu ou o nome de um item não parte os totais.
+        Retorna False se a conta foi descartada.
+        """
+        momento = time.time() if momento is None else momento
+        conta = (momento, metodo, total_centimos,
+                 [(item_id, nome, categoria, quantidade, subtotal // quantidade if quantidade else 0, subtotal)
+                  for item_id, nome, categoria, quantidade, subtotal in linhas])
+        try:
+            self.fila.put_nowait(("conta", conta))
+        except queue.Full:
+            self.descartadas += 1
+            return False
+        return True
+
+    def sincronizar(self, tempo_maximo=5.0):
+        """Espera até todas as contas registadas estarem gravadas (para relatórios)."""
+        if self._thread is None:
+            return False
+        feito = threading.Event()
+        try:
+            self.fila.put(("sincronizar", feito), timeout=tempo_maximo)
+        except queue.Full:
+            return False
+        return feito.wait(tempo_maximo)
+
+    def fechar(self, tempo_maximo=2.0):
+        """Grava as contas em espera e fecha as ligações."""
+        if self._thread is None:
+            return
+        try:
+            self.fila.put(("fim", None), timeout=tempo_maximo)
+        except queue.Full:
+            pass
+        self._thread.join(tempo_maximo)
+        self._thread = None
+        with self._trinco_leitura:
+            self.leitura.close()
+
+    def _escrever(self, ligacao):
+        """
+        Ciclo da thread de escrita: as contas recebidas ficam numa transação
+        aberta que é confirmada quando chega a CONTAS_POR_TRANSACAO ou passa
+        INTERVALO_TRANSACAO desde a primeira conta por confirmar.
+        """
+        lote = []  # Contas na transação aberta (repetidas uma a uma se o commit falhar)
+        inicio_transacao = 0.0
+        terminar = False
+
+        while not terminar:
+            espera = None
+            if lote:
+                espera = max(0.0, inicio_transacao + self.intervalo_transacao - time.monotonic())
+            try:
+                tipo, conteudo = self.fila.get(timeout=espera)
+            except queue.Empty:
+                tipo, conteudo = None, None
+
+            confirmar = tipo in ("sincronizar", "fim") or (
+                lote and time.monotonic() - inicio_transacao >= self.intervalo_transacao)
+            if tipo == "conta":
+                if not lote:
+                    inicio_transacao = time.monotonic()
+                if self._inserir_no_lote(ligacao, conteudo):
+                    lote.append(conteudo)
+                confirmar = confirmar or len(lote) >= self.contas_por_transacao
+            if confirmar and lote:
+                self._confirmar_lote(ligacao, lote)
+                lote = []
+
+            if tipo == "sincronizar":
+                conteudo.set()
+            elif tipo == "fim":
+                terminar = True
+
+        ligacao.close()
+
+    def _inserir_no_lote(self, ligacao, conta):
+        """
+        Insere uma conta na transação aberta, num SAVEPOINT próprio: se a
+        conta falhar, só ela é desfeita e as contas anteriores do lote ficam.
+        Retorna False se a conta foi rejeitada.
+        """
+        try:
+            if not ligacao.in_transaction:
+                ligacao.execute("BEGIN")  # Sem isto, RELEASE do SAVEPOINT confirmava a transação
+            ligacao.execute("SAVEPOINT conta")
+            try:
+                self._inserir_conta(ligacao, *conta)
+            except sqlite3.Error:
+                ligacao.execute("ROLLBACK TO conta")
+                raise
+            finally:
+                ligacao.execute("RELEASE conta")
+        except sqlite3.Error as erro:
+            self.erro = erro
+            self.rejeitadas += 1
+            return False
+        return True
+
+    def _confirmar_lote(self, ligacao, lote):
+        """
+        Confirma a transação aberta. Se o commit falhar, desfaz a transação e
+        grava as contas do lote uma a uma, cada uma na sua transação, para só
+        se perderem as contas que continuam a falhar.
+        """
+        try:
+            ligacao.commit()
+            return
+        except sqlite3.Error as erro:
+            self.erro = erro
+            ligacao.rollback()
+        for conta in lote:
+            try:
+                self._inserir_conta(ligacao, *conta)
+                ligacao.commit()
+            except sqlite3.Error as erro:
+                self.erro = erro
+                self.rejeitadas += 1
+                ligacao.rollback()
+
+    @staticmethod
+    def _inserir_conta(ligacao, momento, metodo, total_centimos, linhas):
+        """Insere uma conta e as suas linhas e atualiza os resumos do dia (dentro da transação aberta)."""
+        dia = datetime.date.fromtimestamp(momento).isoformat()
+        unidades = sum(linha[3] for linha in linhas)
+        cursor = ligacao.execute(
+            "INSERT INTO contas (momento, dia, metodo, total_centimos, unidades) VALUES (?, ?, ?, ?, ?)",
+            (momento, dia, metodo, total_centimos, unidades))
+        conta_id = cursor.lastrowid
+        ligacao.executemany(
+            "INSERT INTO linhas_conta (conta_id, dia, item_id, item, categoria, quantidade,"
+            " preco_centimos, subtotal_centimos) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(conta_id, dia) + linha for linha in linhas])
+        ligacao.execute(
+            "INSERT INTO resumo_dia_metodo (dia, metodo, contas, total_centimos) VALUES (?, ?, 1, ?)"
+            " ON CONFLICT (dia, metodo) DO UPDATE SET contas = contas + 1,"
+            " total_centimos = total_centimos + excluded.total_centimos",
+            (dia, metodo, total_centimos))
+        ligacao.executemany(
+            "INSERT INTO resumo_dia_item (dia, item_id, item, categoria, quantidade, total_centimos)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (dia, item_id) DO UPDATE SET item = excluded.item, categoria = excluded.categoria,"
+            " quantidade = quantidade + excluded.quantidade,"
+            " total_centimos = total_centimos + excluded.total_centimos",
+            [(dia, item_id, item, categoria, quantidade, subtotal)
+             for item_id, item, categoria, quantidade, _, subtotal in linhas])
+
+    # ---------- Consultas ----------
+
+    def _consultar(self, sql, parametros=()):
+        with self._trinco_leitura:
+            return self.leitura.execute(sql, parametros).fetchall()
+
+    def totais_diarios(self, desde=None, ate=None):
+        """Retorna [(dia, número de contas, total em cêntimos)] por dia, do mais antigo ao mais recente."""
+        filtro, parametros = filtro_dias(desde, ate)
+        return self._consultar(
+            "SELECT dia, SUM(contas), SUM(total_centimos) FROM resumo_dia_metodo" + filtro +
+            " GROUP BY dia ORDER BY dia", parametros)
+
+    def itens_mais_vendidos(self, limite=10, desde=None, ate=None):
+        """
+        Retorna [(id do item, nome, categoria, quantidade, total em cêntimos)]
+        dos itens com mais unidades vendidas, com o nome e a categoria do
+        último dia em que o item foi vendido.
+        """
+        filtro, parametros = filtro_dias(desde, ate)
+        return self._consultar(
+            "SELECT item_id, item, categoria, unidades, total FROM ("
+            " SELECT item_id, item, categoria, MAX(dia), SUM(quantidade) AS unidades, SUM(total_centimos) AS total"
+            " FROM resumo_dia_item" + filtro + " GROUP BY item_id)"
+            " ORDER BY unidades DESC, item_id LIMIT ?", parametros + [limite])
+
+    def mistura_categorias(self, desde=None, ate=None):
+        """
+        Retorna [(categoria, quantidade, total em cêntimos, fração do total)]
+        por ordem decrescente de faturação.
+        """
+        filtro, parametros = filtro_dias(desde, ate)
+        linhas = self._consultar(
+            "SELECT categoria, SUM(quantidade), SUM(total_centimos) AS total"
+            " FROM resumo_dia_item" + filtro +
+            " GROUP BY categoria ORDER BY total DESC", parametros)
+        total_geral = sum(linha[2] for linha in linhas)
+        return [(categoria, quantidade, total, total / total_geral if total_geral else 0.0)
+                for categoria, quantidade, total in linhas]
+
+    def totais_por_metodo(self, desde=None, ate=None):
+        """Retorna [(método de pagamento, número de contas, total em cêntimos)]."""
+        filtro, parametros = filtro_dias(desde, ate)
+        return self._consultar(
+            "SELECT metodo, SUM(contas), SUM(total_centimos) FROM resumo_dia_metodo" + filtro +
+            " GROUP BY metodo ORDER BY metodo", parametros)
+
+    def estatisticas(self):
+        """Retorna contadores do registo (contas em espera, descartadas e rejeitadas)."""
+        return {
+            'em_espera': self.fila.qsize(),
+            'descartadas': self.descartadas,
+            'rejeitadas': self.rejeitadas,
+            'erro': str(self.erro) if self.erro else None,
+        }
+
+# ================================
+# RELATÓRIO NA LINHA DE COMANDO
+# ================================
+
+def main(argumentos=None):
+    """Mostra um relatório de vendas a partir da base de dados."""
+    pasta_dados = os.environ.get("MENU_RESTAURANTE_DADOS") or os.path.join(
+        os.path.expanduser("~"), ".local", "share", "menu_restaurante")
+    parser = argparse.ArgumentParser(description="Relatório de vendas do restaurante.")
+    parser.add_argument("ficheiro", nargs="?", default=os.path.join(pasta_dados, "vendas.db"))
+    parser.add_argument("--desde", help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--ate", help="último dia (AAAA-MM-DD)")
+    parser.add_argument("--top", type=int, default=10, help="número de itens mais vendidos")
+    args = parser.parse_args(argumentos)
+
+    if not os.path.exists(args.ficheiro):
+        parser.error(f"não existe a base de dados {args.ficheiro}")
+
+    registo = RegistoVendas(args.ficheiro)
+    try:
+        print("TOTAIS DIÁRIOS")
+        for dia, contas, total in registo.totais_diarios(args.desde, args.ate):
+            print(f"  {dia}  {contas:>5} contas  {formatar_euros(total):>12}")
+        print("\nITENS MAIS VENDIDOS")
+        for _, item, categoria, quantidade, total in registo.itens_mais_vendidos(args.top, args.desde, args.ate):
+            print(f"  {item:<35} {categoria:<24} {quantidade:>6}  {formatar_euros(total):>12}")
+        print("\nMISTURA DE CATEGORIAS")
+        for categoria, quantidade, total, fracao in registo.mistura_categorias(args.desde, args.ate):
+            print(f"  {categoria:<24} {quantidade:>6}  {formatar_euros(total):>12}  {fracao:>6.1%}")
+        print("\nMÉTODOS DE PAGAMENTO")
+        for metodo, contas, total in registo.totais_por_metodo(args.desde, args.ate):
+            print(f"  {metodo:<12} {contas:>5} contas  {formatar_euros(total):>12}")
+    finally:
+        registo.fechar()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())